@@ -1,6 +1,5 @@
 import logging
 from enum import Enum
-from importlib.resources import read_text
 
 import geopandas as gpd
 import matplotlib.colors as mcolors
@@ -18,22 +17,59 @@ from mobility_tools.utils.exceptions import SizeLimitExceededError
 from plotly.graph_objects import Figure
 from pydantic_extra_types.color import Color
 
-from bikeability.components.utils.utils import Topics
+from bikeability.components.detour_factors.detour_cache import DetourFactorCache, get_cached_detour_factors
+from bikeability.components.detour_factors.detour_engine import DetourEngine
+from bikeability.components.detour_factors.hexgrid import cells_to_aoi, get_hexgrid, select_cells_with_paths
+from bikeability.components.detour_factors.local_routing import get_local_detour_factors
+from bikeability.components.utils.utils import Topics, read_resource
+from bikeability.core.tracing import SpanKind, start_span
 
 log = logging.getLogger(__name__)
 
+DETOUR_PROFILE = 'cycling-regular'
+DETOUR_HISTOGRAM_BINS = 30
+
 
 def detour_factor_analysis(
     aoi: shapely.MultiPolygon,
     paths: gpd.GeoDataFrame,
     ors_settings: ORSSettings | None,
     resources: ComputationResources,
+    cache: DetourFactorCache | None = None,
+    engine: DetourEngine = DetourEngine.ORS,
 ) -> list[Artifact]:
-    if ors_settings is None:
+    if engine == DetourEngine.ORS and ors_settings is None:
         raise ClimatoologyUserError('Could not run detour factors, as plugin was initialised without ORS settings')
 
+    def compute_detour_factors(detour_aoi: shapely.MultiPolygon) -> gpd.GeoDataFrame:
+        if engine == DetourEngine.LOCAL:
+            return get_local_detour_factors(aoi=detour_aoi, paths=paths)
+        with start_span(
+            'ors get_detour_factors',
+            kind=SpanKind.CLIENT,
+            attributes={'ors.profile': DETOUR_PROFILE, 'request.paths.count': len(paths)},
+        ) as span:
+            detour_factors = get_detour_factors(
+                aoi=detour_aoi, paths=paths, ors_settings=ors_settings, profile=DETOUR_PROFILE
+            )
+            span.set_attribute('features.count', len(detour_factors))
+        return detour_factors
+
+    hexgrid = get_hexgrid(aoi)
+    routable_cells = select_cells_with_paths(hexgrid, paths)
+    log.info(
+        f'Skipping routing for {len(hexgrid) - len(routable_cells)} of {len(hexgrid)} cells without bikeable paths'
+    )
+    if routable_cells.empty:
+        raise ClimatoologyUserError('There are no bikeable paths in the area to compute detour factors for.')
+
     try:
-        detour_factors = get_detour_factors(aoi=aoi, paths=paths, ors_settings=ors_settings, profile='cycling-regular')
+        if cache is None:
+            detour_factors = compute_detour_factors(cells_to_aoi(routable_cells))
+        else:
+            detour_factors = get_cached_detour_factors(
+                routable_cells, paths, cache, f'{engine.value}/{DETOUR_PROFILE}', compute_detour_factors
+            )
     except SizeLimitExceededError:
         raise ClimatoologyUserError('Detour Factors failed on an aoi too large for computation timeout.')
 
@@ -57,7 +93,7 @@ def build_detour_factor_artifact(
         tags={Topics.CONNECTIVITY, Topics.BARRIERS},
         filename='hexgrid_detours',
         summary='Can I reach my surroundings without big detours?',
-        description=read_text('bikeability.resources.info.detour_factors', 'description.md'),
+        description=read_resource('bikeability.resources.info.detour_factors', 'description.md'),
     )
 
     return create_vector_artifact(
@@ -113,16 +149,12 @@ def summarise_detour(
     log.info('Summarising detour factor stats')
     stats = hexgrid.dropna(how='any')
 
-    min_value = stats['detour_factor'].min()
-    max_value = stats.loc[stats['detour_factor'] != np.inf, 'detour_factor'].max()
-    counts, bin_edges = np.histogram(stats['detour_factor'], bins=30, range=(min_value, max_value))
-
-    cmap = pyplt.get_cmap('YlOrRd', len(counts))
-    colors = [mcolors.to_hex(cmap(i)) for i in range(len(counts))]
+    cmap = pyplt.get_cmap('YlOrRd', DETOUR_HISTOGRAM_BINS)
+    colors = [mcolors.to_hex(cmap(i)) for i in range(DETOUR_HISTOGRAM_BINS)]
 
     histogram = go.Histogram(
         x=stats['detour_factor'],
-        nbinsx=30,
+        nbinsx=DETOUR_HISTOGRAM_BINS,
         histnorm='percent',
         marker=dict(color=colors),
         hovertemplate='Range: %{x}<br>Percentage: %{y:.2f}%<extra></extra>',
@@ -138,6 +170,10 @@ def summarise_detour(
         yaxis_title=None,
         margin=dict(t=30, b=60, l=80, r=30),
     )
+    if not np.isfinite(stats['detour_factor']).any():
+        detour_fig.add_annotation(
+            text='No routable cells', xref='paper', yref='paper', x=0.5, y=0.5, showarrow=False, font=dict(size=16)
+        )
     return detour_fig
 
 
@@ -0,0 +1,132 @@
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Callable
+
+import geopandas as gpd
+import pandas as pd
+import shapely
+
+log = logging.getLogger(__name__)
+
+FINGERPRINT_BUFFER_M = 150  # covers the ring of neighbouring resolution 10 cells that the routes of a cell lead to
+
+
+class DetourFactorCache:
+    """Detour factors per hex cell, keyed by the cell id, the routing profile and a fingerprint of the paths around it.
+
+    Entries are held in memory for the lifetime of the worker and, if a `cache_dir` is given, persisted as parquet so
+    that they survive restarts.
+    """
+
+    def __init__(self, cache_dir: Path | None = None):
+        self.cache_file = None if cache_dir is None else Path(cache_dir) / 'detour_factors.parquet'
+        self._lock = threading.Lock()
+        self._entries = pd.DataFrame(
+            {'fingerprint': pd.Series(dtype=str), 'detour_factor': pd.Series(dtype=float)},
+            index=pd.MultiIndex.from_tuples([], names=['id', 'profile']),
+        )
+
+        if self.cache_file is not None and self.cache_file.exists():
+            self._entries = pd.read_parquet(self.cache_file)
+            log.debug(f'Loaded {len(self._entries)} cached detour factors from {self.cache_file}')
+
+    def lookup(self, fingerprints: pd.Series, profile: str) -> pd.Series:
+        """Return the cached detour factors of all cells whose fingerprint is unchanged."""
+        keys = pd.MultiIndex.from_arrays([fingerprints.index, [profile] * len(fingerprints)], names=['id', 'profile'])
+        with self._lock:
+            cached = self._entries.reindex(keys)
+
+        hits = cached['fingerprint'].to_numpy() == fingerprints.to_numpy()
+        return pd.Series(
+            cached.loc[hits, 'detour_factor'].to_numpy(), index=fingerprints.index[hits], name='detour_factor'
+        )
+
+    def update(self, detour_factors: pd.Series, fingerprints: pd.Series, profile: str) -> None:
+        fingerprints = fingerprints.reindex(detour_factors.index).dropna()
+        if fingerprints.empty:
+            return
+
+        new_entries = pd.DataFrame(
+            {'fingerprint': fingerprints, 'detour_factor': detour_factors.loc[fingerprints.index]},
+        )
+        new_entries.index = pd.MultiIndex.from_arrays(
+            [fingerprints.index, [profile] * len(fingerprints)], names=['id', 'profile']
+        )
+
+        with self._lock:
+            self._entries = pd.concat([self._entries.drop(new_entries.index, errors='ignore'), new_entries])
+            if self.cache_file is not None:
+                self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+                self._entries.to_parquet(self.cache_file)
+
+
+def fingerprint_cells(
+    hexgrid: gpd.GeoDataFrame, paths: gpd.GeoDataFrame, buffer_m: float = FINGERPRINT_BUFFER_M
+) -> pd.Series:
+    """Hash the OSM ids, path sharing categories and geometries of all paths within `buffer_m` of each cell.
+
+    The routes of a cell also run over the paths around it, so an edit next to a cell changes its fingerprint too. Only
+    detours leaving the buffer are missed.
+    """
+    path_keys = (
+        paths['@osmId'].astype(str)
+        + '|'
+        + paths['path_sharing'].map(lambda category: category.value)
+        + '|'
+        + pd.Series(shapely.to_wkb(paths.geometry.values, hex=True), index=paths.index)
+    )
+    path_hashes = path_keys.map(lambda key: hashlib.sha1(key.encode()).hexdigest())
+
+    utm_crs = hexgrid.estimate_utm_crs()
+    cell_paths = (
+        hexgrid[['geometry']]
+        .to_crs(utm_crs)
+        .sjoin(paths[['geometry']].to_crs(utm_crs), how='inner', predicate='dwithin', distance=buffer_m)
+    )
+    cell_path_hashes = pd.Series(path_hashes.loc[cell_paths['index_right']].to_numpy(), index=cell_paths.index)
+    cell_fingerprints = cell_path_hashes.groupby(level=0).agg(
+        lambda hashes: hashlib.sha1(''.join(sorted(hashes)).encode()).hexdigest()
+    )
+
+    empty_fingerprint = hashlib.sha1(b'').hexdigest()
+    return cell_fingerprints.reindex(hexgrid.index, fill_value=empty_fingerprint).rename('fingerprint')
+
+
+def get_cached_detour_factors(
+    hexgrid: gpd.GeoDataFrame,
+    paths: gpd.GeoDataFrame,
+    cache: DetourFactorCache,
+    profile: str,
+    compute_detour_factors: Callable[[shapely.MultiPolygon], gpd.GeoDataFrame],
+) -> gpd.GeoDataFrame:
+    """Assemble the detour factors for the cells, only recomputing cells that are not cached or whose paths changed.
+
+    `compute_detour_factors` is called with the dissolved AOI of the missing cells and must return a GeoDataFrame
+    indexed by cell id with a `detour_factor` column, like `get_detour_factors` does.
+    """
+    # imported here, as h3pandas is slow to import and not needed to construct the cache at start-up
+    from bikeability.components.detour_factors.hexgrid import cells_to_aoi
+
+    fingerprints = fingerprint_cells(hexgrid, paths)
+
+    cached_detour_factors = cache.lookup(fingerprints, profile)
+    missing_cells = hexgrid.index.difference(cached_detour_factors.index)
+    log.info(f'Reusing {len(cached_detour_factors)} cached detour factors, computing {len(missing_cells)} cells')
+
+    cached = gpd.GeoDataFrame(
+        {'detour_factor': cached_detour_factors},
+        geometry=hexgrid.loc[cached_detour_factors.index, 'geometry'],
+        crs='EPSG:4326',
+    )
+    if missing_cells.empty:
+        return cached
+
+    computed = compute_detour_factors(cells_to_aoi(hexgrid.loc[missing_cells]))
+    computed = computed.loc[computed.index.difference(cached.index)]
+    cache.update(computed['detour_factor'], fingerprints, profile)
+
+    return gpd.GeoDataFrame(
+        pd.concat([cached, computed[['detour_factor', 'geometry']]]), geometry='geometry', crs='EPSG:4326'
+    )
@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class DetourEngine(Enum):
+    ORS = 'ors'
+    LOCAL = 'local'
@@ -0,0 +1,31 @@
+import geopandas as gpd
+import h3pandas  # noqa: F401 (registers the .h3 accessor)
+import numpy as np
+import shapely
+
+from bikeability.components.path_sharing.path_sharing import PathSharing
+
+DETOUR_HEX_RESOLUTION = 10
+
+
+def get_hexgrid(aoi: shapely.MultiPolygon, resolution: int = DETOUR_HEX_RESOLUTION) -> gpd.GeoDataFrame:
+    """H3 cells covering the AOI, indexed by their cell id as returned by `get_detour_factors`."""
+    hexgrid = gpd.GeoDataFrame(geometry=[aoi], crs='EPSG:4326').h3.polyfill_resample(resolution)
+    hexgrid.index.name = 'id'
+    return hexgrid[['geometry']]
+
+
+def cells_to_aoi(hexgrid: gpd.GeoDataFrame) -> shapely.MultiPolygon:
+    """Dissolve a set of hex cells into a single AOI that can be handed to the routing."""
+    dissolved = shapely.union_all(hexgrid.geometry.values)
+    if isinstance(dissolved, shapely.Polygon):
+        return shapely.MultiPolygon([dissolved])
+    return dissolved
+
+
+def select_cells_with_paths(hexgrid: gpd.GeoDataFrame, paths: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+    """Drop cells that do not intersect any bikeable path, e.g. in rivers, forests or farmland."""
+    bikeable_paths = paths.loc[paths.path_sharing.isin(PathSharing.get_bikeable()), 'geometry']
+    tree = shapely.STRtree(bikeable_paths.values)
+    cell_positions, _ = tree.query(hexgrid.geometry.values, predicate='intersects')
+    return hexgrid.iloc[np.unique(cell_positions)]
@@ -0,0 +1,152 @@
+import logging
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from pyproj import Transformer
+from scipy.sparse import csr_array
+from scipy.sparse.csgraph import dijkstra
+from scipy.spatial import cKDTree
+
+from bikeability.components.detour_factors.hexgrid import get_hexgrid
+from bikeability.components.path_sharing.path_sharing import PathSharing
+
+log = logging.getLogger(__name__)
+
+NODE_PRECISION = 7  # decimal degrees, ~1 cm
+MAX_SNAPPING_DISTANCE_M = 75.0  # roughly the circumradius of a resolution 10 hex cell
+MAX_DETOUR_FACTOR = 10.0
+
+
+class PathNetwork:
+    """Undirected topological graph of the bikeable line paths with a node at every (shared) vertex.
+
+    Edge weights are segment lengths in metres, measured in the UTM zone of the paths.
+    """
+
+    def __init__(self, paths: gpd.GeoDataFrame):
+        bikeable_lines = paths[
+            paths.geom_type.isin(['LineString', 'MultiLineString'])
+            & paths.path_sharing.isin(PathSharing.get_bikeable())
+        ]
+        self.crs = paths.estimate_utm_crs() if not bikeable_lines.empty else None
+
+        line_parts = shapely.get_parts(bikeable_lines.geometry.values)
+        coordinates, part_index = shapely.get_coordinates(line_parts, return_index=True)
+
+        node_keys, node_ids = np.unique(np.round(coordinates, NODE_PRECISION), axis=0, return_inverse=True)
+        node_ids = node_ids.ravel()
+        if self.crs is None:
+            self.node_coordinates = np.empty((0, 2))
+        else:
+            to_utm = Transformer.from_crs('EPSG:4326', self.crs, always_xy=True)
+            self.node_coordinates = np.column_stack(to_utm.transform(node_keys[:, 0], node_keys[:, 1]))
+
+        same_part = part_index[:-1] == part_index[1:]
+        source, target = node_ids[:-1][same_part], node_ids[1:][same_part]
+        not_a_loop = source != target
+        source, target = source[not_a_loop], target[not_a_loop]
+        weights = np.hypot(*(self.node_coordinates[source] - self.node_coordinates[target]).T)
+
+        # csr construction sums duplicate edges, so only keep the shortest of parallel segments
+        source, target = np.minimum(source, target), np.maximum(source, target)
+        order = np.lexsort((weights, target, source))
+        source, target, weights = source[order], target[order], weights[order]
+        first = np.ones(len(source), dtype=bool)
+        first[1:] = (source[1:] != source[:-1]) | (target[1:] != target[:-1])
+
+        node_count = len(node_keys)
+        self.graph = csr_array((weights[first], (source[first], target[first])), shape=(node_count, node_count))
+        self._node_tree = cKDTree(self.node_coordinates) if node_count > 0 else None
+        log.debug(f'Built path network with {node_count} nodes and {first.sum()} edges')
+
+    def snap(self, points: gpd.GeoSeries, max_distance: float = MAX_SNAPPING_DISTANCE_M) -> np.ndarray:
+        """Return the nearest node for each point, or -1 if there is none within `max_distance`."""
+        if self._node_tree is None:
+            return np.full(len(points), -1)
+
+        projected = points.to_crs(self.crs)
+        distances, nodes = self._node_tree.query(
+            np.column_stack([projected.x, projected.y]), distance_upper_bound=max_distance
+        )
+        return np.where(np.isinf(distances), -1, nodes)
+
+    def network_distances(self, sources: np.ndarray, targets: np.ndarray, limit: float) -> np.ndarray:
+        """Shortest network distances between node pairs, `inf` where no path shorter than `limit` exists.
+
+        Such a path cannot leave the disc of radius `limit` around its source. The sources are therefore grouped into
+        square tiles of side `limit`, and the sources of each tile are routed together on the subgraph of the nodes
+        within reach of the tile. The work per tile depends on the density of the network, not on its size.
+        """
+        distances = np.full(len(sources), np.inf)
+        if len(sources) == 0:
+            return distances
+
+        tile_size = max(limit, 1.0)
+        reach = limit + tile_size * np.sqrt(0.5)
+        tiles = np.floor(self.node_coordinates[sources] / tile_size).astype(np.int64)
+        _, pair_tiles = np.unique(tiles, axis=0, return_inverse=True)
+        pair_tiles = pair_tiles.ravel()
+        order = np.argsort(pair_tiles, kind='stable')
+
+        for pairs in np.split(order, np.flatnonzero(np.diff(pair_tiles[order])) + 1):
+            tile_centre = (tiles[pairs[0]] + 0.5) * tile_size
+            nodes = np.asarray(self._node_tree.query_ball_point(tile_centre, reach, return_sorted=True))
+            subgraph = self.graph[nodes][:, nodes]
+
+            local_targets = np.minimum(np.searchsorted(nodes, targets[pairs]), len(nodes) - 1)
+            in_reach = nodes[local_targets] == targets[pairs]
+            local_sources, source_rows = np.unique(np.searchsorted(nodes, sources[pairs]), return_inverse=True)
+            tile_distances = dijkstra(subgraph, directed=False, indices=local_sources, limit=limit)
+            distances[pairs[in_reach]] = tile_distances[source_rows.ravel()[in_reach], local_targets[in_reach]]
+
+        return distances
+
+
+def get_local_detour_factors(
+    aoi: shapely.MultiPolygon,
+    paths: gpd.GeoDataFrame,
+    max_detour_factor: float = MAX_DETOUR_FACTOR,
+) -> gpd.GeoDataFrame:
+    """Compute detour factors per hex cell by routing on the fetched path network instead of a remote ORS.
+
+    The centre and the corners of each cell are snapped to the nearest path node. The detour factor of a cell is the
+    mean ratio of network to Euclidean distance from its centre to its corners. It is `inf` if any corner cannot be
+    reached within `max_detour_factor` times the Euclidean distance. Cells without a path around their centre are
+    dropped. The result matches the output of `get_detour_factors`.
+    """
+    log.info('Computing detour factors on the local path network')
+    hexgrid = get_hexgrid(aoi)
+    network = PathNetwork(paths)
+
+    cell_centres = gpd.GeoSeries(shapely.centroid(hexgrid.geometry.values), crs=hexgrid.crs)
+    centre_nodes = network.snap(cell_centres)
+    hexgrid = hexgrid[centre_nodes >= 0].copy()
+    centre_nodes = centre_nodes[centre_nodes >= 0]
+
+    corner_coordinates, cell_positions = shapely.get_coordinates(
+        shapely.get_exterior_ring(hexgrid.geometry.values), return_index=True
+    )
+    is_closing = np.ones(len(cell_positions), dtype=bool)
+    is_closing[:-1] = cell_positions[1:] != cell_positions[:-1]
+    corner_coordinates, cell_positions = corner_coordinates[~is_closing], cell_positions[~is_closing]
+    corner_nodes = network.snap(gpd.GeoSeries(shapely.points(corner_coordinates), crs=hexgrid.crs))
+
+    source = centre_nodes[cell_positions]
+    reachable = corner_nodes >= 0
+    euclidean_distances = np.hypot(
+        *(network.node_coordinates[source[reachable]] - network.node_coordinates[corner_nodes[reachable]]).T
+    )
+
+    ratios = np.full(len(source), np.inf)
+    if reachable.any():
+        network_distances = network.network_distances(
+            source[reachable], corner_nodes[reachable], limit=max_detour_factor * euclidean_distances.max()
+        )
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratios[reachable] = np.where(euclidean_distances > 0, network_distances / euclidean_distances, 1.0)
+    ratios[ratios > max_detour_factor] = np.inf
+
+    hexgrid['detour_factor'] = pd.Series(ratios).groupby(cell_positions).mean().to_numpy()
+    return hexgrid[['detour_factor', 'geometry']]
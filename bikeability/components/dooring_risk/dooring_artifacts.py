@@ -1,20 +1,20 @@
-from importlib.resources import read_text
-
 import geopandas as gpd
+import plotly.graph_objects as go
 from climatoology.base.artifact import Artifact, ArtifactMetadata, Legend
-from climatoology.base.artifact_creators import create_vector_artifact
+from climatoology.base.artifact_creators import create_plotly_chart_artifact
 from climatoology.base.computation import ComputationResources
 from pydantic_extra_types.color import Color
 
 from bikeability.components.dooring_risk.dooring_risk import DooringRiskCategory
-from bikeability.components.utils.utils import Topics
+from bikeability.components.utils.colors import map_categories
+from bikeability.components.utils.summaries import SummaryEngine, category_stacked_bar
+from bikeability.components.utils.utils import Topics, dissolve_paths, read_resource
+from bikeability.components.utils.vector_tiles import VectorTileOptions
+from bikeability.components.utils.vector_writer import create_path_artifact
 
 
-def build_dooring_artifact(
-    dooring_risk_paths: gpd.GeoDataFrame,
-    resources: ComputationResources,
-) -> Artifact:
-    legend = Legend(
+def get_dooring_legend() -> Legend:
+    return Legend(
         legend_data={
             DooringRiskCategory.DOORING_SAFE.value: Color('#313695'),
             DooringRiskCategory.DOORING_RISK.value: Color('#f00000'),
@@ -22,27 +22,63 @@ def build_dooring_artifact(
         },
     )
 
-    dooring_risk_paths['color'] = dooring_risk_paths.dooring_category.apply(get_colors_from_dict_legend, legend=legend)
+
+def style_dooring_risk(dooring_risk_paths: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+    legend = get_dooring_legend()
+    dooring_risk_paths['color'] = map_categories(
+        dooring_risk_paths.dooring_category, lambda category: get_colors_from_dict_legend(category, legend)
+    )
+    dooring_risk_paths['label'] = map_categories(dooring_risk_paths['dooring_category'], lambda x: x.value)
+    return dooring_risk_paths
+
+
+def build_dooring_artifact(
+    dooring_risk_paths: gpd.GeoDataFrame,
+    resources: ComputationResources,
+    tiles: VectorTileOptions | None = None,
+) -> Artifact:
+    dooring_risk_paths = style_dooring_risk(dissolve_paths(dooring_risk_paths, 'dooring_category'))
 
     metadata = ArtifactMetadata(
         name='Dooring Risk',
         primary=True,
         tags={Topics.TRAFFIC, Topics.SAFETY},
         filename='cycling_infrastructure_dooring_risk',
-        summary=read_text('bikeability.resources.info.dooring_risk', 'summary.md'),
-        description=read_text('bikeability.resources.info.dooring_risk', 'description.md'),
+        summary=read_resource('bikeability.resources.info.dooring_risk', 'summary.md'),
+        description=read_resource('bikeability.resources.info.dooring_risk', 'description.md'),
     )
 
-    dooring_risk_paths['label'] = dooring_risk_paths['dooring_category'].apply(lambda x: x.value)
-
-    return create_vector_artifact(
-        data=dooring_risk_paths[['@osmId', 'color', 'label', 'geometry']],
+    return create_path_artifact(
+        data=dooring_risk_paths[['@osmId', '@osmIds', 'color', 'label', 'geometry']],
         metadata=metadata,
         resources=resources,
-        legend=legend,
+        legend=get_dooring_legend(),
+        tiles=tiles,
     )
 
 
 def get_colors_from_dict_legend(category: DooringRiskCategory, legend: Legend) -> Color:
     assert isinstance(getattr(legend, 'legend_data'), dict), 'Legend data must be a dict'
     return legend.legend_data[category.value]
+
+
+def summarise_dooring_risk(summary: SummaryEngine, dooring_risk_paths: gpd.GeoDataFrame) -> go.Figure:
+    """Dooring risk by length. The risk is matched to the paths by OSM id, as the parking join reindexes them."""
+    legend = get_dooring_legend()
+    lengths = summary.length_by(
+        summary.match_osm_ids(dooring_risk_paths, 'dooring_category'), list(DooringRiskCategory)
+    )
+    return category_stacked_bar(
+        lengths, lambda category: get_colors_from_dict_legend(category, legend), axis_label='Dooring Risk'
+    )
+
+
+def build_dooring_risk_summary_artifact(aoi_aggregate: go.Figure, resources: ComputationResources) -> Artifact:
+    metadata = ArtifactMetadata(
+        name='Distribution of Dooring Risk',
+        summary='How is the total length of bikeable paths distributed across the dooring risk categories?',
+        tags={Topics.SAFETY, Topics.SUMMARY},
+        filename='aggregation_aoi_dooring_risk',
+    )
+
+    return create_plotly_chart_artifact(figure=aoi_aggregate, metadata=metadata, resources=resources)
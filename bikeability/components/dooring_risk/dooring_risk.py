@@ -3,13 +3,17 @@ from enum import Enum
 from typing import Dict
 
 import geopandas as gpd
+import numpy as np
 import pandas as pd
 from ohsome_filter_to_sql.main import OhsomeFilter
 
 from bikeability.components.path_sharing.path_sharing import PathSharing
+from bikeability.components.utils.path_index import PathIndex
 
 log = logging.getLogger(__name__)
 
+PARKING_DISTANCE_M = 10
+
 
 class DooringRiskCategory(Enum):
     DOORING_SAFE = 'safe_route'
@@ -86,42 +90,38 @@ def apply_dooring_filters(row: pd.Series) -> DooringRiskCategory:
             return DooringRiskCategory.UNKNOWN
 
 
-def get_dooring_risk(paths: gpd.GeoDataFrame, parking: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+def get_dooring_risk(
+    paths: gpd.GeoDataFrame, parking: gpd.GeoDataFrame, path_index: PathIndex | None = None
+) -> gpd.GeoDataFrame:
+    """Rate the dooring risk of the bikeable paths, taking the parallel `parking` next to them into account.
+
+    `path_index` must index the given `paths`. It is built if not given.
+    """
     log.debug('Applying dooring risk rating')
 
+    if path_index is None:
+        path_index = PathIndex(paths)
+    paths = paths.assign(parking=find_paths_near_parking(path_index, parking))
     paths = paths[paths.path_sharing.isin(PathSharing.get_bikeable())]
 
     polygon_paths = paths[paths.geom_type.isin(['Polygon', 'MultiPolygon'])].copy(deep=False)
     polygon_paths['dooring_category'] = DooringRiskCategory.DOORING_SAFE
 
-    line_paths = paths[paths.geom_type.isin(['LineString', 'MultiLineString'])]
+    line_paths = paths[paths.geom_type.isin(['LineString', 'MultiLineString'])].copy(deep=False)
 
     if line_paths.empty:
         return polygon_paths[['@osmId', 'geometry', 'dooring_category']]
 
-    line_paths_with_parking = find_nearest_parking(line_paths, parking)
+    line_paths['dooring_category'] = line_paths.apply(apply_dooring_filters, axis=1)
 
-    line_paths_with_parking['dooring_category'] = line_paths_with_parking.apply(apply_dooring_filters, axis=1)
-
-    dooring_risk_paths = pd.concat([polygon_paths, line_paths_with_parking], ignore_index=True)
+    dooring_risk_paths = pd.concat([polygon_paths, line_paths], ignore_index=True)
 
     return gpd.GeoDataFrame(dooring_risk_paths[['@osmId', 'geometry', 'dooring_category']])
 
 
-def find_nearest_parking(line_paths, parking):
-    utm_crs = line_paths.estimate_utm_crs()
-    line_paths = line_paths.to_crs(utm_crs)
-    parking = parking.to_crs(utm_crs)
-    line_paths_with_parking = line_paths.sjoin_nearest(parking, how='left', max_distance=10, distance_col='distance')
-
-    line_paths_with_parking['parking'] = line_paths_with_parking.apply(lambda row: pd.notna(row['distance']), axis=1)
-    line_paths_with_parking = line_paths_with_parking.to_crs('EPSG:4326')
-
-    line_paths = line_paths_with_parking.rename(columns={'@other_tags_left': '@other_tags', '@osmId_left': '@osmId'})
-
-    line_paths = line_paths[['geometry', '@osmId', '@other_tags', 'parking', 'path_sharing']]
-
-    return line_paths
+def find_paths_near_parking(path_index: PathIndex, parking: gpd.GeoDataFrame) -> np.ndarray:
+    """Whether each indexed path is within `PARKING_DISTANCE_M` of any parking, in a single bulk query."""
+    return path_index.within_distance(parking.geometry.to_numpy(), PARKING_DISTANCE_M)
 
 
 def parallel_parking_filter(geometry_type) -> OhsomeFilter:
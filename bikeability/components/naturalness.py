@@ -1,25 +1,25 @@
 import datetime as dt
 import logging
-from importlib.resources import read_text
 
 import geopandas as gpd
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 import shapely
 from climatoology.base.artifact import Artifact, ArtifactMetadata, ContinuousLegendData, Legend
-from climatoology.base.artifact_creators import (
-    create_plotly_chart_artifact,
-    create_vector_artifact,
-)
+from climatoology.base.artifact_creators import create_plotly_chart_artifact
 from climatoology.base.computation import ComputationResources
 from climatoology.base.exception import ClimatoologyUserError
 from climatoology.utility.api import TimeRange
 from climatoology.utility.naturalness import NaturalnessIndex, NaturalnessUtility
 from plotly.graph_objs import Figure
-from pyproj import CRS
 
 from bikeability.components.utils.colors import get_continuous_colors
-from bikeability.components.utils.utils import Topics, calculate_length
+from bikeability.components.utils.summaries import SummaryEngine
+from bikeability.components.utils.utils import Topics, read_resource
+from bikeability.components.utils.vector_tiles import VectorTileOptions
+from bikeability.components.utils.vector_writer import create_path_artifact
+from bikeability.core.tracing import SpanKind, start_span
 
 log = logging.getLogger(__name__)
 
@@ -64,13 +64,23 @@ def fetch_naturalness_by_vector(
     agg_stats: list[str],
     resolution: int = 30,
 ) -> gpd.GeoDataFrame:
-    naturalness_gdf = nature_utility.compute_vector(
-        index=index,
-        aggregation_stats=agg_stats,
-        vectors=vectors,
-        time_range=time_range,
-        resolution=resolution,
-    )
+    with start_span(
+        'naturalness compute_vector',
+        kind=SpanKind.CLIENT,
+        attributes={
+            'naturalness.index': index.value,
+            'naturalness.resolution': resolution,
+            'request.features.count': sum(len(vector) for vector in vectors),
+        },
+    ) as span:
+        naturalness_gdf = nature_utility.compute_vector(
+            index=index,
+            aggregation_stats=agg_stats,
+            vectors=vectors,
+            time_range=time_range,
+            resolution=resolution,
+        )
+        span.set_attribute('features.count', len(naturalness_gdf))
 
     naturalness_gdf = naturalness_gdf.rename(columns={'median': 'naturalness'})
     return naturalness_gdf
@@ -141,6 +151,7 @@ def build_naturalness_artifact(
     paths_all: gpd.GeoDataFrame,
     resources: ComputationResources,
     cmap_name: str = 'YlGn',
+    tiles: VectorTileOptions | None = None,
 ) -> Artifact:
     # If no good data is returned (e.g. due to an error), return a text artifact with a simple message
     if paths_all['naturalness'].isna().all():
@@ -167,14 +178,14 @@ def build_naturalness_artifact(
 
     metadata = ArtifactMetadata(
         name='Path Greenness',
-        summary=read_text('bikeability.resources.info.naturalness', 'summary.md'),
-        description=read_text('bikeability.resources.info.naturalness', 'description.md'),
+        summary=read_resource('bikeability.resources.info.naturalness', 'summary.md'),
+        description=read_resource('bikeability.resources.info.naturalness', 'description.md'),
         filename='cycling_infrastructure_path_greenness',
         tags={Topics.GREENNESS},
     )
 
-    return create_vector_artifact(
-        data=paths_all, metadata=metadata, resources=resources, label='naturalness', legend=legend
+    return create_path_artifact(
+        data=paths_all, metadata=metadata, resources=resources, label='naturalness', legend=legend, tiles=tiles
     )
 
 
@@ -193,36 +204,22 @@ def build_naturalness_summary_bar_artifact(aoi_aggregate: Figure, resources: Com
     )
 
 
-def summarise_naturalness(
-    paths: gpd.GeoDataFrame,
-    projected_crs: CRS,
-    length_resolution_m: int = 1000,
-) -> go.Figure:
+def summarise_naturalness(summary: SummaryEngine) -> go.Figure:
     log.info('Summarising naturalness stats')
-    stats = calculate_length(length_resolution_m, paths, projected_crs)
-
-    stats['naturalness_rating'] = stats['naturalness'].apply(lambda x: 0 if x < 0.3 else (0.5 if x < 0.6 else 1))
-
-    naturalness_map = {
-        0: 'Low (< 0.3) ',
-        0.5: 'Medium (0.3 to 0.6)',
-        1: 'High (> 0.6)',
-        -999: 'Unknown greenness',
-    }
-    stats['naturalness_category'] = stats['naturalness_rating'].map(naturalness_map)
-
-    stats = stats.sort_values(
-        by=['naturalness_rating'],
-        ascending=False,
+    lengths = summary.length_by_bins(
+        summary.paths['naturalness'],
+        bins=[-np.inf, 0.3, 0.6, np.inf],
+        labels=['Low (< 0.3) ', 'Medium (0.3 to 0.6)', 'High (> 0.6)'],
     )
-    summary = stats.groupby(['naturalness_rating', 'naturalness_category'], sort=True)['length'].sum().reset_index()
+    ratings = pd.Series([0, 0.5, 1], index=lengths.index)[lengths > 0]
+    lengths = lengths[lengths > 0].round(2)
 
-    bar_colors = get_continuous_colors(summary.naturalness_rating, 'YlGn')
+    bar_colors = get_continuous_colors(ratings, 'YlGn')
 
     bar_fig = go.Figure(
         data=go.Bar(
-            x=summary['naturalness_category'],
-            y=summary['length'],
+            x=lengths.index.tolist(),
+            y=lengths.tolist(),
             marker_color=[c.as_hex() for c in bar_colors],
             hovertemplate='%{x}: %{y} km <extra></extra>',
         )
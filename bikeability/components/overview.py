@@ -0,0 +1,224 @@
+# h3pandas is imported through the hex grid by `get_overview_hexgrid`, to keep it out of the plugin start-up
+import logging
+from enum import Enum
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from climatoology.base.artifact import Artifact, ArtifactMetadata, ContinuousLegendData, Legend
+from climatoology.base.artifact_creators import create_vector_artifact
+from climatoology.base.computation import ComputationResources
+
+from bikeability.components.dooring_risk.dooring_risk import DooringRiskCategory
+from bikeability.components.path_sharing.path_sharing import PathSharing
+from bikeability.components.smoothness.smoothness import SmoothnessCategory
+from bikeability.components.surface_types.surface_types import SurfaceType
+from bikeability.components.utils.colors import get_continuous_colors, map_categories
+from bikeability.components.utils.utils import Topics, get_buffered_aoi, path_lengths
+
+log = logging.getLogger(__name__)
+
+OVERVIEW_HEX_RESOLUTION = 8  # ~0.7 km² per cell
+OVERVIEW_HEX_COVER_M = 1000  # more than the distance from any point of a resolution 8 cell to its centre
+OVERVIEW_MIN_PATHS = 50_000
+
+SMOOTH = {SmoothnessCategory.EXCELLENT, SmoothnessCategory.GOOD}
+PAVED = {
+    SurfaceType.ASPHALT,
+    SurfaceType.CONCRETE,
+    SurfaceType.PAVING_STONES,
+    SurfaceType.COBBLESTONE,
+    SurfaceType.PAVED,
+    SurfaceType.OTHER_PAVED,
+}
+
+
+def get_overview_hexgrid(aoi: shapely.MultiPolygon) -> gpd.GeoDataFrame:
+    """H3 cells covering every part of the AOI, including the cells that only partly overlap it.
+
+    The polyfill selects cells by their centre, so it is run on the AOI buffered by more than the size of a cell, and
+    the cells not overlapping the AOI itself are dropped again. Paths along the edge of the AOI thereby fall into a cell.
+    """
+    from bikeability.components.detour_factors.hexgrid import get_hexgrid
+
+    hexgrid = get_hexgrid(get_buffered_aoi(aoi, OVERVIEW_HEX_COVER_M), resolution=OVERVIEW_HEX_RESOLUTION)
+    return hexgrid[hexgrid.intersects(aoi)]
+
+
+def category_share(categories: pd.Series, selected: set[Enum]) -> pd.Series:
+    """100 for paths of a `selected` category and 0 for the others, or NaN if their category is unknown.
+
+    Averaged per cell, this is the share of the path length in percent.
+    """
+    return map_categories(
+        categories, lambda category: np.nan if category.value == 'unknown' else 100.0 * (category in selected)
+    ).astype(float)
+
+
+def aggregate_to_hexgrid(paths: gpd.GeoDataFrame, values: pd.Series, hexgrid: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+    """The length-weighted mean of the `values` of the line paths in each hex cell as `value`.
+
+    Each path is binned into the cell containing its midpoint. Paths without a value do not count, and `length_km` is
+    the length of the paths that do. Cells without any such path are dropped.
+    """
+    lines = paths.geom_type.isin(['LineString', 'MultiLineString']).to_numpy()
+    values = np.asarray(values, dtype=float)[lines]
+    valid = ~np.isnan(values)
+    geometries = paths.geometry.to_numpy()[lines][valid]
+    lengths = path_lengths(paths)[lines][valid]
+    values = values[valid]
+
+    midpoints = shapely.line_interpolate_point(geometries, 0.5, normalized=True)
+    path_positions, cell_positions = shapely.STRtree(hexgrid.geometry.to_numpy()).query(
+        midpoints, predicate='intersects'
+    )
+    # midpoints on the edge between two cells count for the first one only
+    path_positions, first = np.unique(path_positions, return_index=True)
+    cell_positions = cell_positions[first]
+
+    lengths = lengths[path_positions]
+    total_length = np.bincount(cell_positions, weights=lengths, minlength=len(hexgrid))
+    weighted_sum = np.bincount(cell_positions, weights=lengths * values[path_positions], minlength=len(hexgrid))
+
+    cells = hexgrid.assign(
+        value=np.divide(weighted_sum, total_length, out=np.full(len(hexgrid), np.nan), where=total_length > 0),
+        length_km=(total_length / 1000).round(2),
+    )
+    return cells[total_length > 0]
+
+
+def build_overview_artifact(
+    cells: gpd.GeoDataFrame,
+    metadata: ArtifactMetadata,
+    resources: ComputationResources,
+    cmap_name: str,
+    label_format: str = '%.0f%%',
+    vmin: float = 0,
+    vmax: float = 100,
+) -> Artifact:
+    """Hex cells colored by their aggregated `value` between `vmin` and `vmax`, and labelled with `label_format`."""
+    cells = cells.assign(
+        color=get_continuous_colors(cells['value'], cmap_name, vmin=vmin, vmax=vmax),
+        label=np.char.mod(label_format, cells['value'].to_numpy(dtype=float)),
+    )
+
+    legend = Legend(
+        legend_data=ContinuousLegendData(
+            cmap_name=cmap_name,
+            ticks={label_format % vmin: 0.0, label_format % vmax: 1.0},
+        )
+    )
+
+    return create_vector_artifact(
+        data=cells[['value', 'length_km', 'color', 'label', 'geometry']],
+        metadata=metadata,
+        resources=resources,
+        legend=legend,
+    )
+
+
+def build_overview_artifacts(
+    aoi: shapely.MultiPolygon,
+    paths: gpd.GeoDataFrame,
+    smoothness_paths: gpd.GeoDataFrame,
+    surface_type_paths: gpd.GeoDataFrame,
+    dooring_risk_paths: gpd.GeoDataFrame,
+    resources: ComputationResources,
+) -> list[Artifact]:
+    """Hex cell overviews of the path sharing, smoothness, surface type and dooring risk layers."""
+    hexgrid = get_overview_hexgrid(aoi)
+    log.debug(f'Aggregating the path layers into {len(hexgrid)} hex cells')
+    bikeable_paths = paths[paths.path_sharing.isin(PathSharing.get_bikeable())]
+
+    overviews = [
+        (
+            bikeable_paths,
+            category_share(bikeable_paths.path_sharing, {PathSharing.EXCLUSIVE}),
+            ArtifactMetadata(
+                name='Overview of Exclusive Bike Paths',
+                tags={Topics.TRAFFIC, Topics.SUMMARY},
+                filename='hexgrid_path_sharing',
+                summary='Which share of the bikeable paths in each area is exclusive to bikes?',
+            ),
+            'YlGn',
+        ),
+        (
+            smoothness_paths,
+            category_share(smoothness_paths.smoothness, SMOOTH),
+            ArtifactMetadata(
+                name='Overview of Smoothness',
+                tags={Topics.SURFACE, Topics.SUMMARY},
+                filename='hexgrid_smoothness',
+                summary='Which share of the paths with known smoothness in each area is good or excellent?',
+            ),
+            'RdYlGn',
+        ),
+        (
+            surface_type_paths,
+            category_share(surface_type_paths.surface_type, PAVED),
+            ArtifactMetadata(
+                name='Overview of Paved Surfaces',
+                tags={Topics.SURFACE, Topics.SUMMARY},
+                filename='hexgrid_surface_types',
+                summary='Which share of the paths with known surface in each area is paved?',
+            ),
+            'RdYlGn',
+        ),
+        (
+            dooring_risk_paths,
+            category_share(dooring_risk_paths.dooring_category, {DooringRiskCategory.DOORING_RISK}),
+            ArtifactMetadata(
+                name='Overview of Dooring Risk',
+                tags={Topics.SAFETY, Topics.SUMMARY},
+                filename='hexgrid_dooring_risk',
+                summary='Which share of the paths with known parking in each area has a risk of dooring?',
+            ),
+            'YlOrRd',
+        ),
+    ]
+
+    artifacts = []
+    for layer, values, metadata, cmap_name in overviews:
+        cells = aggregate_to_hexgrid(layer, values, hexgrid)
+        if cells.empty:
+            log.debug(f'Skipping the {metadata.name}, as no path has a known value')
+            continue
+        artifacts.append(build_overview_artifact(cells, metadata, resources, cmap_name))
+    return artifacts
+
+
+def build_slope_overview_artifact(
+    aoi: shapely.MultiPolygon, paths_with_slopes: gpd.GeoDataFrame, resources: ComputationResources
+) -> Artifact | None:
+    """Hex cell overview of the slopes, or `None` if no cell has a path with a known slope."""
+    cells = aggregate_to_hexgrid(paths_with_slopes, paths_with_slopes['slope'], get_overview_hexgrid(aoi))
+    if cells.empty:
+        log.debug('Skipping the Overview of Slope, as no path has a known value')
+        return None
+    metadata = ArtifactMetadata(
+        name='Overview of Slope',
+        tags={Topics.BARRIERS, Topics.SUMMARY},
+        filename='hexgrid_slope',
+        summary='How steep are the paths in each area on average?',
+    )
+    return build_overview_artifact(cells, metadata, resources, 'coolwarm', label_format='%.1f%%', vmax=6)
+
+
+def build_naturalness_overview_artifact(
+    aoi: shapely.MultiPolygon, naturalness_paths: gpd.GeoDataFrame, resources: ComputationResources
+) -> Artifact | None:
+    """Hex cell overview of the greenness, or `None` if no cell has a path with a known greenness."""
+    cells = aggregate_to_hexgrid(
+        naturalness_paths, naturalness_paths['naturalness'].clip(lower=0), get_overview_hexgrid(aoi)
+    )
+    if cells.empty:
+        log.debug('Skipping the Overview of Greenness, as no path has a known value')
+        return None
+    metadata = ArtifactMetadata(
+        name='Overview of Greenness',
+        tags={Topics.GREENNESS, Topics.SUMMARY},
+        filename='hexgrid_greenness',
+        summary='How green are the paths in each area on average?',
+    )
+    return build_overview_artifact(cells, metadata, resources, 'YlGn', label_format='%.2f', vmax=1)
@@ -1,44 +1,54 @@
-from importlib.resources import read_text
-
 import geopandas as gpd
 from climatoology.base.artifact import Artifact, ArtifactMetadata, Legend
-from climatoology.base.artifact_creators import create_vector_artifact
 from climatoology.base.computation import ComputationResources
 
 from bikeability.components.path_sharing.path_sharing import PathSharing
-from bikeability.components.utils.colors import get_qualitative_color
-from bikeability.components.utils.utils import Topics
+from bikeability.components.utils.colors import get_qualitative_color, map_categories
+from bikeability.components.utils.utils import Topics, dissolve_paths, read_resource
+from bikeability.components.utils.vector_tiles import VectorTileOptions
+from bikeability.components.utils.vector_writer import create_path_artifact
+
+
+def style_path_sharing(paths: gpd.GeoDataFrame, cmap_name: str = 'coolwarm') -> gpd.GeoDataFrame:
+    paths_without_restriction = paths[paths.path_sharing.isin(PathSharing.get_visible())].copy(deep=False)
+
+    paths_without_restriction['color'] = map_categories(
+        paths_without_restriction.path_sharing, lambda r: get_qualitative_color(r, cmap_name)
+    )
+
+    paths_without_restriction['label'] = map_categories(paths_without_restriction.path_sharing, lambda r: r.value)
+    return paths_without_restriction
+
+
+def get_path_sharing_legend(cmap_name: str = 'coolwarm') -> Legend:
+    return Legend(
+        title='Who Shares This Path with Me?',
+        legend_data={
+            category.value: get_qualitative_color(category, cmap_name) for category in PathSharing.get_visible()
+        },
+    )
 
 
 def build_path_sharing_artifact(
     paths: gpd.GeoDataFrame,
     resources: ComputationResources,
     cmap_name: str = 'coolwarm',
+    tiles: VectorTileOptions | None = None,
 ) -> Artifact:
-    paths_without_restriction = paths[paths.path_sharing.isin(PathSharing.get_visible())].copy(deep=False)
-
-    paths_without_restriction['color'] = paths_without_restriction.path_sharing.apply(
-        get_qualitative_color, cmap_name=cmap_name
-    )
-
-    paths_without_restriction['label'] = paths_without_restriction.path_sharing.apply(lambda r: r.value)
+    paths_without_restriction = style_path_sharing(dissolve_paths(paths, 'path_sharing'), cmap_name)
 
     metadata = ArtifactMetadata(
         name='Path Sharing',
         primary=True,
         tags={Topics.TRAFFIC},
-        summary=read_text('bikeability.resources.info.path_sharing', 'summary.md'),
-        description=read_text('bikeability.resources.info.path_sharing', 'description.md'),
+        summary=read_resource('bikeability.resources.info.path_sharing', 'summary.md'),
+        description=read_resource('bikeability.resources.info.path_sharing', 'description.md'),
     )
 
-    return create_vector_artifact(
-        data=paths_without_restriction[['@osmId', 'color', 'label', 'geometry']],
+    return create_path_artifact(
+        data=paths_without_restriction[['@osmId', '@osmIds', 'color', 'label', 'geometry']],
         metadata=metadata,
         resources=resources,
-        legend=Legend(
-            title='Who Shares This Path with Me?',
-            legend_data={
-                category.value: get_qualitative_color(category, cmap_name) for category in PathSharing.get_visible()
-            },
-        ),
+        legend=get_path_sharing_legend(cmap_name),
+        tiles=tiles,
     )
@@ -1,84 +1,31 @@
 import logging
 
-import geopandas as gpd
-import pandas as pd
 import plotly.graph_objects as go
 from climatoology.base.artifact import Artifact, ArtifactMetadata
 from climatoology.base.artifact_creators import create_plotly_chart_artifact
 from climatoology.base.computation import ComputationResources
 from plotly.graph_objs import Figure
-from pyproj import CRS
 
 from bikeability.components.path_sharing.path_sharing import PathSharing
 from bikeability.components.utils.colors import get_qualitative_color
-from bikeability.components.utils.utils import Topics, calculate_length
+from bikeability.components.utils.summaries import SummaryEngine, category_stacked_bar
+from bikeability.components.utils.utils import Topics
 
 log = logging.getLogger(__name__)
 
 
-def summarise_aoi(
-    paths: gpd.GeoDataFrame,
-    projected_crs: CRS,
-    length_resolution_m: int = 1000,
-) -> go.Figure:
+def summarise_aoi(summary: SummaryEngine, cmap_name: str = 'coolwarm') -> go.Figure:
     """
     Creates a stacked bar chart summarizing path sharing by length.
     """
 
     log.info('Summarising Walkable Path Categories')
 
-    line_paths = paths[
-        paths.geom_type.isin(['LineString', 'MultiLineString'])
-    ]  # summarizing only makes sense by length, if we include polygons we need a different metric
-    stats = calculate_length(length_resolution_m, line_paths, projected_crs)
-
-    summary = stats.groupby('path_sharing', dropna=False, sort=False, as_index=False)['length'].sum()
-    category_order = PathSharing.get_visible()
-    summary['path_sharing'] = pd.Categorical(summary['path_sharing'], categories=category_order, ordered=True)
-    summary_sorted = summary.sort_values('path_sharing').dropna()
-
-    total_length = summary_sorted['length'].sum()
-    summary_sorted['percent'] = summary_sorted['length'] / total_length * 100
-
-    stacked_bar_colors = summary_sorted.path_sharing.apply(get_qualitative_color, cmap_name='coolwarm')
-    stacked_bar_colors = [c.as_hex() for c in stacked_bar_colors]
-    summary_sorted['path_sharing'] = summary_sorted.path_sharing.apply(lambda cat: cat.value)
-
-    category_fig_stacked_bar = go.Figure()
-
-    for i, row in summary_sorted.reset_index(drop=True).iterrows():
-        category_fig_stacked_bar.add_trace(
-            go.Bar(
-                y=['Path Types'],
-                x=[row['percent']],
-                name=row['path_sharing'].replace('_', ' ').capitalize(),
-                orientation='h',
-                marker_color=stacked_bar_colors[i],
-                hovertemplate=f'{row["path_sharing"]}: {row["length"]:.2f} km ({row["percent"]:.1f}%)<extra></extra>'.replace(
-                    '_', ' '
-                ).capitalize(),
-                showlegend=True,
-            )
-        )
-
-    category_fig_stacked_bar.update_layout(
-        barmode='stack',
-        height=300,
-        margin=dict(t=30, b=80, l=30, r=30),
-        xaxis_title=f'Percentage of the {round(sum(summary_sorted["length"]), 2)} km of paths in each category',
-        yaxis=dict(showticklabels=False),
-        legend=dict(
-            orientation='h',
-            yanchor='top',
-            y=-1,
-            xanchor='center',
-            x=0.5,
-            font=dict(size=12),
-        ),
+    lengths = summary.length_by(summary.paths['path_sharing'], PathSharing.get_visible())
+    return category_stacked_bar(
+        lengths, lambda category: get_qualitative_color(category, cmap_name), axis_label='Path Types'
     )
 
-    return category_fig_stacked_bar
-
 
 def build_aoi_summary_category_stacked_bar_artifact(aoi_aggregate: Figure, resources: ComputationResources) -> Artifact:
     metadata = ArtifactMetadata(
@@ -0,0 +1,90 @@
+import geopandas as gpd
+import pandas as pd
+from climatoology.base.artifact import Artifact, ArtifactMetadata, Legend
+from climatoology.base.computation import ComputationResources
+
+from bikeability.components.dooring_risk.dooring_artifacts import get_dooring_legend, style_dooring_risk
+from bikeability.components.path_sharing.path_sharing_artifacts import get_path_sharing_legend, style_path_sharing
+from bikeability.components.smoothness.smoothness_artifacts import get_smoothness_legend, style_smoothness
+from bikeability.components.surface_types.surface_types_artifacts import get_surface_types_legend, style_surface_types
+from bikeability.components.utils.colors import map_categories
+from bikeability.components.utils.utils import Topics, read_resource
+from bikeability.components.utils.vector_tiles import VectorTileOptions
+from bikeability.components.utils.vector_writer import create_path_artifact
+
+KEY_COLUMNS = ['@osmId', 'polygonal']
+
+
+def join_layers(paths: gpd.GeoDataFrame, layers: dict[str, gpd.GeoDataFrame]) -> gpd.GeoDataFrame:
+    """The `paths` with the color and label of each styled layer as `<layer>_color` (hex) and `<layer>_label`.
+
+    Rows are matched by their OSM id and whether they are polygons, as components may reorder, reproject or
+    deduplicate the paths. Paths that are not part of a layer have no color and label for it.
+    """
+    joined = paths.assign(polygonal=paths.geom_type.isin(['Polygon', 'MultiPolygon']).to_numpy())
+    for name, layer in layers.items():
+        styles = pd.DataFrame(
+            {
+                '@osmId': layer['@osmId'].to_numpy(),
+                'polygonal': layer.geom_type.isin(['Polygon', 'MultiPolygon']).to_numpy(),
+                f'{name}_color': map_categories(layer['color'], lambda color: color.as_hex(format='long')).to_numpy(),
+                f'{name}_label': layer['label'].to_numpy(),
+            }
+        )
+        styles = styles.drop_duplicates(subset=KEY_COLUMNS).set_index(KEY_COLUMNS)
+        joined = joined.join(styles, on=KEY_COLUMNS)
+    return joined.drop(columns='polygonal')
+
+
+def describe_layer_legends(legends: dict[str, tuple[str, Legend]]) -> str:
+    """Markdown listing the labels and colors of each layer joined into the shared layer, by layer name."""
+    sections = []
+    for name, (title, legend) in legends.items():
+        entries = [f'- {label}: `{color.as_hex(format="long")}`' for label, color in legend.legend_data.items()]
+        sections.append('\n'.join([f'### {title} (`{name}_label`, `{name}_color`)', '', *entries]))
+    return '\n\n'.join(sections)
+
+
+def build_shared_paths_artifact(
+    paths: gpd.GeoDataFrame,
+    smoothness_paths: gpd.GeoDataFrame,
+    surface_type_paths: gpd.GeoDataFrame,
+    dooring_risk_paths: gpd.GeoDataFrame,
+    resources: ComputationResources,
+    tiles: VectorTileOptions | None = None,
+) -> Artifact:
+    """A single layer of the path geometries, colored by path sharing and carrying the other categorical indicators.
+
+    Replaces the separate path sharing, smoothness, surface type and dooring risk layers, which all repeat the same
+    geometries.
+    """
+    layers = {
+        'smoothness': style_smoothness(smoothness_paths),
+        'surface_type': style_surface_types(surface_type_paths),
+        'dooring_risk': style_dooring_risk(dooring_risk_paths),
+    }
+    shared_paths = join_layers(style_path_sharing(paths), layers)
+    layer_legends = {
+        'smoothness': ('Smoothness', get_smoothness_legend()),
+        'surface_type': ('Surface Type', get_surface_types_legend()),
+        'dooring_risk': ('Dooring Risk', get_dooring_legend()),
+    }
+    description = read_resource('bikeability.resources.info.shared_paths', 'description.md').rstrip()
+
+    metadata = ArtifactMetadata(
+        name='Bikeability of Paths',
+        primary=True,
+        tags={Topics.TRAFFIC, Topics.SURFACE, Topics.SAFETY},
+        filename='cycling_infrastructure_paths',
+        summary=read_resource('bikeability.resources.info.shared_paths', 'summary.md'),
+        description=f'{description}\n\n{describe_layer_legends(layer_legends)}',
+    )
+
+    layer_columns = [f'{name}_{column}' for name in layers for column in ('color', 'label')]
+    return create_path_artifact(
+        data=shared_paths[['@osmId', 'color', 'label', *layer_columns, 'geometry']],
+        metadata=metadata,
+        resources=resources,
+        legend=get_path_sharing_legend(),
+        tiles=tiles,
+    )
@@ -1,5 +1,4 @@
 import logging
-from importlib.resources import read_text
 
 import geopandas as gpd
 import matplotlib.colors as mcolors
@@ -9,7 +8,7 @@ import pandas as pd
 import plotly.graph_objects as go
 import shapely
 from climatoology.base.artifact import Artifact, ArtifactMetadata, ContinuousLegendData, Legend
-from climatoology.base.artifact_creators import create_plotly_chart_artifact, create_vector_artifact
+from climatoology.base.artifact_creators import create_plotly_chart_artifact
 from climatoology.base.computation import ComputationResources
 from climatoology.base.exception import ClimatoologyUserError
 from mobility_tools.settings import S3Settings
@@ -17,16 +16,25 @@ from mobility_tools.slope import get_paths_slopes
 from plotly.graph_objs import Figure
 from shapely.ops import linemerge
 
+from bikeability.components.overview import build_slope_overview_artifact
 from bikeability.components.path_sharing.path_sharing import PathSharing
 from bikeability.components.utils.colors import get_continuous_colors
-from bikeability.components.utils.utils import Topics, length_weighted_mean
+from bikeability.components.utils.utils import Topics, length_weighted_mean, path_lengths, read_resource
+from bikeability.components.utils.vector_tiles import VectorTileOptions
+from bikeability.components.utils.vector_writer import create_path_artifact
+from bikeability.core.tracing import SpanKind, start_span
 
 log = logging.getLogger(__name__)
 
 
 def compute_slope_analysis(
-    paths: gpd.GeoDataFrame, s3settings: S3Settings | None, resources: ComputationResources
+    paths: gpd.GeoDataFrame,
+    s3settings: S3Settings | None,
+    resources: ComputationResources,
+    tiles: VectorTileOptions | None = None,
+    overview_aoi: shapely.MultiPolygon | None = None,
 ) -> list[Artifact]:
+    """The slope layer and histogram, and with `overview_aoi` a hex cell overview of the slopes in it."""
     if s3settings is None:
         raise ClimatoologyUserError('Plugin was initialised without S3 settings')
     log.debug('Computing slopes for paths')
@@ -35,6 +43,8 @@ def compute_slope_analysis(
     multi_line_paths = multi_line_paths.loc[multi_line_paths.path_sharing.isin(PathSharing.get_bikeable())].copy(
         deep=False
     )
+    # the cached lengths are those of the whole paths, while the slopes are weighted by their parts and segments
+    multi_line_paths = multi_line_paths.drop(columns='length_m', errors='ignore')
     line_string_paths = multi_line_paths.set_index('@osmId').explode(ignore_index=False)
     line_string_paths = line_string_paths[line_string_paths.geom_type.str.contains('LineString')].reset_index()
 
@@ -42,26 +52,36 @@ def compute_slope_analysis(
         raise ClimatoologyUserError('No linear paths to calculate slope for.')
 
     # Calculate the slope for each path segment.
-    paths_with_slopes = get_paths_slopes(line_string_paths, s3settings, segment_length=30)
+    with start_span(
+        's3 get_paths_slopes', kind=SpanKind.CLIENT, attributes={'request.features.count': len(line_string_paths)}
+    ) as span:
+        paths_with_slopes = get_paths_slopes(line_string_paths, s3settings, segment_length=30)
+        span.set_attribute('features.count', len(paths_with_slopes))
     paths_with_slopes['slope'] = paths_with_slopes['slope'].abs()
 
     smoothed_slopes = merge_similar_slopes(paths_with_slopes)
-    slope_artifact = build_slope_artifact(path_slopes_data=smoothed_slopes, resources=resources)
+    slope_artifact = build_slope_artifact(path_slopes_data=smoothed_slopes, resources=resources, tiles=tiles)
 
     slope_summary = summarise_slope(paths_with_slopes)
     slope_summary_artifact = build_slope_summary_artifact(slope_summary, resources)
 
-    return [slope_artifact, slope_summary_artifact]
+    slope_artifacts = [slope_artifact, slope_summary_artifact]
+    if overview_aoi is not None:
+        slope_overview_artifact = build_slope_overview_artifact(overview_aoi, paths_with_slopes, resources)
+        if slope_overview_artifact is not None:
+            slope_artifacts.append(slope_overview_artifact)
+    return slope_artifacts
 
 
 def merge_similar_slopes(paths: gpd.GeoDataFrame, merging_tolerance: float = 1.0) -> gpd.GeoDataFrame:
     reconstituted_paths = []
+    lengths = path_lengths(paths)
     for osm_id, indices in paths.groupby('@osmId').indices.items():
         if len(indices) < 2:
             reconstituted_paths.append(paths.loc[indices])
             continue
 
-        mean_slope = length_weighted_mean(paths.loc[indices], col='slope')
+        mean_slope = length_weighted_mean(paths.loc[indices], col='slope', lengths=lengths[indices])
 
         slope_deviation = paths.loc[indices, 'slope'].apply(lambda slope: abs(slope - mean_slope))
 
@@ -83,6 +103,7 @@ def build_slope_artifact(
     path_slopes_data: gpd.GeoDataFrame,
     resources: ComputationResources,
     cmap_name: str = 'coolwarm',
+    tiles: VectorTileOptions | None = None,
 ) -> Artifact:
     legend_lower_bound, legend_upper_bound = 0, 6
     path_slopes_data['color'] = get_continuous_colors(
@@ -93,7 +114,7 @@ def build_slope_artifact(
     )
 
     # Clean data for labels
-    path_slopes_data['label'] = path_slopes_data['slope'].apply(lambda slope: f'{slope:.2f}%')
+    path_slopes_data['label'] = np.char.mod('%.2f%%', path_slopes_data['slope'].to_numpy(dtype=float))
 
     legend = Legend(
         legend_data=ContinuousLegendData(
@@ -114,14 +135,15 @@ def build_slope_artifact(
         tags={Topics.BARRIERS},
         filename='slope',
         summary='How steep is my path?',
-        description=read_text('bikeability.resources.info.slope', 'description.md'),
+        description=read_resource('bikeability.resources.info.slope', 'description.md'),
     )
 
-    return create_vector_artifact(
+    return create_path_artifact(
         data=path_slopes_data,
         metadata=metadata,
         resources=resources,
         legend=legend,
+        tiles=tiles,
     )
 
 
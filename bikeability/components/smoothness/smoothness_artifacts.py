@@ -1,29 +1,71 @@
-from importlib.resources import read_text
-
 import geopandas as gpd
-from climatoology.base.artifact import Artifact, ArtifactMetadata
-from climatoology.base.artifact_creators import create_vector_artifact
+import plotly.graph_objects as go
+from climatoology.base.artifact import Artifact, ArtifactMetadata, Legend
+from climatoology.base.artifact_creators import create_plotly_chart_artifact
 from climatoology.base.computation import ComputationResources
 
-from bikeability.components.utils.colors import get_qualitative_color
-from bikeability.components.utils.utils import Topics
+from bikeability.components.smoothness.smoothness import SmoothnessCategory
+from bikeability.components.utils.colors import get_qualitative_color, map_categories
+from bikeability.components.utils.summaries import SummaryEngine, category_stacked_bar
+from bikeability.components.utils.utils import Topics, dissolve_paths, read_resource
+from bikeability.components.utils.vector_tiles import VectorTileOptions
+from bikeability.components.utils.vector_writer import create_path_artifact
+
+
+def style_smoothness(smoothness_paths: gpd.GeoDataFrame, cmap_name: str = 'coolwarm') -> gpd.GeoDataFrame:
+    smoothness_paths['color'] = map_categories(
+        smoothness_paths.smoothness, lambda r: get_qualitative_color(r, cmap_name)
+    )
+    smoothness_paths['label'] = map_categories(smoothness_paths.smoothness, lambda r: r.name)
+    return smoothness_paths
+
+
+def get_smoothness_legend(cmap_name: str = 'coolwarm') -> Legend:
+    return Legend(
+        legend_data={
+            category.name: get_qualitative_color(category, cmap_name) for category in SmoothnessCategory.get_visible()
+        },
+    )
 
 
 def build_smoothness_artifact(
     smoothness_paths: gpd.GeoDataFrame,
     resources: ComputationResources,
     cmap_name: str = 'coolwarm',
+    tiles: VectorTileOptions | None = None,
 ) -> Artifact:
-    smoothness_paths['color'] = smoothness_paths.smoothness.apply(get_qualitative_color, cmap_name=cmap_name)
-    smoothness_paths['label'] = smoothness_paths.smoothness.apply(lambda r: r.name)
+    smoothness_paths = style_smoothness(dissolve_paths(smoothness_paths, 'smoothness'), cmap_name)
     metadata = ArtifactMetadata(
         name='Path Smoothness',
-        summary=read_text('bikeability.resources.info.path_smoothness', 'summary.md'),
-        description=read_text('bikeability.resources.info.path_smoothness', 'description.md'),
+        summary=read_resource('bikeability.resources.info.path_smoothness', 'summary.md'),
+        description=read_resource('bikeability.resources.info.path_smoothness', 'description.md'),
         tags={Topics.SURFACE},
         filename='smoothness',
     )
 
-    return create_vector_artifact(
-        data=smoothness_paths[['@osmId', 'color', 'label', 'geometry']], resources=resources, metadata=metadata
+    return create_path_artifact(
+        data=smoothness_paths[['@osmId', '@osmIds', 'color', 'label', 'geometry']],
+        resources=resources,
+        metadata=metadata,
+        tiles=tiles,
     )
+
+
+def summarise_smoothness(
+    summary: SummaryEngine, smoothness_paths: gpd.GeoDataFrame, cmap_name: str = 'coolwarm'
+) -> go.Figure:
+    lengths = summary.length_by(smoothness_paths['smoothness'], SmoothnessCategory.get_visible())
+    return category_stacked_bar(
+        lengths, lambda category: get_qualitative_color(category, cmap_name), axis_label='Smoothness'
+    )
+
+
+def build_smoothness_summary_artifact(aoi_aggregate: go.Figure, resources: ComputationResources) -> Artifact:
+    metadata = ArtifactMetadata(
+        name='Distribution of Smoothness',
+        summary='How is the total length of bikeable paths distributed across the smoothness categories?',
+        tags={Topics.SURFACE, Topics.SUMMARY},
+        filename='aggregation_aoi_smoothness',
+    )
+
+    return create_plotly_chart_artifact(figure=aoi_aggregate, metadata=metadata, resources=resources)
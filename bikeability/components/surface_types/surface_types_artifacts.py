@@ -1,43 +1,75 @@
-from importlib.resources import read_text
-
 import geopandas as gpd
+import plotly.graph_objects as go
 from climatoology.base.artifact import Artifact, ArtifactMetadata, Legend
-from climatoology.base.artifact_creators import create_vector_artifact
+from climatoology.base.artifact_creators import create_plotly_chart_artifact
 from climatoology.base.computation import ComputationResources
 from pydantic_extra_types.color import Color
 
 from bikeability.components.surface_types.surface_types import SurfaceType
-from bikeability.components.utils.colors import get_qualitative_color
-from bikeability.components.utils.utils import Topics
+from bikeability.components.utils.colors import get_qualitative_color, map_categories
+from bikeability.components.utils.summaries import SummaryEngine, category_stacked_bar
+from bikeability.components.utils.utils import Topics, dissolve_paths, read_resource
+from bikeability.components.utils.vector_tiles import VectorTileOptions
+from bikeability.components.utils.vector_writer import create_path_artifact
 
 
-def build_surface_types_artifact(
-    surface_type_paths: gpd.GeoDataFrame,
-    resources: ComputationResources,
-    cmap_name: str = 'tab20',
-) -> Artifact:
+def get_surface_types_legend(cmap_name: str = 'tab20') -> Legend:
     # Define color and legend
     legend_data = {}
     for surface_type in SurfaceType.get_visible():
         legend_color = get_qualitative_color(surface_type, cmap_name)
         legend_data[surface_type.value] = legend_color if legend_color != Color('#7f7f7f') else Color('#3c3c3c')
+    return Legend(legend_data=legend_data)
 
-    surface_type_paths['color'] = surface_type_paths.surface_type.apply(
-        lambda path_surface_type: legend_data[path_surface_type.value]
+
+def style_surface_types(surface_type_paths: gpd.GeoDataFrame, cmap_name: str = 'tab20') -> gpd.GeoDataFrame:
+    legend_data = get_surface_types_legend(cmap_name).legend_data
+    surface_type_paths['color'] = map_categories(
+        surface_type_paths.surface_type, lambda path_surface_type: legend_data[path_surface_type.value]
     )
-    surface_type_paths['label'] = surface_type_paths.surface_type.apply(lambda r: r.value)
+    surface_type_paths['label'] = map_categories(surface_type_paths.surface_type, lambda r: r.value)
+    return surface_type_paths
+
+
+def build_surface_types_artifact(
+    surface_type_paths: gpd.GeoDataFrame,
+    resources: ComputationResources,
+    cmap_name: str = 'tab20',
+    tiles: VectorTileOptions | None = None,
+) -> Artifact:
+    surface_type_paths = style_surface_types(dissolve_paths(surface_type_paths, 'surface_type'), cmap_name)
 
     metadata = ArtifactMetadata(
         name='Surface Types',
-        summary=read_text('bikeability.resources.info.surface_types', 'summary.md'),
-        description=read_text('bikeability.resources.info.surface_types', 'description.md'),
+        summary=read_resource('bikeability.resources.info.surface_types', 'summary.md'),
+        description=read_resource('bikeability.resources.info.surface_types', 'description.md'),
         tags={Topics.SURFACE},
         filename='surface_types',
     )
 
-    return create_vector_artifact(
-        data=surface_type_paths[['@osmId', 'color', 'label', 'geometry']],
+    return create_path_artifact(
+        data=surface_type_paths[['@osmId', '@osmIds', 'color', 'label', 'geometry']],
         metadata=metadata,
         resources=resources,
-        legend=Legend(legend_data=legend_data),
+        legend=get_surface_types_legend(cmap_name),
+        tiles=tiles,
+    )
+
+
+def summarise_surface_types(
+    summary: SummaryEngine, surface_type_paths: gpd.GeoDataFrame, cmap_name: str = 'tab20'
+) -> go.Figure:
+    legend_data = get_surface_types_legend(cmap_name).legend_data
+    lengths = summary.length_by(surface_type_paths['surface_type'], SurfaceType.get_visible())
+    return category_stacked_bar(lengths, lambda category: legend_data[category.value], axis_label='Surface Types')
+
+
+def build_surface_types_summary_artifact(aoi_aggregate: go.Figure, resources: ComputationResources) -> Artifact:
+    metadata = ArtifactMetadata(
+        name='Distribution of Surface Types',
+        summary='How is the total length of paths distributed across the surface types?',
+        tags={Topics.SURFACE, Topics.SUMMARY},
+        filename='aggregation_aoi_surface_types',
     )
+
+    return create_plotly_chart_artifact(figure=aoi_aggregate, metadata=metadata, resources=resources)
@@ -1,8 +1,10 @@
-from typing import Union
+# matplotlib is imported by the functions using it, to keep it out of the plugin start-up
+import functools
+from enum import Enum
+from typing import Any, Callable, Union
 
-import matplotlib
+import numpy as np
 import pandas as pd
-from matplotlib.colors import Normalize, to_hex
 from pydantic_extra_types.color import Color
 
 from bikeability.components.dooring_risk.dooring_risk import DooringRiskCategory
@@ -10,25 +12,66 @@ from bikeability.components.path_sharing.path_sharing import PathSharing
 from bikeability.components.smoothness.smoothness import SmoothnessCategory
 from bikeability.components.surface_types.surface_types import SurfaceType
 
+UNKNOWN_COLOR = '#808080'
+
 
 def get_qualitative_color(
     category: Union[PathSharing, SmoothnessCategory, SurfaceType, DooringRiskCategory], cmap_name: str
 ) -> Color:
-    norm = Normalize(0, 1)
-    cmap = matplotlib.cm.ScalarMappable(norm=norm, cmap=cmap_name).get_cmap()
-    cmap.set_under('#808080')
+    return get_qualitative_palette(type(category), cmap_name)[category]
 
-    category_norm = {name: idx / (len(category.get_visible()) - 1) for idx, name in enumerate(category.get_visible())}
 
-    if category.value == 'unknown':
-        return Color(to_hex(cmap(-9999)))
-    else:
-        return Color(to_hex(cmap(category_norm[category])))
+@functools.cache
+def get_qualitative_palette(category_type: type[Enum], cmap_name: str) -> dict[Enum, Color]:
+    """Colors of the visible categories spread evenly over the colormap, and grey for an unknown category."""
+    import matplotlib
 
+    cmap = matplotlib.colormaps.get(cmap_name)
+    visible = category_type.get_visible()
+
+    palette = {
+        category: Color(matplotlib.colors.to_hex(cmap(idx / (len(visible) - 1))))
+        for idx, category in enumerate(visible)
+    }
+    palette.update({category: Color(UNKNOWN_COLOR) for category in category_type if category.value == 'unknown'})
+    return palette
+
+
+@functools.cache
+def get_continuous_palette(cmap_name: str) -> np.ndarray:
+    """The colors of the colormap's lookup table, followed by the color for missing values."""
+    import matplotlib
 
-def get_continuous_colors(category: pd.Series, cmap_name: str, vmin: float = 0, vmax: float = 1) -> list[Color]:
-    norm = matplotlib.colors.Normalize(vmin=vmin, vmax=vmax)
     cmap = matplotlib.colormaps.get(cmap_name)
-    cmap.set_bad('#808080')
-    mapped_colors = [Color(matplotlib.colors.to_hex(col)) for col in cmap(norm(category))]
-    return mapped_colors
+    palette = np.empty(cmap.N + 1, dtype=object)
+    for idx, color in enumerate(cmap(np.arange(cmap.N))):
+        palette[idx] = Color(matplotlib.colors.to_hex(color))
+    palette[-1] = Color(UNKNOWN_COLOR)
+    return palette
+
+
+def get_continuous_colors(category: pd.Series, cmap_name: str, vmin: float = 0, vmax: float = 1) -> list[Color]:
+    """Colors of the values, binned like matplotlib does into the colormap's lookup table."""
+    palette = get_continuous_palette(cmap_name)
+    n_colors = len(palette) - 1
+
+    values = (np.asarray(category, dtype=float) - vmin) / (vmax - vmin)
+    missing = np.isnan(values)
+    indices = np.clip(np.floor(np.where(missing, 0.0, values) * n_colors), 0, n_colors - 1).astype(int)
+    indices[missing] = n_colors
+    return palette[indices].tolist()
+
+
+def map_categories(categories: pd.Series, mapping: Callable[[Any], Any]) -> pd.Series:
+    """Apply `mapping` once per distinct category and assign the results to the rows through the category codes.
+
+    Missing categories are mapped to `None`.
+    """
+    if isinstance(categories.dtype, pd.CategoricalDtype):
+        codes, uniques = categories.cat.codes.to_numpy(), categories.cat.categories
+    else:
+        codes, uniques = pd.factorize(categories, use_na_sentinel=True)
+    values = np.empty(len(uniques) + 1, dtype=object)
+    for code, category in enumerate(uniques):
+        values[code] = mapping(category)
+    return pd.Series(values[codes], index=categories.index)
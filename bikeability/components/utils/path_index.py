@@ -0,0 +1,64 @@
+import logging
+
+import geopandas as gpd
+import numpy as np
+import shapely
+from pyproj import CRS, Transformer
+
+log = logging.getLogger(__name__)
+
+
+class PathIndex:
+    """Spatial index over the paths of a computation, built once and shared by all spatial lookups on them.
+
+    The index is an STRtree over the path geometries projected to their UTM zone, so that distances are in metres.
+    Queries take geometries in the CRS of the paths and only project those geometries, not whole data frames. All
+    queries return positions into the indexed path table.
+    """
+
+    def __init__(self, paths: gpd.GeoDataFrame, projected_crs: CRS | None = None):
+        self.crs = projected_crs or paths.estimate_utm_crs()
+        self._transformer = Transformer.from_crs(paths.crs, self.crs, always_xy=True)
+        self.geometries = self.project(paths.geometry.to_numpy())
+        self.tree = shapely.STRtree(self.geometries)
+        log.debug(f'Indexed {len(self)} paths in {self.crs.name}')
+
+    def __len__(self) -> int:
+        return len(self.geometries)
+
+    def project(self, geometries: np.ndarray) -> np.ndarray:
+        """Project geometries in the CRS of the paths to the CRS of the index."""
+        return shapely.transform(geometries, self._transformer.transform, interleaved=False)
+
+    def dwithin(self, geometries: np.ndarray, distance: float) -> tuple[np.ndarray, np.ndarray]:
+        """All pairs of geometries and paths closer than `distance` metres, as positions of the geometries and paths."""
+        geometry_positions, path_positions = self.tree.query(
+            self.project(geometries), predicate='dwithin', distance=distance
+        )
+        return geometry_positions, path_positions
+
+    def intersects(self, geometries: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """All pairs of intersecting geometries and paths, as positions of the geometries and paths."""
+        geometry_positions, path_positions = self.tree.query(self.project(geometries), predicate='intersects')
+        return geometry_positions, path_positions
+
+    def nearest(self, geometries: np.ndarray, max_distance: float | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """The nearest path of each geometry within `max_distance` metres, as positions of the geometries and paths.
+
+        Geometries without a path in reach are left out. Of equally near paths, only one is returned.
+        """
+        geometry_positions, path_positions = self.tree.query_nearest(
+            self.project(geometries), max_distance=max_distance, all_matches=False
+        )
+        return geometry_positions, path_positions
+
+    def bbox(self, bounds: tuple[float, float, float, float]) -> np.ndarray:
+        """Positions of the paths whose bounding box overlaps `bounds`, given as (minx, miny, maxx, maxy)."""
+        return self.tree.query(self.project(shapely.box(*bounds)))
+
+    def within_distance(self, geometries: np.ndarray, distance: float) -> np.ndarray:
+        """Whether each path is closer than `distance` metres to any of the geometries."""
+        _, path_positions = self.dwithin(geometries, distance)
+        near = np.zeros(len(self), dtype=bool)
+        near[path_positions] = True
+        return near
@@ -0,0 +1,85 @@
+import logging
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from pydantic import BaseModel
+
+log = logging.getLogger(__name__)
+
+
+class SanitationReport(BaseModel):
+    """Number of paths fixed or dropped by each step of `sanitize_paths`."""
+
+    paths_in: int
+    repaired: int = 0
+    flattened: int = 0
+    dropped_empty: int = 0
+    dropped_degenerate: int = 0
+    dropped_duplicates: int = 0
+    paths_out: int = 0
+
+
+def sanitize_paths(
+    line_paths: gpd.GeoDataFrame, polygon_paths: gpd.GeoDataFrame
+) -> tuple[gpd.GeoDataFrame, SanitationReport]:
+    """Combine the line and polygon paths fetched from ohsome into one table of valid line and area geometries.
+
+    Each step is a single vectorised pass over the geometries:
+    - invalid geometries are repaired with `make_valid`
+    - geometry collections, e.g. from repairs, are flattened to their parts of the highest dimension
+    - empty geometries, points, and lines or areas without length or area are dropped
+    - polygon paths whose `@osmId` is also among the line paths are dropped, keeping the line
+    """
+    report = SanitationReport(paths_in=len(line_paths) + len(polygon_paths))
+
+    # a hash lookup, as `Series.isin` on Arrow backed strings compares element by element
+    duplicate = pd.Index(line_paths['@osmId'].unique()).get_indexer(polygon_paths['@osmId']) >= 0
+    paths = pd.concat([line_paths, polygon_paths[~duplicate]], ignore_index=True)
+    report.dropped_duplicates = int(duplicate.sum())
+
+    geometries = paths.geometry.to_numpy().copy()
+    invalid = ~shapely.is_valid(geometries) & ~shapely.is_missing(geometries)
+    geometries[invalid] = shapely.make_valid(geometries[invalid])
+    report.repaired = int(invalid.sum())
+
+    is_collection = shapely.get_type_id(geometries) == shapely.GeometryType.GEOMETRYCOLLECTION
+    geometries[is_collection] = flatten_collections(geometries[is_collection])
+    report.flattened = int(is_collection.sum())
+
+    empty = shapely.is_missing(geometries) | shapely.is_empty(geometries)
+    dimensions = shapely.get_dimensions(geometries)
+    degenerate = ~empty & (
+        (dimensions == 0)
+        | ((dimensions == 1) & (shapely.length(geometries) == 0))
+        | ((dimensions == 2) & (shapely.area(geometries) == 0))
+    )
+    report.dropped_empty = int(empty.sum())
+    report.dropped_degenerate = int(degenerate.sum())
+
+    paths = paths.set_geometry(gpd.GeoSeries(geometries, index=paths.index, crs=paths.crs, name=paths.geometry.name))
+    paths = paths[~empty & ~degenerate].reset_index(drop=True)
+    report.paths_out = len(paths)
+    return paths, report
+
+
+def flatten_collections(collections: np.ndarray) -> np.ndarray:
+    """Replace each geometry collection by a multi-part geometry of its parts of the highest dimension.
+
+    Lower dimensional parts, like the lines left over from repairing a polygon, are dropped. Collections without parts
+    become `None`.
+    """
+    flattened = np.full(len(collections), None, dtype=object)
+    parts, part_collection = shapely.get_parts(collections, return_index=True)
+    part_dimensions = shapely.get_dimensions(parts)
+    collection_dimensions = np.full(len(collections), -1)
+    np.maximum.at(collection_dimensions, part_collection, part_dimensions)
+
+    for dimension, create_multipart in enumerate(
+        [shapely.multipoints, shapely.multilinestrings, shapely.multipolygons]
+    ):
+        selected = (part_dimensions == dimension) & (collection_dimensions[part_collection] == dimension)
+        if selected.any():
+            create_multipart(parts[selected], indices=part_collection[selected], out=flattened)
+    return flattened
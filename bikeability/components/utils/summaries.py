@@ -0,0 +1,84 @@
+import logging
+from enum import Enum
+from typing import Callable, Sequence
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from pydantic_extra_types.color import Color
+
+from bikeability.components.utils.utils import path_lengths
+
+log = logging.getLogger(__name__)
+
+
+class SummaryEngine:
+    """Lengths of the line paths, measured once and shared by all length-by-category summaries.
+
+    Polygon paths are left out, as summarising only makes sense by length.
+    """
+
+    def __init__(self, paths: gpd.GeoDataFrame, length_resolution_m: int = 1000):
+        self.paths = paths[paths.geom_type.isin(['LineString', 'MultiLineString'])]
+        self.lengths = path_lengths(self.paths) / length_resolution_m
+
+    def length_by(self, categories: pd.Series, order: Sequence) -> pd.Series:
+        """The total length per category in `order`, in a single pass over the category codes.
+
+        `categories` are matched to the paths by index. Paths without a category, or one not in `order`, are left out.
+        """
+        order = pd.Index(order, dtype=object)
+        codes = order.get_indexer(categories.reindex(self.paths.index))
+        valid = codes >= 0
+        lengths = np.bincount(codes[valid], weights=self.lengths[valid], minlength=len(order))
+        return pd.Series(lengths, index=order)
+
+    def length_by_bins(self, values: pd.Series, bins: Sequence[float], labels: Sequence[str]) -> pd.Series:
+        """The total length per bin of the `values`, with bins closed on the left. Missing values are left out."""
+        categories = pd.cut(values.reindex(self.paths.index), bins=bins, labels=labels, right=False)
+        return self.length_by(categories, labels)
+
+    def match_osm_ids(self, layer: gpd.GeoDataFrame, column: str) -> pd.Series:
+        """The `column` of a layer that was reindexed, e.g. by a join, matched to the line paths by their OSM id."""
+        layer_lines = layer[layer.geom_type.isin(['LineString', 'MultiLineString'])]
+        values = layer_lines.drop_duplicates('@osmId').set_index('@osmId')[column]
+        return self.paths['@osmId'].map(values)
+
+
+def category_stacked_bar(lengths: pd.Series, color: Callable[[Enum], Color], axis_label: str) -> go.Figure:
+    """A single horizontal bar stacking the share of the total length of each category with any length."""
+    lengths = lengths[lengths > 0]
+    percents = lengths / lengths.sum() * 100
+
+    figure = go.Figure()
+    for category, length, percent in zip(lengths.index, lengths, percents):
+        name = category.value.replace('_', ' ')
+        figure.add_trace(
+            go.Bar(
+                y=[axis_label],
+                x=[percent],
+                name=name.capitalize(),
+                orientation='h',
+                marker_color=color(category).as_hex(),
+                hovertemplate=f'{name}: {length:.2f} km ({percent:.1f}%)<extra></extra>'.capitalize(),
+                showlegend=True,
+            )
+        )
+
+    figure.update_layout(
+        barmode='stack',
+        height=300,
+        margin=dict(t=30, b=80, l=30, r=30),
+        xaxis_title=f'Percentage of the {round(lengths.sum(), 2)} km of paths in each category',
+        yaxis=dict(showticklabels=False),
+        legend=dict(
+            orientation='h',
+            yanchor='top',
+            y=-1,
+            xanchor='center',
+            x=0.5,
+            font=dict(size=12),
+        ),
+    )
+    return figure
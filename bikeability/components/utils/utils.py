@@ -1,17 +1,25 @@
+import functools
 import logging
 from enum import StrEnum
+from importlib.resources import read_text
 
 import geopandas as gpd
+import numpy as np
+import pandas as pd
 import shapely
-from climatoology.base.exception import ClimatoologyUserError, InputValidationError
+from climatoology.base.exception import ClimatoologyUserError
 from ohsome import OhsomeClient
 from ohsome.exceptions import OhsomeException
 from ohsome_filter_to_sql.main import OhsomeFilter
-from pyproj import CRS, Transformer
+from pyproj import CRS, Geod, Transformer
 from shapely.ops import transform
 
+from bikeability.core.tracing import SpanKind, start_span
+
 log = logging.getLogger(__name__)
 
+WGS84_GEOD = Geod(ellps='WGS84')
+
 
 class Topics(StrEnum):
     TRAFFIC = 'traffic'
@@ -23,35 +31,50 @@ class Topics(StrEnum):
     GREENNESS = 'greenness'
 
 
-def check_paths_count_limit(aoi: shapely.MultiPolygon, ohsome: OhsomeClient, count_limit: int) -> None:
-    """
-    Check whether paths count is over than limit. (NOTE: just check path_lines)
-    """
+@functools.cache
+def read_resource(package: str, resource: str) -> str:
+    """Text of a resource file in `package`, read once per process."""
+    return read_text(package, resource)
 
-    ohsome_responses = ohsome.elements.count.post(bpolys=aoi, filter=ohsome_filter('line')).data
-    path_lines_count = sum([response['value'] for response in ohsome_responses['result']])
-    log.info(f'There are {path_lines_count} are selected.')
-    if path_lines_count > count_limit:
-        raise InputValidationError(
-            f'There are too many path segments in the selected area: {path_lines_count} path segments. '
-            f'Currently, only areas with a maximum of 500,000 path segments are allowed. '
-            f'Please select a smaller area or a sub-region of your selected area.'
-        )
+
+def count_paths(aoi: shapely.MultiPolygon, ohsome: OhsomeClient) -> int:
+    """Count the line paths in the AOI, without downloading them.
+
+    Polygon paths are not counted, as for the former fixed limit of 500,000 line paths.
+    """
+    paths_filter = ohsome_filter('line')
+    with start_span(
+        'ohsome elements/count',
+        kind=SpanKind.CLIENT,
+        attributes={'ohsome.filter': paths_filter, 'request.aoi.size': len(shapely.to_wkb(aoi))},
+    ) as span:
+        ohsome_responses = ohsome.elements.count.post(bpolys=aoi, filter=paths_filter).data
+        paths_count = int(sum([response['value'] for response in ohsome_responses['result']]))
+        span.set_attribute('features.count', paths_count)
+    log.info(f'There are {paths_count} paths in the AOI.')
+    return paths_count
 
 
 def fetch_osm_data(aoi: shapely.MultiPolygon, osm_filter: OhsomeFilter, ohsome: OhsomeClient) -> gpd.GeoDataFrame:
-    try:
-        elements = ohsome.elements.geometry.post(
-            bpolys=aoi, clipGeometry=True, properties='tags', filter=osm_filter
-        ).as_dataframe()
-    except Exception as e:
-        if isinstance(e, OhsomeException) and e.error_code in [413, 500, 501, 502, 503, 507]:
-            raise ClimatoologyUserError('There was an error collecting OSM data. Please try again later.')
-        else:
-            log.exception('Unexpected error when downloading OSM data.')
-            raise ClimatoologyUserError(
-                'Unexpected error when collecting OSM data. Please contact us to find out more.'
-            )
+    with start_span(
+        'ohsome elements/geometry',
+        kind=SpanKind.CLIENT,
+        attributes={'ohsome.filter': osm_filter, 'request.aoi.size': len(shapely.to_wkb(aoi))},
+    ) as span:
+        try:
+            elements = ohsome.elements.geometry.post(
+                bpolys=aoi, clipGeometry=True, properties='tags', filter=osm_filter
+            ).as_dataframe()
+        except Exception as e:
+            span.set_attribute('ohsome.error_code', getattr(e, 'error_code', None) or 'unknown')
+            if isinstance(e, OhsomeException) and e.error_code in [413, 500, 501, 502, 503, 507]:
+                raise ClimatoologyUserError('There was an error collecting OSM data. Please try again later.')
+            else:
+                log.exception('Unexpected error when downloading OSM data.')
+                raise ClimatoologyUserError(
+                    'Unexpected error when collecting OSM data. Please contact us to find out more.'
+                )
+        span.set_attribute('features.count', len(elements))
 
     elements = elements.reset_index()
     return elements[['@osmId', 'geometry', '@other_tags']]
@@ -71,32 +94,121 @@ def get_utm_zone(aoi: shapely.MultiPolygon) -> CRS:
     return gpd.GeoSeries(data=aoi, crs='EPSG:4326').estimate_utm_crs()
 
 
-def get_buffered_aoi(aoi: shapely.MultiPolygon) -> shapely.MultiPolygon:
+def get_buffered_aoi(aoi: shapely.MultiPolygon, distance_m: float = 5000) -> shapely.MultiPolygon:
     wgs84 = CRS('EPSG:4326')
     utm = get_utm_zone(aoi)
 
     geographic_projection_function = Transformer.from_crs(wgs84, utm, always_xy=True).transform
     wgs84_projection_function = Transformer.from_crs(utm, wgs84, always_xy=True).transform
     projected_aoi = transform(geographic_projection_function, aoi)
-    # changed the distance to a fixed value of 5 km.
-    buffered_aoi = projected_aoi.buffer(5000)
+    # changed the distance to a default of 5 km.
+    buffered_aoi = projected_aoi.buffer(distance_m)
     return transform(wgs84_projection_function, buffered_aoi)
 
 
-def calculate_length(length_resolution_m, paths, projected_crs):
-    stats = paths.copy()
-    stats = stats.loc[stats.geometry.geom_type.isin(('MultiLineString', 'LineString'))]
-    stats = stats.to_crs(projected_crs)
-    stats['length'] = stats.length / length_resolution_m
-    stats['length'] = round(stats['length'], 2)
-    return stats
+def hilbert_sort(paths: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+    """Sort the paths along a Hilbert curve over their bounding box centres, so that nearby paths are close in the table.
+
+    The index is kept as the permutation, so `sort_index` restores the original order.
+    """
+    if paths.empty:
+        return paths
+    distances = paths.geometry.hilbert_distance()
+    return paths.iloc[np.argsort(distances.to_numpy(), kind='stable')]
+
+
+def geodesic_lengths(geometries: np.ndarray) -> np.ndarray:
+    """Geodesic length in metres of each line geometry in WGS84, as float32. Other geometries have no length (NaN).
+
+    All segments are measured in one `Geod.inv` call over the flat coordinate array, and summed per geometry through
+    the part and coordinate indices, without reprojecting the geometries.
+    """
+    is_line = np.isin(
+        shapely.get_type_id(geometries), [shapely.GeometryType.LINESTRING, shapely.GeometryType.MULTILINESTRING]
+    )
+    parts, part_line = shapely.get_parts(geometries[is_line], return_index=True)
+    coordinates, coordinate_part = shapely.get_coordinates(parts, return_index=True)
 
+    in_part = coordinate_part[1:] == coordinate_part[:-1]
+    start, end = coordinates[:-1][in_part], coordinates[1:][in_part]
+    _, _, segment_lengths = WGS84_GEOD.inv(start[:, 0], start[:, 1], end[:, 0], end[:, 1])
+    segment_line = part_line[coordinate_part[1:][in_part]]
 
-def length_weighted_mean(gdf: gpd.GeoDataFrame, col: str) -> float:
-    projected_data = gdf.to_crs(gdf.estimate_utm_crs())
+    lengths = np.full(len(geometries), np.nan, dtype=np.float32)
+    lengths[is_line] = np.bincount(segment_line, weights=segment_lengths, minlength=is_line.sum())
+    return lengths
 
-    weighted_slopes = projected_data.length * projected_data[col]
 
-    total_length = projected_data.length.sum()
-    weighted_mean = weighted_slopes.sum() / total_length
-    return weighted_mean
+def add_path_lengths(paths: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+    """Cache the geodesic length of the line paths on the path table as `length_m`."""
+    paths['length_m'] = geodesic_lengths(paths.geometry.to_numpy())
+    return paths
+
+
+def path_lengths(paths: gpd.GeoDataFrame) -> np.ndarray:
+    """The cached `length_m` of the paths, or their geodesic lengths if the table has none."""
+    if 'length_m' in paths.columns:
+        return paths['length_m'].to_numpy()
+    return geodesic_lengths(paths.geometry.to_numpy())
+
+
+def length_weighted_mean(gdf: gpd.GeoDataFrame, col: str, lengths: np.ndarray | None = None) -> float:
+    """Mean of `col` weighted by the geodesic lengths of the paths, unless other `lengths` are given."""
+    lengths = path_lengths(gdf) if lengths is None else lengths
+    return np.sum(lengths * gdf[col].to_numpy(dtype=float)) / np.sum(lengths)
+
+
+def dissolve_paths(paths: gpd.GeoDataFrame, category: str) -> gpd.GeoDataFrame:
+    """Merge connected line paths of the same `category` into one feature each.
+
+    Only the `@osmId`, the category and the geometry are kept. The `@osmId` of a merged feature is the id of its first
+    member, and `@osmIds` lists the ids of all its members, separated by commas. Polygon paths are kept as they are.
+    """
+    columns = ['@osmId', category, 'geometry']
+    is_line = paths.geom_type.isin(['LineString', 'MultiLineString']).to_numpy()
+
+    polygons = paths.loc[~is_line, columns]
+    dissolved = [polygons.assign(**{'@osmIds': polygons['@osmId']})[['@osmId', '@osmIds', category, 'geometry']]]
+    for value, group in paths.loc[is_line, columns].groupby(category, dropna=False, observed=True, sort=False):
+        parts, part_path = shapely.get_parts(group.geometry.to_numpy(), return_index=True)
+        merged = shapely.get_parts(shapely.line_merge(shapely.multilinestrings(parts)))
+        part_merged, members = assign_merged_parts(parts, merged)
+
+        members = pd.DataFrame({'merged': members, 'path': part_path[part_merged]})
+        members = members.drop_duplicates().sort_values(['merged', 'path'], kind='stable')
+        merged_index = members['merged'].to_numpy()
+        starts = np.flatnonzero(np.diff(merged_index, prepend=-1))
+        ids = group['@osmId'].to_numpy()[members['path'].to_numpy()].tolist()
+        osm_ids = [','.join(dict.fromkeys(ids[start:end])) for start, end in zip(starts, [*starts[1:], len(ids)])]
+
+        dissolved.append(
+            gpd.GeoDataFrame(
+                {
+                    '@osmId': [ids[start] for start in starts],
+                    '@osmIds': osm_ids,
+                    category: [value] * len(osm_ids),
+                },
+                geometry=merged[merged_index[starts]],
+                crs=paths.crs,
+            )
+        )
+
+    dissolved = pd.concat(dissolved, ignore_index=True)
+    log.debug(f'Dissolved {len(paths)} paths by {category} into {len(dissolved)} features')
+    return dissolved
+
+
+def assign_merged_parts(parts: np.ndarray, merged: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Pairs of the line `parts` and the lines `merged` from them that contain them, as positions into both.
+
+    `line_merge` only joins whole parts, so each part lies in a merged line. Merged lines that no part is found in
+    through floating point errors take the parts nearest to them, so that every merged line has a member.
+    """
+    part_merged, members = shapely.STRtree(merged).query(parts, predicate='covered_by')
+    unmatched = np.setdiff1d(np.arange(len(merged)), members)
+    if len(unmatched):
+        log.debug(f'{len(unmatched)} merged lines contain no part exactly, assigning the nearest parts')
+        nearest_merged, nearest_part = shapely.STRtree(parts).query_nearest(merged[unmatched], all_matches=True)
+        part_merged = np.concatenate([part_merged, nearest_part])
+        members = np.concatenate([members, unmatched[nearest_merged]])
+    return part_merged, members
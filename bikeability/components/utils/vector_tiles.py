@@ -0,0 +1,444 @@
+# pmtiles is imported by `write_vector_tiles`, to keep it out of the plugin start-up
+# The tiles are encoded here rather than with mapbox_vector_tile, as encoding and clipping all features of a zoom in
+# vectorised passes is about five times faster than its encoding of one feature dict at a time.
+import gzip
+import logging
+import struct
+from pathlib import Path
+from typing import Iterator
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from climatoology.base.artifact import Legend
+from pydantic import BaseModel
+from pydantic_extra_types.color import Color
+
+from bikeability.components.utils.colors import map_categories
+
+log = logging.getLogger(__name__)
+
+WEB_MERCATOR_ORIGIN = 20037508.342789244
+SCREEN_TILE_SIZE_PX = 256
+
+TYPE_ID_LINESTRING = 1
+TYPE_ID_POLYGON = 3
+GEOM_TYPE_LINESTRING = 2
+GEOM_TYPE_POLYGON = 3
+COMMAND_MOVE_TO = 1
+COMMAND_LINE_TO = 2
+COMMAND_CLOSE_PATH = 7
+
+
+class VectorTileOptions(BaseModel):
+    """Zoom range and generalisation of the vector tile pyramid written next to the path artifacts.
+
+    Geometries are simplified to `simplification_px` screen pixels at each zoom, and features smaller than
+    `min_feature_px` are dropped below `max_zoom`. Clients overzoom the `max_zoom` tiles.
+    """
+
+    min_zoom: int = 6
+    max_zoom: int = 14
+    extent: int = 4096
+    buffer: int = 64
+    simplification_px: float = 1.0
+    min_feature_px: float = 2.0
+
+
+def write_vector_tiles(
+    data: gpd.GeoDataFrame,
+    path: Path,
+    layer: str,
+    options: VectorTileOptions = VectorTileOptions(),
+    legend: Legend | None = None,
+) -> int:
+    """Write the features with all their attributes as a single MVT layer into a gzipped PMTiles archive.
+
+    Returns the number of tiles written.
+    """
+    from pmtiles.tile import Compression, TileType
+    from pmtiles.writer import Writer
+
+    data = data[~data.geometry.is_empty & data.geometry.notna()]
+    fields = _field_types(data.drop(columns=data.geometry.name))
+    attributes = _tile_attributes(data.drop(columns=data.geometry.name))
+    geometries = data.geometry.to_crs('EPSG:3857').to_numpy()
+    polygonal = shapely.get_dimensions(geometries) == 2
+
+    tile_count = 0
+    with path.open('wb') as file:
+        writer = Writer(file)
+        for zoom in range(options.min_zoom, options.max_zoom + 1):
+            for tile_id, tile in _encode_zoom(layer, geometries, polygonal, attributes, zoom, options):
+                writer.write_tile(tile_id, gzip.compress(tile))
+                tile_count += 1
+
+        if tile_count == 0:
+            log.warning(f'No vector tiles written for {layer}, the layer has no features')
+            file.close()
+            path.unlink()
+            return 0
+
+        min_lon, min_lat, max_lon, max_lat = data.geometry.to_crs('EPSG:4326').total_bounds
+        header = {
+            'tile_type': TileType.MVT,
+            'tile_compression': Compression.GZIP,
+            'min_lon_e7': int(min_lon * 1e7),
+            'min_lat_e7': int(min_lat * 1e7),
+            'max_lon_e7': int(max_lon * 1e7),
+            'max_lat_e7': int(max_lat * 1e7),
+            'center_zoom': options.min_zoom,
+        }
+        metadata = {
+            'name': layer,
+            'vector_layers': [
+                {
+                    'id': layer,
+                    'fields': fields,
+                    'minzoom': options.min_zoom,
+                    'maxzoom': options.max_zoom,
+                }
+            ],
+        }
+        if legend is not None:
+            metadata['legend'] = legend.model_dump(mode='json')
+        writer.finalize(header, metadata)
+
+    log.debug(f'Wrote {tile_count} vector tiles for {layer}')
+    return tile_count
+
+
+def _field_types(attributes: pd.DataFrame) -> dict[str, str]:
+    """The TileJSON type of each attribute column, as declared in the `vector_layers` metadata."""
+    fields = {}
+    for column, dtype in attributes.dtypes.items():
+        if pd.api.types.is_bool_dtype(dtype):
+            fields[column] = 'Boolean'
+        elif pd.api.types.is_numeric_dtype(dtype):
+            fields[column] = 'Number'
+        else:
+            fields[column] = 'String'
+    return fields
+
+
+def _tile_attributes(attributes: pd.DataFrame) -> dict[str, np.ndarray]:
+    """The attribute columns as object arrays, with colors as hex strings and missing values as `None`."""
+    columns = {}
+    for column in attributes.columns:
+        values = attributes[column]
+        valid = values.notna().to_numpy()
+        if valid.any() and isinstance(values.iloc[valid.argmax()], Color):
+            values = map_categories(values, lambda color: color.as_hex(format='long'))
+        columns[column] = values.astype(object).where(values.notna(), None).to_numpy()
+    return columns
+
+
+def _encode_zoom(
+    layer: str,
+    geometries: np.ndarray,
+    polygonal: np.ndarray,
+    attributes: dict[str, np.ndarray],
+    zoom: int,
+    options: VectorTileOptions,
+) -> Iterator[tuple[int, bytes]]:
+    """Yield the tile id and the encoded tile of each non-empty tile at `zoom`, in tile id order."""
+    from pmtiles.tile import zxy_to_tileid
+
+    tile_size = 2 * WEB_MERCATOR_ORIGIN / 2**zoom
+    pixel_size = tile_size / SCREEN_TILE_SIZE_PX
+    buffer = options.buffer * tile_size / options.extent
+
+    rows = np.arange(len(geometries))
+    if zoom < options.max_zoom:
+        bounds = shapely.bounds(geometries)
+        size = np.maximum(bounds[:, 2] - bounds[:, 0], bounds[:, 3] - bounds[:, 1])
+        rows = rows[size >= options.min_feature_px * pixel_size]
+    if len(rows) == 0:
+        return
+    simplified = shapely.simplify(geometries[rows], options.simplification_px * pixel_size, preserve_topology=True)
+
+    last_tile = 2**zoom - 1
+    bounds = shapely.bounds(simplified)
+    x0 = np.clip(np.floor((bounds[:, 0] - buffer + WEB_MERCATOR_ORIGIN) / tile_size), 0, last_tile).astype(int)
+    x1 = np.clip(np.floor((bounds[:, 2] + buffer + WEB_MERCATOR_ORIGIN) / tile_size), 0, last_tile).astype(int)
+    y0 = np.clip(np.floor((WEB_MERCATOR_ORIGIN - bounds[:, 3] - buffer) / tile_size), 0, last_tile).astype(int)
+    y1 = np.clip(np.floor((WEB_MERCATOR_ORIGIN - bounds[:, 1] + buffer) / tile_size), 0, last_tile).astype(int)
+
+    # One entry per feature and tile it touches
+    width, height = x1 - x0 + 1, y1 - y0 + 1
+    counts = width * height
+    feature = np.repeat(np.arange(len(rows)), counts)
+    offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    tile_x = x0[feature] + offset % width[feature]
+    tile_y = y0[feature] + offset // width[feature]
+
+    tile_min_x = tile_x * tile_size - WEB_MERCATOR_ORIGIN
+    tile_max_y = WEB_MERCATOR_ORIGIN - tile_y * tile_size
+    # Features within a single buffered tile need no clipping
+    clipped = simplified[feature]
+    spanning = counts[feature] > 1
+    clipped[spanning] = shapely.intersection(
+        clipped[spanning],
+        shapely.box(
+            tile_min_x[spanning] - buffer,
+            tile_max_y[spanning] - tile_size - buffer,
+            tile_min_x[spanning] + tile_size + buffer,
+            tile_max_y[spanning] + buffer,
+        ),
+    )
+
+    coordinates, index = shapely.get_coordinates(clipped, return_index=True)
+    scale = options.extent / tile_size
+    coordinates[:, 0] = np.round((coordinates[:, 0] - tile_min_x[index]) * scale)
+    coordinates[:, 1] = np.round((tile_max_y[index] - coordinates[:, 1]) * scale)
+    clipped = shapely.set_coordinates(clipped, coordinates)
+
+    entry_rows = rows[feature]
+    entry_polygonal = polygonal[entry_rows]
+    buffer_bytes, starts, lengths = _encode_geometries(clipped, entry_polygonal)
+    encoded = np.flatnonzero(lengths > 0)
+    if len(encoded) == 0:
+        return
+
+    tiles, tile_of_entry = np.unique(tile_x[encoded] * (last_tile + 1) + tile_y[encoded], return_inverse=True)
+    tile_ids = np.array(
+        [zxy_to_tileid(zoom, int(tile // (last_tile + 1)), int(tile % (last_tile + 1))) for tile in tiles]
+    )
+    tile_order = np.argsort(tile_ids)
+    rank = np.empty_like(tile_order)
+    rank[tile_order] = np.arange(len(tile_order))
+
+    by_tile = encoded[np.argsort(rank[tile_of_entry], kind='stable')]
+    boundaries = np.cumsum(np.bincount(rank[tile_of_entry], minlength=len(tiles)))[:-1]
+    for tile_id, tile_entries in zip(tile_ids[tile_order], np.split(by_tile, boundaries)):
+        geometries_bytes = [
+            buffer_bytes[start : start + length] for start, length in zip(starts[tile_entries], lengths[tile_entries])
+        ]
+        yield (
+            int(tile_id),
+            _encode_tile(
+                layer,
+                entry_rows[tile_entries],
+                entry_polygonal[tile_entries],
+                geometries_bytes,
+                attributes,
+                options.extent,
+            ),
+        )
+
+
+def _encode_geometries(geometries: np.ndarray, polygonal: np.ndarray) -> tuple[bytes, np.ndarray, np.ndarray]:
+    """Encode the MVT geometry commands of geometries in integer tile coordinates.
+
+    Lines are taken from the non-polygonal geometries and polygons from the polygonal ones, other parts that clipping
+    may have produced are left out. Repeated points and rings without area are dropped, and rings are oriented as the
+    specification requires. Returns the concatenated commands as varints and the start and length of each geometry in
+    them; geometries without any commands have length 0.
+    """
+    parts, part_entry = shapely.get_parts(geometries, return_index=True)
+    parts, index = shapely.get_parts(parts, return_index=True)
+    part_entry = part_entry[index]
+    type_id = shapely.get_type_id(parts)
+    wanted = np.where(polygonal[part_entry], type_id == TYPE_ID_POLYGON, type_id == TYPE_ID_LINESTRING)
+    parts, part_entry, type_id = parts[wanted], part_entry[wanted], type_id[wanted]
+
+    is_polygon = type_id == TYPE_ID_POLYGON
+    rings, ring_polygon = shapely.get_rings(parts[is_polygon], return_index=True)
+    n_lines = int((~is_polygon).sum())
+    paths = np.concatenate([parts[~is_polygon], rings])
+    path_entry = np.concatenate([part_entry[~is_polygon], part_entry[is_polygon][ring_polygon]])
+    closed = np.r_[np.zeros(n_lines, dtype=bool), np.ones(len(rings), dtype=bool)]
+    polygon = np.r_[np.zeros(n_lines, dtype=int), ring_polygon]
+    # The exterior ring of a polygon precedes its holes
+    exterior = np.r_[np.zeros(n_lines, dtype=bool), np.diff(ring_polygon, prepend=-1) != 0]
+
+    # Keep the paths of a geometry together in their original order, as the cursor carries over between them
+    order = np.argsort(path_entry, kind='stable')
+    paths, path_entry, closed, polygon, exterior = (
+        paths[order],
+        path_entry[order],
+        closed[order],
+        polygon[order],
+        exterior[order],
+    )
+    n_paths = len(paths)
+    if n_paths == 0:
+        return b'', np.zeros(len(geometries), dtype=int), np.zeros(len(geometries), dtype=int)
+
+    coordinates, point_path = shapely.get_coordinates(paths, return_index=True)
+    coordinates = coordinates.astype(np.int64)
+
+    # Rings are closed implicitly, and repeated points carry no information
+    counts = np.bincount(point_path, minlength=n_paths)
+    is_last = np.zeros(len(point_path), dtype=bool)
+    is_last[(np.cumsum(counts) - 1)[counts > 0]] = True
+    repeated = np.r_[False, (point_path[1:] == point_path[:-1]) & np.all(coordinates[1:] == coordinates[:-1], axis=1)]
+    keep = ~(closed[point_path] & is_last) & ~repeated
+    coordinates, point_path = coordinates[keep], point_path[keep]
+
+    counts = np.bincount(point_path, minlength=n_paths)
+    starts = np.cumsum(counts) - counts
+    next_point = np.arange(len(point_path)) + 1
+    path_last = np.diff(point_path, append=n_paths) != 0
+    next_point[path_last] = starts[point_path[path_last]]
+    x, y = coordinates[:, 0], coordinates[:, 1]
+    area = np.bincount(point_path, weights=x * y[next_point] - x[next_point] * y, minlength=n_paths)
+
+    valid = counts >= np.where(closed, 3, 2)
+    valid &= ~closed | (area != 0)
+    # Holes are dropped with their exterior ring
+    valid_polygon = np.zeros(len(parts), dtype=bool)
+    valid_polygon[polygon[closed & exterior & valid]] = True
+    valid &= ~closed | valid_polygon[polygon]
+
+    # Exterior rings wind clockwise on screen, that is with a positive area in tile coordinates
+    reverse = closed & ((area > 0) != exterior)
+    keep = valid[point_path]
+    coordinates, point_path = coordinates[keep], point_path[keep]
+    counts = np.bincount(point_path, minlength=n_paths)
+    starts = np.cumsum(counts) - counts
+    position = np.arange(len(point_path)) - starts[point_path]
+    source = np.where(
+        reverse[point_path], starts[point_path] + counts[point_path] - 1 - position, np.arange(len(point_path))
+    )
+    coordinates = coordinates[source]
+
+    # The cursor starts at the origin for each geometry
+    point_entry = path_entry[point_path]
+    previous = np.roll(coordinates, 1, axis=0)
+    previous[np.diff(point_entry, prepend=-1) != 0] = 0
+    deltas = coordinates - previous
+    parameters = (deltas << 1) ^ (deltas >> 63)
+
+    lengths = np.where(counts > 0, 2 + 2 * counts + closed, 0)
+    command_starts = np.cumsum(lengths) - lengths
+    commands = np.empty(lengths.sum(), dtype=np.int64)
+    drawn = counts > 0
+    commands[command_starts[drawn]] = _command(COMMAND_MOVE_TO, 1)
+    commands[command_starts[drawn] + 3] = _command(COMMAND_LINE_TO, counts[drawn] - 1)
+    commands[(command_starts + lengths - 1)[drawn & closed]] = _command(COMMAND_CLOSE_PATH, 1)
+    parameter_position = command_starts[point_path] + np.where(position == 0, 1, 2 + 2 * position)
+    commands[parameter_position] = parameters[:, 0]
+    commands[parameter_position + 1] = parameters[:, 1]
+
+    encoded, n_bytes = _varints(commands)
+    command_entry = np.repeat(path_entry, lengths)
+    geometry_lengths = np.bincount(command_entry, weights=n_bytes, minlength=len(geometries)).astype(int)
+    return encoded.tobytes(), np.cumsum(geometry_lengths) - geometry_lengths, geometry_lengths
+
+
+def _encode_tile(
+    layer: str,
+    rows: np.ndarray,
+    polygonal: np.ndarray,
+    geometries: list[bytes],
+    attributes: dict[str, np.ndarray],
+    extent: int,
+) -> bytes:
+    """Encode a Mapbox Vector Tile with one layer of the features with the encoded `geometries`.
+
+    The attributes of each feature are looked up by its row, missing values are left out.
+    """
+    value_codes, encoded_values, n_values = [], [], 0
+    for column in attributes.values():
+        codes, uniques = pd.factorize(column[rows], use_na_sentinel=True)
+        value_codes.append(np.where(codes >= 0, codes + n_values, -1))
+        encoded_values.extend(_bytes_field(4, _encode_value(value)) for value in uniques)
+        n_values += len(uniques)
+
+    tag_starts = tag_lengths = np.zeros(len(rows), dtype=int)
+    tag_buffer = b''
+    if attributes:
+        values = np.column_stack(value_codes)
+        keys = np.broadcast_to(np.arange(len(attributes)), values.shape)
+        present = values >= 0
+        tags = np.stack([keys, values], axis=2).reshape(len(rows), -1)[np.repeat(present, 2, axis=1)]
+        encoded_tags, n_bytes = _varints(tags)
+        tag_feature = np.repeat(np.arange(len(rows)), 2 * present.sum(axis=1))
+        tag_lengths = np.bincount(tag_feature, weights=n_bytes, minlength=len(rows)).astype(int)
+        tag_starts = np.cumsum(tag_lengths) - tag_lengths
+        tag_buffer = encoded_tags.tobytes()
+
+    tags_key, geometry_key, feature_key = _key(2, 2), _key(4, 2), _key(2, 2)
+    geometry_types = {True: _varint_field(3, GEOM_TYPE_POLYGON), False: _varint_field(3, GEOM_TYPE_LINESTRING)}
+    features = []
+    for start, length, is_polygon, geometry in zip(tag_starts.tolist(), tag_lengths.tolist(), polygonal, geometries):
+        feature = b''.join(
+            (
+                tags_key,
+                _varint(length),
+                tag_buffer[start : start + length],
+                geometry_types[bool(is_polygon)],
+                geometry_key,
+                _varint(len(geometry)),
+                geometry,
+            )
+        )
+        features.append(feature_key + _varint(len(feature)) + feature)
+
+    encoded_layer = _varint_field(15, 2) + _bytes_field(1, layer.encode())
+    encoded_layer += b''.join(features)
+    encoded_layer += b''.join(_bytes_field(3, key.encode()) for key in attributes)
+    encoded_layer += b''.join(encoded_values)
+    encoded_layer += _varint_field(5, extent)
+    return _bytes_field(3, encoded_layer)
+
+
+def _command(command_id: int, count: int | np.ndarray) -> int | np.ndarray:
+    return (command_id & 0x7) | (count << 3)
+
+
+def _encode_value(value: object) -> bytes:
+    if isinstance(value, (bool, np.bool_)):
+        return _varint_field(7, int(value))
+    if isinstance(value, (int, np.integer)):
+        return _varint_field(6, (int(value) << 1) ^ (int(value) >> 63))
+    if isinstance(value, (float, np.floating)):
+        return _key(3, 1) + struct.pack('<d', value)
+    return _bytes_field(1, str(value).encode())
+
+
+def _varints(values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """The varint bytes of non-negative integers, and the number of bytes of each."""
+    values = np.asarray(values).astype(np.uint64)
+    n_bytes = np.ones(len(values), dtype=np.int64)
+    for shift in range(7, 64, 7):
+        n_bytes += values >= np.uint64(1 << shift)
+    owner = np.repeat(np.arange(len(values)), n_bytes)
+    position = np.arange(n_bytes.sum()) - np.repeat(np.cumsum(n_bytes) - n_bytes, n_bytes)
+    encoded = (values[owner] >> (7 * position).astype(np.uint64)) & np.uint64(0x7F)
+    encoded |= np.where(position < n_bytes[owner] - 1, 0x80, 0).astype(np.uint64)
+    return encoded.astype(np.uint8), n_bytes
+
+
+def _varint(value: int) -> bytes:
+    if value < len(SMALL_VARINTS):
+        return SMALL_VARINTS[value]
+    encoded = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            encoded.append(byte | 0x80)
+        else:
+            encoded.append(byte)
+            return bytes(encoded)
+
+
+# Lengths and tags mostly fit into two bytes
+SMALL_VARINTS = tuple(
+    bytes([value]) if value < 0x80 else bytes([value & 0x7F | 0x80, value >> 7]) for value in range(1 << 14)
+)
+
+
+def _key(field: int, wire_type: int) -> bytes:
+    return _varint((field << 3) | wire_type)
+
+
+def _varint_field(field: int, value: int) -> bytes:
+    return _key(field, 0) + _varint(value)
+
+
+def _bytes_field(field: int, value: bytes) -> bytes:
+    return _key(field, 2) + _varint(len(value)) + value
@@ -0,0 +1,61 @@
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import geopandas as gpd
+import numpy as np
+import shapely
+from climatoology.base.artifact import Artifact, ArtifactMetadata, Legend
+from climatoology.base.artifact_creators import create_vector_artifact
+from climatoology.base.computation import ComputationResources
+
+from bikeability.components.utils.vector_tiles import VectorTileOptions, write_vector_tiles
+
+log = logging.getLogger(__name__)
+
+COORDINATE_DECIMALS = 7  # ~1 cm in WGS84
+
+
+def create_path_artifact(
+    data: gpd.GeoDataFrame,
+    metadata: ArtifactMetadata,
+    resources: ComputationResources,
+    legend: Legend | None = None,
+    tiles: VectorTileOptions | None = None,
+    **kwargs,
+) -> Artifact:
+    """Create a vector artifact of the paths with quantized coordinates.
+
+    With `tiles`, a PMTiles pyramid of the paths is written next to it, named after the artifact file. The pyramid is
+    encoded in a separate thread while the artifact is written, from a shallow copy so that neither sees the columns
+    the other adds.
+    """
+    data = quantize_coordinates(data)
+    if tiles is None:
+        return create_vector_artifact(data=data, metadata=metadata, resources=resources, legend=legend, **kwargs)
+
+    layer = metadata.filename or re.sub(r'\W+', '_', metadata.name.lower())
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix='tiles') as executor:
+        tiles_written = executor.submit(
+            write_vector_tiles,
+            data.copy(deep=False),
+            resources.computation_dir / f'{layer}.pmtiles',
+            layer,
+            tiles,
+            legend,
+        )
+        artifact = create_vector_artifact(data=data, metadata=metadata, resources=resources, legend=legend, **kwargs)
+        tiles_written.result()
+    return artifact
+
+
+def quantize_coordinates(data: gpd.GeoDataFrame, decimals: int = COORDINATE_DECIMALS) -> gpd.GeoDataFrame:
+    """Round the coordinates in WGS84 to `decimals`, in one pass over shapely's coordinate buffer.
+
+    GeoJSON writes every coordinate with full float precision, a third of which is noise below the accuracy of OSM.
+    Rounding shrinks the files, not the time or memory needed to write them, as it copies the geometries once more.
+    """
+    if data.crs is not None and not data.crs.equals('EPSG:4326'):
+        data = data.to_crs('EPSG:4326')
+    geometries = shapely.transform(data.geometry.to_numpy(), lambda coordinates: np.round(coordinates, decimals))
+    return data.set_geometry(gpd.GeoSeries(geometries, index=data.index, crs=data.crs, name=data.geometry.name))
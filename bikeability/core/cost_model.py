@@ -0,0 +1,215 @@
+import argparse
+import logging
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+import pyproj
+import shapely
+from climatoology.base.exception import InputValidationError
+from pydantic import BaseModel
+
+from bikeability.core.input import BikeabilityIndicators
+from bikeability.core.instrumentation import ComputeMetrics
+
+log = logging.getLogger(__name__)
+
+DEFAULT_TIME_BUDGET_S = 600.0
+# The default core cost reaches the time budget at 500,000 line paths, the former fixed limit
+DEFAULT_MAX_PATHS = 500_000
+MIN_CALIBRATION_SAMPLES = 3
+
+GEOD = pyproj.Geod(ellps='WGS84')
+
+
+class CostSignals(BaseModel):
+    """Cheap signals known before the paths are fetched."""
+
+    path_count: int
+    aoi_area_km2: float
+
+
+def aoi_area_km2(aoi: shapely.MultiPolygon) -> float:
+    return abs(GEOD.geometry_area_perimeter(aoi)[0]) / 1e6
+
+
+class LinearCost(BaseModel):
+    """A cost growing linearly with the number of paths and the AOI area."""
+
+    fixed: float = 0.0
+    per_path: float = 0.0
+    per_km2: float = 0.0
+
+    def predict(self, signals: CostSignals) -> float:
+        return max(self.fixed + self.per_path * signals.path_count + self.per_km2 * signals.aoi_area_km2, 0.0)
+
+    @classmethod
+    def fit(cls, signals: list[CostSignals], costs: list[float]) -> 'LinearCost':
+        """Least squares fit with non-negative coefficients, so that the cost never shrinks for larger AOIs."""
+        from scipy.optimize import nnls
+
+        design = np.array([[1.0, s.path_count, s.aoi_area_km2] for s in signals])
+        scale = np.maximum(np.abs(design).max(axis=0), 1e-12)
+        coefficients, _ = nnls(design / scale, np.asarray(costs, dtype=float))
+        fixed, per_path, per_km2 = coefficients / scale
+        return cls(fixed=fixed, per_path=per_path, per_km2=per_km2)
+
+
+class ComponentCost(BaseModel):
+    time_s: LinearCost = LinearCost()
+    memory_bytes: LinearCost = LinearCost()
+
+
+class CostEstimate(BaseModel):
+    time_s: float
+    memory_bytes: float
+
+
+class ComputeCostEstimate(BaseModel):
+    signals: CostSignals
+    core: CostEstimate
+    indicators: dict[BikeabilityIndicators, CostEstimate]
+
+    @property
+    def time_s(self) -> float:
+        return self.core.time_s + sum(estimate.time_s for estimate in self.indicators.values())
+
+    @property
+    def memory_bytes(self) -> float:
+        return self.core.memory_bytes + sum(estimate.memory_bytes for estimate in self.indicators.values())
+
+
+DEFAULT_CORE_COST = ComponentCost(
+    time_s=LinearCost(per_path=DEFAULT_TIME_BUDGET_S / DEFAULT_MAX_PATHS),
+    memory_bytes=LinearCost(fixed=300e6, per_path=8e3),
+)
+
+
+class CostModel(BaseModel):
+    """Predict the runtime and memory of a computation from its cost signals and the selected optional indicators.
+
+    Optional indicators run alongside the core artifacts and compete with them for the CPU, so their costs are added
+    to the core cost. This overestimates rather than underestimates the cost of a computation. Until the model is
+    calibrated from the metrics of real computations, the optional indicators cost nothing and are never skipped.
+    """
+
+    core: ComponentCost = DEFAULT_CORE_COST
+    indicators: dict[BikeabilityIndicators, ComponentCost] = {}
+    time_budget_s: float = DEFAULT_TIME_BUDGET_S
+    memory_budget_bytes: float | None = None
+
+    def estimate(self, signals: CostSignals, indicators: Iterable[BikeabilityIndicators]) -> ComputeCostEstimate:
+        return ComputeCostEstimate(
+            signals=signals,
+            core=self._estimate(self.core, signals),
+            indicators={
+                indicator: self._estimate(self.indicators.get(indicator, ComponentCost()), signals)
+                for indicator in indicators
+            },
+        )
+
+    def check_core(self, signals: CostSignals) -> None:
+        """Raise if even the core artifacts cannot be computed within the budget."""
+        core = self.estimate(signals, indicators=[]).core
+        if not self._within_budget(core.time_s, core.memory_bytes):
+            raise InputValidationError(
+                f'There are too many path segments in the selected area: {signals.path_count} path segments. '
+                f'They cannot be assessed within the time limit. '
+                f'Please select a smaller area or a sub-region of your selected area.'
+            )
+
+    def downgrade(
+        self, signals: CostSignals, indicators: Iterable[BikeabilityIndicators]
+    ) -> set[BikeabilityIndicators]:
+        """The optional indicators to skip so that the computation fits the budget, the most expensive first."""
+        estimate = self.estimate(signals, indicators)
+        time_s, memory_bytes = estimate.time_s, estimate.memory_bytes
+
+        downgraded = set()
+        by_cost = sorted(estimate.indicators.items(), key=lambda item: item[1].time_s, reverse=True)
+        for indicator, indicator_estimate in by_cost:
+            if self._within_budget(time_s, memory_bytes):
+                break
+            downgraded.add(indicator)
+            time_s -= indicator_estimate.time_s
+            memory_bytes -= indicator_estimate.memory_bytes
+
+        if downgraded:
+            log.warning(f'Skipping {sorted(i.value for i in downgraded)}, predicted cost {estimate.time_s:.0f}s')
+        return downgraded
+
+    def calibrate(self, metrics: Iterable[ComputeMetrics]) -> 'CostModel':
+        """A copy of the model fitted to the metrics of earlier computations.
+
+        Only computations with cost signals and without cached stages are used. The core cost is fitted to the wall
+        time of computations without optional indicators, each indicator to the wall time of its stage. Components
+        with too few samples, or without traced memory, keep their current coefficients.
+        """
+        samples = [m for m in metrics if m.path_count is not None and not any(s.cached for s in m.stages)]
+        indicator_stages = {indicator.value: indicator for indicator in BikeabilityIndicators}
+
+        observations: dict[BikeabilityIndicators | None, list[tuple[CostSignals, float, float | None]]] = {}
+        for sample in samples:
+            signals = CostSignals(path_count=sample.path_count, aoi_area_km2=sample.aoi_area_km2)
+            ran_indicators = [s for s in sample.stages if s.stage in indicator_stages]
+            if not ran_indicators:
+                # the stages run concurrently, so only the peak of the whole computation bounds their memory
+                observations.setdefault(None, []).append((signals, sample.wall_time_s, sample.peak_memory_delta_bytes))
+            for stage in ran_indicators:
+                if stage.stage not in sample.skipped_stages:
+                    observations.setdefault(indicator_stages[stage.stage], []).append(
+                        (signals, stage.wall_time_s, stage.peak_memory_delta_bytes)
+                    )
+
+        core = self._calibrate_component(self.core, observations.get(None, []))
+        indicators = {
+            indicator: self._calibrate_component(self.indicators.get(indicator, ComponentCost()), observed)
+            for indicator, observed in observations.items()
+            if indicator is not None
+        }
+        log.info(f'Calibrated the cost model from {len(samples)} computations')
+        return self.model_copy(update={'core': core, 'indicators': {**self.indicators, **indicators}})
+
+    @staticmethod
+    def _calibrate_component(
+        component: ComponentCost, observed: list[tuple[CostSignals, float, float | None]]
+    ) -> ComponentCost:
+        if len(observed) < MIN_CALIBRATION_SAMPLES:
+            return component
+        time_s = LinearCost.fit([signals for signals, _, _ in observed], [time for _, time, _ in observed])
+
+        memory_bytes = component.memory_bytes
+        with_memory = [(signals, memory) for signals, _, memory in observed if memory is not None]
+        if len(with_memory) >= MIN_CALIBRATION_SAMPLES:
+            memory_bytes = LinearCost.fit(*map(list, zip(*with_memory)))
+        return ComponentCost(time_s=time_s, memory_bytes=memory_bytes)
+
+    @staticmethod
+    def _estimate(component: ComponentCost, signals: CostSignals) -> CostEstimate:
+        return CostEstimate(
+            time_s=component.time_s.predict(signals), memory_bytes=component.memory_bytes.predict(signals)
+        )
+
+    def _within_budget(self, time_s: float, memory_bytes: float) -> bool:
+        within_memory = self.memory_budget_bytes is None or memory_bytes <= self.memory_budget_bytes
+        return time_s <= self.time_budget_s and within_memory
+
+
+def load_metrics(metrics_dir: Path) -> list[ComputeMetrics]:
+    return [ComputeMetrics.model_validate_json(path.read_text()) for path in sorted(metrics_dir.glob('*.json'))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Calibrate the cost model from the metrics sidecars in METRICS_DIR')
+    parser.add_argument('metrics_dir', type=Path)
+    parser.add_argument('output', type=Path, help='JSON file to use as COST_MODEL_FILE')
+    parser.add_argument('--base', type=Path, help='Model to start from, the defaults otherwise')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    base = CostModel.model_validate_json(args.base.read_text()) if args.base else CostModel()
+    args.output.write_text(base.calibrate(load_metrics(args.metrics_dir)).model_dump_json(indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+import logging
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable
+
+import pandas as pd
+from pydantic import BaseModel
+
+log = logging.getLogger(__name__)
+
+MEMORY_SAMPLING_INTERVAL_S = 0.005
+
+
+class StageMetrics(BaseModel):
+    stage: str
+    wall_time_s: float
+    cpu_time_s: float
+    rows_in: int | None = None
+    rows_out: int | None = None
+    peak_memory_delta_bytes: int | None = None
+    cached: bool = False
+
+
+class ComputeMetrics(BaseModel):
+    wall_time_s: float
+    stages: list[StageMetrics]
+    peak_memory_delta_bytes: int | None = None
+    path_count: int | None = None
+    aoi_area_km2: float | None = None
+    skipped_stages: list[str] = []
+
+    def hot_stage(self) -> StageMetrics | None:
+        return max(self.stages, key=lambda metrics: metrics.wall_time_s, default=None)
+
+
+def count_rows(value: Any) -> int | None:
+    """Number of rows in a data frame, or in all data frames of a tuple or list. `None` for anything else."""
+    if isinstance(value, pd.DataFrame):
+        return len(value)
+    if isinstance(value, (tuple, list)):
+        counts = [count_rows(item) for item in value]
+        counts = [count for count in counts if count is not None]
+        return sum(counts) if counts else None
+    return None
+
+
+class StageRecorder:
+    """Collect the metrics of the stages of a single computation.
+
+    CPU time is the time spent in the thread running the stage. With `trace_memory`, the memory allocated by Python is
+    traced and sampled while stages run. The traced memory is process wide, so the peak of stages running at the same
+    time includes the allocations of one another. The peak of the whole computation is recorded as well.
+    """
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.stages: list[StageMetrics] = []
+        self._running_peaks: dict[str, int] = {}
+        self._start_memory: int | None = None
+        self._peak_memory = 0
+        self._lock = threading.Lock()
+        self._stop_sampling = threading.Event()
+        self._sampler: threading.Thread | None = None
+        self._started_tracing = False
+        self._start = time.perf_counter()
+
+    def __enter__(self) -> 'StageRecorder':
+        self._start = time.perf_counter()
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            self._start_memory = self._peak_memory = tracemalloc.get_traced_memory()[0]
+            self._sampler = threading.Thread(target=self._sample_memory, name='memory-sampler', daemon=True)
+            self._sampler.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop_sampling.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        if self.trace_memory:
+            self._update_peaks(tracemalloc.get_traced_memory()[0])
+        if self._started_tracing:
+            tracemalloc.stop()
+
+    def measure(self, name: str, func: Callable[..., Any], *inputs: Any) -> Any:
+        start_memory = self._begin_memory(name)
+        start_wall, start_cpu = time.perf_counter(), time.thread_time()
+        output = func(*inputs)
+        wall_time, cpu_time = time.perf_counter() - start_wall, time.thread_time() - start_cpu
+
+        self._record(
+            StageMetrics(
+                stage=name,
+                wall_time_s=wall_time,
+                cpu_time_s=cpu_time,
+                rows_in=count_rows(list(inputs)),
+                rows_out=count_rows(output),
+                peak_memory_delta_bytes=self._end_memory(name, start_memory),
+            )
+        )
+        return output
+
+    def record_cached(self, name: str, output: Any) -> None:
+        self._record(
+            StageMetrics(stage=name, wall_time_s=0.0, cpu_time_s=0.0, rows_out=count_rows(output), cached=True)
+        )
+
+    def report(self) -> ComputeMetrics:
+        with self._lock:
+            return ComputeMetrics(
+                wall_time_s=time.perf_counter() - self._start,
+                stages=list(self.stages),
+                peak_memory_delta_bytes=(
+                    None if self._start_memory is None else self._peak_memory - self._start_memory
+                ),
+            )
+
+    def _record(self, metrics: StageMetrics) -> None:
+        with self._lock:
+            self.stages.append(metrics)
+
+    def _begin_memory(self, name: str) -> int | None:
+        if not self.trace_memory:
+            return None
+        current, _ = tracemalloc.get_traced_memory()
+        with self._lock:
+            self._running_peaks[name] = current
+            self._peak_memory = max(self._peak_memory, current)
+        return current
+
+    def _end_memory(self, name: str, start_memory: int | None) -> int | None:
+        if start_memory is None:
+            return None
+        current, _ = tracemalloc.get_traced_memory()
+        with self._lock:
+            peak = max(self._running_peaks.pop(name), current)
+            self._peak_memory = max(self._peak_memory, current)
+        return peak - start_memory
+
+    def _sample_memory(self) -> None:
+        while not self._stop_sampling.wait(MEMORY_SAMPLING_INTERVAL_S):
+            self._update_peaks(tracemalloc.get_traced_memory()[0])
+
+    def _update_peaks(self, current: int) -> None:
+        with self._lock:
+            for name, peak in self._running_peaks.items():
+                self._running_peaks[name] = max(peak, current)
+            self._peak_memory = max(self._peak_memory, current)
+
+
+def emit_metrics(metrics: ComputeMetrics, correlation_uuid: Any, metrics_dir: Path | None = None) -> None:
+    """Log the metrics of a computation as a structured record and optionally write them to a JSON sidecar."""
+    hot_stage = metrics.hot_stage()
+    log.info(
+        f'Computation took {metrics.wall_time_s:.2f}s, slowest stage: '
+        f'{hot_stage.stage if hot_stage else None} ({hot_stage.wall_time_s if hot_stage else 0.0:.2f}s)',
+        extra={'correlation_uuid': str(correlation_uuid), 'compute_metrics': metrics.model_dump(mode='json')},
+    )
+
+    if metrics_dir is not None:
+        metrics_dir.mkdir(parents=True, exist_ok=True)
+        (metrics_dir / f'{correlation_uuid}.json').write_text(metrics.model_dump_json(indent=2))
@@ -1,29 +1,30 @@
+import functools
 import logging
 from datetime import timedelta
 from importlib.resources import files
+from pathlib import Path
+from typing import Callable
 
 import geopandas as gpd
 import pandas as pd
 import shapely
 from climatoology.base.baseoperator import AoiProperties, Artifact, BaseOperator, ComputationResources, LanguageAlpha2
+from climatoology.base.exception import ClimatoologyUserError
 from climatoology.base.plugin_info import Concern, CustomAOI, PluginAuthor, PluginInfo, generate_plugin_info
 from climatoology.utility.naturalness import NaturalnessIndex, NaturalnessUtility
 from mobility_tools.settings import ORSSettings, S3Settings
 from ohsome import OhsomeClient
 from pydantic.networks import HttpUrl
-from shapely import make_valid
 
-from bikeability.components.detour_factors.detour_analysis import (
-    detour_factor_analysis,
+from bikeability.components.detour_factors.detour_cache import DetourFactorCache
+from bikeability.components.detour_factors.detour_engine import DetourEngine
+from bikeability.components.dooring_risk.dooring_artifacts import (
+    build_dooring_artifact,
+    build_dooring_risk_summary_artifact,
+    summarise_dooring_risk,
 )
-from bikeability.components.dooring_risk.dooring_artifacts import build_dooring_artifact
 from bikeability.components.dooring_risk.dooring_risk import get_dooring_risk, parallel_parking_filter
-from bikeability.components.naturalness import (
-    build_naturalness_artifact,
-    build_naturalness_summary_bar_artifact,
-    get_naturalness,
-    summarise_naturalness,
-)
+from bikeability.components.overview import OVERVIEW_MIN_PATHS, build_overview_artifacts
 from bikeability.components.path_sharing.path_sharing import (
     categorize_paths,
 )
@@ -32,37 +33,117 @@ from bikeability.components.path_sharing.path_summaries import (
     build_aoi_summary_category_stacked_bar_artifact,
     summarise_aoi,
 )
-from bikeability.components.slope.slope_analysis import compute_slope_analysis
+from bikeability.components.shared_paths import build_shared_paths_artifact
 from bikeability.components.smoothness.smoothness import get_smoothness
-from bikeability.components.smoothness.smoothness_artifacts import build_smoothness_artifact
+from bikeability.components.smoothness.smoothness_artifacts import (
+    build_smoothness_artifact,
+    build_smoothness_summary_artifact,
+    summarise_smoothness,
+)
 from bikeability.components.surface_types.surface_types import get_surface_types
-from bikeability.components.surface_types.surface_types_artifacts import build_surface_types_artifact
+from bikeability.components.surface_types.surface_types_artifacts import (
+    build_surface_types_artifact,
+    build_surface_types_summary_artifact,
+    summarise_surface_types,
+)
+from bikeability.components.utils.path_index import PathIndex
+from bikeability.components.utils.sanitation import sanitize_paths
+from bikeability.components.utils.summaries import SummaryEngine
 from bikeability.components.utils.utils import (
-    check_paths_count_limit,
+    add_path_lengths,
+    count_paths,
     fetch_osm_data,
     get_buffered_aoi,
-    get_utm_zone,
+    hilbert_sort,
     ohsome_filter,
 )
+from bikeability.components.utils.vector_tiles import VectorTileOptions
+from bikeability.core.cost_model import ComputeCostEstimate, CostModel, CostSignals, aoi_area_km2
 from bikeability.core.input import BikeabilityIndicators, ComputeInputBikeability
+from bikeability.core.instrumentation import StageRecorder, emit_metrics
+from bikeability.core.pipeline import Pipeline, Stage, StageCache, copy_inputs, fingerprint_frames
+from bikeability.core.profiling import profile_computation
+from bikeability.core.tracing import get_current_span, start_span
 
 log = logging.getLogger(__name__)
 
 
+@functools.cache
+def get_plugin_info() -> PluginInfo:
+    """The plugin info, generated once per process as it reads and renders the resource files."""
+    resources_dir = files('bikeability.resources')
+
+    info = generate_plugin_info(
+        name='hiBike',
+        icon=resources_dir / 'info/bike-lane.jpeg',
+        authors=[
+            PluginAuthor(
+                name='Climate Action Team',
+                affiliation='HeiGIT gGmbH',
+                website=HttpUrl('https://heigit.org/heigit-team/'),
+            ),
+        ],
+        concerns={Concern.MOBILITY_CYCLING},
+        purpose=resources_dir / 'info/purpose.md',
+        teaser='Assess the safety, comfort, and attractiveness of cycling infrastructure in an area of interest.',
+        methodology=resources_dir / 'info/methodology.md',
+        sources_library=resources_dir / 'literature.bib',
+        computation_shelf_life=timedelta(weeks=8),
+        # TODO replace this  aoi
+        demo_input_parameters=ComputeInputBikeability(),
+        demo_aoi=CustomAOI(
+            name='Demo Heidelberg',
+            path=resources_dir / 'Heidelberg_AOI.geojson',
+        ),
+    )
+    log.info(f'Return info {info.model_dump()}')
+    return info
+
+
 class OperatorBikeability(BaseOperator[ComputeInputBikeability]):
+    core_artifacts = (
+        'path_sharing_artifact',
+        'smoothness_artifact',
+        'surface_types_artifact',
+        'dooring_risk_artifact',
+        'aoi_summary_category_stacked_bar_artifact',
+        'smoothness_summary_artifact',
+        'surface_types_summary_artifact',
+        'dooring_risk_summary_artifact',
+    )
+    shared_geometry_artifacts = (
+        'shared_paths_artifact',
+        'aoi_summary_category_stacked_bar_artifact',
+        'smoothness_summary_artifact',
+        'surface_types_summary_artifact',
+        'dooring_risk_summary_artifact',
+    )
+
     def __init__(
         self,
         naturalness_utility: NaturalnessUtility | None = None,
         ors_settings: ORSSettings | None = None,
         s3_settings: S3Settings | None = None,
         check_size: bool = True,
+        detour_cache: DetourFactorCache | None = None,
+        detour_engine: DetourEngine = DetourEngine.ORS,
+        stage_cache: StageCache | None = None,
+        metrics_dir: Path | None = None,
+        trace_memory: bool = False,
+        profile_dir: Path | None = None,
+        cost_model: CostModel | None = None,
+        shared_geometry: bool = False,
+        vector_tiles: VectorTileOptions | None = None,
+        overview_min_paths: int | None = OVERVIEW_MIN_PATHS,
+        hilbert_order: bool = False,
     ):
         super().__init__()
         self.ohsome = OhsomeClient(user_agent='CA Plugin Bikeability')
         log.debug('Initialised bikeability operator with ohsome client')
 
         self.ors_settings = ors_settings
-        if self.ors_settings is None:
+        self.detour_engine = detour_engine
+        if self.ors_settings is None and self.detour_engine == DetourEngine.ORS:
             log.warning(
                 'Initialised bikeability operator without ORS client. In this state detour factors cannot be run'
             )
@@ -87,35 +168,26 @@ class OperatorBikeability(BaseOperator[ComputeInputBikeability]):
             log.debug('Initialised bikeability operator with naturalness client')
 
         self.check_size = check_size
+        self.detour_cache = detour_cache
+        self.metrics_dir = metrics_dir
+        self.trace_memory = trace_memory
+        self.profile_dir = profile_dir
+        self.cost_model = cost_model or CostModel()
+        if shared_geometry:
+            self.core_artifacts = self.shared_geometry_artifacts
+        self.vector_tiles = vector_tiles
+        self.overview_min_paths = overview_min_paths
+        self.hilbert_order = hilbert_order
+
+        self.optional_indicators = {
+            BikeabilityIndicators.NATURALNESS: self.compute_naturalness,
+            BikeabilityIndicators.DETOUR_FACTORS: self.compute_detour_factors,
+            BikeabilityIndicators.SLOPE: self.compute_slope,
+        }
+        self.pipeline = Pipeline(self.get_stages(), cache=stage_cache)
 
     def info(self) -> PluginInfo:
-        resources_dir = files('bikeability.resources')
-
-        info = generate_plugin_info(
-            name='hiBike',
-            icon=resources_dir / 'info/bike-lane.jpeg',
-            authors=[
-                PluginAuthor(
-                    name='Climate Action Team',
-                    affiliation='HeiGIT gGmbH',
-                    website=HttpUrl('https://heigit.org/heigit-team/'),
-                ),
-            ],
-            concerns={Concern.MOBILITY_CYCLING},
-            purpose=resources_dir / 'info/purpose.md',
-            teaser='Assess the safety, comfort, and attractiveness of cycling infrastructure in an area of interest.',
-            methodology=resources_dir / 'info/methodology.md',
-            sources_library=resources_dir / 'literature.bib',
-            computation_shelf_life=timedelta(weeks=8),
-            # TODO replace this  aoi
-            demo_input_parameters=ComputeInputBikeability(),
-            demo_aoi=CustomAOI(
-                name='Demo Heidelberg',
-                path=resources_dir / 'Heidelberg_AOI.geojson',
-            ),
-        )
-        log.info(f'Return info {info.model_dump()}')
-        return info
+        return get_plugin_info()
 
     def compute(  # dead: disable # type: ignore
         self,
@@ -129,91 +201,340 @@ class OperatorBikeability(BaseOperator[ComputeInputBikeability]):
     ) -> list[Artifact]:
         log.info(f'Handling compute request: {params.model_dump()} in context: {resources}')
 
-        buffered_aoi = get_buffered_aoi(aoi)
-
-        log.debug('Get the number of the paths (lines & polygons) which will return.')
-        if self.check_size:
-            check_paths_count_limit(aoi, self.ohsome, 500000)
-
-        paths = self.get_paths(aoi)
+        if self.profile_dir is None:
+            return self.compute_artifacts(resources, aoi, aoi_properties, params)
 
-        paths = categorize_paths(paths)
+        with profile_computation(self.profile_dir, str(resources.correlation_uuid)):
+            return self.compute_artifacts(resources, aoi, aoi_properties, params, sequential=True)
 
-        path_sharing_artifact = build_path_sharing_artifact(paths, resources)
+    def compute_artifacts(
+        self,
+        resources: ComputationResources,
+        aoi: shapely.MultiPolygon,
+        aoi_properties: AoiProperties,
+        params: ComputeInputBikeability,
+        sequential: bool = False,
+        recorder: StageRecorder | None = None,
+    ) -> list[Artifact]:
+        optional_artifacts = [indicator.value for indicator in params.optional_indicators]
+        recorder = recorder or StageRecorder(trace_memory=self.trace_memory)
+        with (
+            start_span(
+                'compute', trace_id=resources.correlation_uuid.hex, attributes={'aoi.name': aoi_properties.name}
+            ),
+            recorder,
+        ):
+            outputs = self.pipeline.run(
+                sources={'aoi': aoi, 'resources': resources, 'params': params},
+                targets=[
+                    *self.core_artifacts,
+                    'overview_artifacts',
+                    *optional_artifacts,
+                    'cost_signals',
+                    'downgraded_indicators',
+                ],
+                recorder=recorder,
+                sequential=sequential,
+            )
+        signals = outputs['cost_signals']
+        metrics = recorder.report().model_copy(
+            update={
+                'skipped_stages': [indicator.value for indicator in outputs['downgraded_indicators']],
+                **(signals.model_dump() if signals else {}),
+            }
+        )
+        emit_metrics(metrics, resources.correlation_uuid, self.metrics_dir)
 
-        smoothness_paths = get_smoothness(paths)
-        smoothness_artifact = build_smoothness_artifact(smoothness_paths, resources)
+        artifacts = [outputs[name] for name in self.core_artifacts]
+        artifacts.extend(outputs['overview_artifacts'])
+        for indicator in self.optional_indicators:
+            if indicator in params.optional_indicators:
+                artifacts.extend(outputs[indicator.value])
+        return artifacts
 
-        surface_type_paths = get_surface_types(paths)
-        surface_types_artifact = build_surface_types_artifact(surface_type_paths, resources)
+    def get_stages(self) -> list[Stage]:
+        """The stages of the compute pipeline, from fetching the paths to building each artifact.
+
+        If the operator has a stage cache, small stages such as the cost signals and the summaries are memoized across
+        computations. The summaries are keyed by the content of the fetched paths and parking, so they are recomputed
+        when the OSM data changed. The paths and the tables and index derived from them are too large to be kept beyond
+        one computation, and artifacts are built for each computation.
+        """
+        stages = [
+            Stage('buffered_aoi', get_buffered_aoi, inputs=('aoi',)),
+            Stage('cost_signals', self.check_cost, inputs=('aoi',)),
+            Stage(
+                'downgraded_indicators', self.downgrade_indicators, inputs=('cost_signals', 'params'), cacheable=False
+            ),
+            Stage(
+                'fetched_paths',
+                lambda aoi, _: self.fetch_paths(aoi),
+                inputs=('aoi', 'cost_signals'),
+                cacheable=False,
+                fingerprint=fingerprint_frames,
+            ),
+            Stage('valid_paths', self.make_paths_valid, inputs=('fetched_paths',), cacheable=False),
+            Stage('paths', copy_inputs(self.prepare_paths), inputs=('valid_paths',), cacheable=False),
+            Stage(
+                'parallel_car_parking',
+                lambda buffered_aoi, _: self.get_parallel_parking(buffered_aoi),
+                inputs=('buffered_aoi', 'cost_signals'),
+                cacheable=False,
+                fingerprint=fingerprint_frames,
+            ),
+            Stage('smoothness_paths', get_smoothness, inputs=('paths',), cacheable=False),
+            Stage('surface_type_paths', copy_inputs(get_surface_types), inputs=('paths',), cacheable=False),
+            Stage('path_index', PathIndex, inputs=('paths',), cacheable=False),
+            Stage(
+                'dooring_risk_paths',
+                get_dooring_risk,
+                inputs=('paths', 'parallel_car_parking', 'path_index'),
+                cacheable=False,
+            ),
+            Stage('summary', SummaryEngine, inputs=('paths',), cacheable=False),
+            Stage('aoi_summary_category_stacked_bar', summarise_aoi, inputs=('summary',)),
+            Stage('smoothness_summary', summarise_smoothness, inputs=('summary', 'smoothness_paths')),
+            Stage('surface_types_summary', summarise_surface_types, inputs=('summary', 'surface_type_paths')),
+            Stage('dooring_risk_summary', summarise_dooring_risk, inputs=('summary', 'dooring_risk_paths')),
+            Stage(
+                'path_sharing_artifact',
+                copy_inputs(functools.partial(build_path_sharing_artifact, tiles=self.vector_tiles)),
+                inputs=('paths', 'resources'),
+                cacheable=False,
+            ),
+            Stage(
+                'smoothness_artifact',
+                copy_inputs(functools.partial(build_smoothness_artifact, tiles=self.vector_tiles)),
+                inputs=('smoothness_paths', 'resources'),
+                cacheable=False,
+            ),
+            Stage(
+                'surface_types_artifact',
+                copy_inputs(functools.partial(build_surface_types_artifact, tiles=self.vector_tiles)),
+                inputs=('surface_type_paths', 'resources'),
+                cacheable=False,
+            ),
+            Stage(
+                'dooring_risk_artifact',
+                copy_inputs(functools.partial(build_dooring_artifact, tiles=self.vector_tiles)),
+                inputs=('dooring_risk_paths', 'resources'),
+                cacheable=False,
+            ),
+            Stage(
+                'shared_paths_artifact',
+                copy_inputs(functools.partial(build_shared_paths_artifact, tiles=self.vector_tiles)),
+                inputs=('paths', 'smoothness_paths', 'surface_type_paths', 'dooring_risk_paths', 'resources'),
+                cacheable=False,
+            ),
+            Stage(
+                'aoi_summary_category_stacked_bar_artifact',
+                build_aoi_summary_category_stacked_bar_artifact,
+                inputs=('aoi_summary_category_stacked_bar', 'resources'),
+                cacheable=False,
+            ),
+            Stage(
+                'smoothness_summary_artifact',
+                build_smoothness_summary_artifact,
+                inputs=('smoothness_summary', 'resources'),
+                cacheable=False,
+            ),
+            Stage(
+                'surface_types_summary_artifact',
+                build_surface_types_summary_artifact,
+                inputs=('surface_types_summary', 'resources'),
+                cacheable=False,
+            ),
+            Stage(
+                'dooring_risk_summary_artifact',
+                build_dooring_risk_summary_artifact,
+                inputs=('dooring_risk_summary', 'resources'),
+                cacheable=False,
+            ),
+            Stage(
+                'overview_artifacts',
+                self.build_overview_artifacts,
+                inputs=(
+                    'aoi',
+                    'paths',
+                    'smoothness_paths',
+                    'surface_type_paths',
+                    'dooring_risk_paths',
+                    'resources',
+                ),
+                cacheable=False,
+            ),
+        ]
 
-        parallel_car_parking = self.get_parallel_parking(buffered_aoi)
-        dooring_risk_paths = get_dooring_risk(paths, parallel_car_parking)
-        dooring_risk_artifact = build_dooring_artifact(dooring_risk_paths, resources)
+        for indicator, compute_indicator in self.optional_indicators.items():
+            stages.append(
+                Stage(
+                    indicator.value,
+                    functools.partial(self.run_optional_indicator, indicator, compute_indicator),
+                    inputs=('aoi', 'paths', 'resources', 'downgraded_indicators'),
+                    cacheable=False,
+                )
+            )
 
-        aoi_summary_category_stacked_bar = summarise_aoi(paths, get_utm_zone(aoi))
-        aoi_summary_category_stacked_bar_artifact = build_aoi_summary_category_stacked_bar_artifact(
-            aoi_summary_category_stacked_bar, resources
-        )
+        return stages
 
-        artifacts = [
-            path_sharing_artifact,
-            smoothness_artifact,
-            surface_types_artifact,
-            dooring_risk_artifact,
-            aoi_summary_category_stacked_bar_artifact,
-        ]
+    def wants_overview(self, paths: gpd.GeoDataFrame) -> bool:
+        """Whether the AOI has enough paths for the hex cell overviews, as the per path layers get too dense."""
+        return self.overview_min_paths is not None and len(paths) >= self.overview_min_paths
 
-        # naturalness
-        if BikeabilityIndicators.NATURALNESS in params.optional_indicators:
-            with self.catch_exceptions(indicator_name='Greenness', resources=resources):
-                naturalness_paths = get_naturalness(paths, self.naturalness_utility, NaturalnessIndex.NDVI)
-                naturalness_artifacts = build_naturalness_artifact(naturalness_paths, resources)
-                artifacts.append(naturalness_artifacts)
-                naturalness_summary_bar = summarise_naturalness(
-                    paths=naturalness_paths, projected_crs=get_utm_zone(aoi)
-                )
-                naturalness_summary_bar_artifact = build_naturalness_summary_bar_artifact(
-                    aoi_aggregate=naturalness_summary_bar, resources=resources
+    def build_overview_artifacts(
+        self,
+        aoi: shapely.MultiPolygon,
+        paths: gpd.GeoDataFrame,
+        smoothness_paths: gpd.GeoDataFrame,
+        surface_type_paths: gpd.GeoDataFrame,
+        dooring_risk_paths: gpd.GeoDataFrame,
+        resources: ComputationResources,
+    ) -> list[Artifact]:
+        if not self.wants_overview(paths):
+            return []
+        return build_overview_artifacts(aoi, paths, smoothness_paths, surface_type_paths, dooring_risk_paths, resources)
+
+    def estimate_cost(self, aoi: shapely.MultiPolygon, params: ComputeInputBikeability) -> ComputeCostEstimate:
+        """Predict the runtime and memory of each part of the computation, without fetching the paths."""
+        return self.cost_model.estimate(self.get_cost_signals(aoi), params.optional_indicators)
+
+    def get_cost_signals(self, aoi: shapely.MultiPolygon) -> CostSignals:
+        return CostSignals(path_count=count_paths(aoi, self.ohsome), aoi_area_km2=aoi_area_km2(aoi))
+
+    def check_cost(self, aoi: shapely.MultiPolygon) -> CostSignals | None:
+        """Reject AOIs whose core artifacts are predicted to exceed the budget, before fetching their paths."""
+        if not self.check_size:
+            return None
+        signals = self.get_cost_signals(aoi)
+        self.cost_model.check_core(signals)
+        return signals
+
+    def downgrade_indicators(
+        self, signals: CostSignals | None, params: ComputeInputBikeability
+    ) -> set[BikeabilityIndicators]:
+        if signals is None:
+            return set()
+        return self.cost_model.downgrade(signals, params.optional_indicators)
+
+    def run_optional_indicator(
+        self,
+        indicator: BikeabilityIndicators,
+        compute_indicator: Callable[
+            [shapely.MultiPolygon, gpd.GeoDataFrame, ComputationResources, list[Artifact]], None
+        ],
+        aoi: shapely.MultiPolygon,
+        paths: gpd.GeoDataFrame,
+        resources: ComputationResources,
+        downgraded_indicators: set[BikeabilityIndicators] = frozenset(),
+    ) -> list[Artifact]:
+        """Run an optional indicator, keeping the artifacts it created before it possibly failed.
+
+        Indicators run concurrently, so each gets its own shallow copy of the paths to add columns to. Downgraded
+        indicators fail right away, so that the user is told why they are missing.
+        """
+        artifacts = []
+        with self.catch_exceptions(indicator_name=indicator.value, resources=resources):
+            if indicator in downgraded_indicators:
+                raise ClimatoologyUserError(
+                    f'The selected area is too large to compute {indicator.value} within the time limit. '
+                    f'Please select a smaller area to include it.'
                 )
-                artifacts.append(naturalness_summary_bar_artifact)
+            compute_indicator(aoi, paths.copy(deep=False), resources, artifacts)
+        return artifacts
 
-        if BikeabilityIndicators.DETOUR_FACTORS in params.optional_indicators:
-            with self.catch_exceptions(indicator_name=BikeabilityIndicators.DETOUR_FACTORS.value, resources=resources):
-                detour_artifacts = detour_factor_analysis(
-                    aoi, paths, ors_settings=self.ors_settings, resources=resources
-                )
-                artifacts.extend(detour_artifacts)
+    def compute_naturalness(
+        self,
+        aoi: shapely.MultiPolygon,
+        paths: gpd.GeoDataFrame,
+        resources: ComputationResources,
+        artifacts: list[Artifact],
+    ) -> None:
+        from bikeability.components.naturalness import (
+            build_naturalness_artifact,
+            build_naturalness_summary_bar_artifact,
+            get_naturalness,
+            summarise_naturalness,
+        )
+        from bikeability.components.overview import build_naturalness_overview_artifact
+
+        naturalness_paths = get_naturalness(paths, self.naturalness_utility, NaturalnessIndex.NDVI)
+        naturalness_artifacts = build_naturalness_artifact(naturalness_paths, resources, tiles=self.vector_tiles)
+        artifacts.append(naturalness_artifacts)
+        naturalness_summary_bar = summarise_naturalness(SummaryEngine(naturalness_paths))
+        naturalness_summary_bar_artifact = build_naturalness_summary_bar_artifact(
+            aoi_aggregate=naturalness_summary_bar, resources=resources
+        )
+        artifacts.append(naturalness_summary_bar_artifact)
+        if self.wants_overview(paths):
+            naturalness_overview_artifact = build_naturalness_overview_artifact(aoi, naturalness_paths, resources)
+            if naturalness_overview_artifact is not None:
+                artifacts.append(naturalness_overview_artifact)
 
-        if BikeabilityIndicators.SLOPE in params.optional_indicators:
-            with self.catch_exceptions(indicator_name=BikeabilityIndicators.SLOPE.value, resources=resources):
-                slope_artifacts = compute_slope_analysis(paths, self.s3_settings, resources)
-                artifacts.extend(slope_artifacts)
+    def compute_detour_factors(
+        self,
+        aoi: shapely.MultiPolygon,
+        paths: gpd.GeoDataFrame,
+        resources: ComputationResources,
+        artifacts: list[Artifact],
+    ) -> None:
+        from bikeability.components.detour_factors.detour_analysis import detour_factor_analysis
+
+        detour_artifacts = detour_factor_analysis(
+            aoi,
+            paths,
+            ors_settings=self.ors_settings,
+            resources=resources,
+            cache=self.detour_cache,
+            engine=self.detour_engine,
+        )
+        artifacts.extend(detour_artifacts)
 
-        return artifacts
+    def compute_slope(
+        self,
+        aoi: shapely.MultiPolygon,
+        paths: gpd.GeoDataFrame,
+        resources: ComputationResources,
+        artifacts: list[Artifact],
+    ) -> None:
+        from bikeability.components.slope.slope_analysis import compute_slope_analysis
+
+        slope_artifacts = compute_slope_analysis(
+            paths,
+            self.s3_settings,
+            resources,
+            tiles=self.vector_tiles,
+            overview_aoi=aoi if self.wants_overview(paths) else None,
+        )
+        artifacts.extend(slope_artifacts)
 
     def get_paths(self, aoi: shapely.MultiPolygon) -> gpd.GeoDataFrame:
+        return self.make_paths_valid(self.fetch_paths(aoi))
+
+    def fetch_paths(self, aoi: shapely.MultiPolygon) -> tuple[gpd.GeoDataFrame, gpd.GeoDataFrame]:
         log.debug('Extracting paths')
 
         line_paths = fetch_osm_data(aoi, ohsome_filter('line'), self.ohsome)
         polygon_paths = fetch_osm_data(aoi, ohsome_filter('polygon'), self.ohsome)
-
-        invalid_line = ~line_paths.is_valid
-        line_paths.loc[invalid_line, 'geometry'] = line_paths.loc[invalid_line, 'geometry'].apply(make_valid)
-        invalid_polygon = ~polygon_paths.is_valid
-        polygon_paths.loc[invalid_polygon, 'geometry'] = polygon_paths.loc[invalid_polygon, 'geometry'].apply(
-            make_valid
-        )
-
-        paths = pd.concat(
-            [
-                line_paths[~line_paths.geom_type.isin(['Point', 'MultiPoint'])],
-                polygon_paths[~polygon_paths.geom_type.isin(['Point', 'MultiPoint'])],
-            ],
-            ignore_index=True,
+        return line_paths, polygon_paths
+
+    @staticmethod
+    def make_paths_valid(fetched_paths: tuple[gpd.GeoDataFrame, gpd.GeoDataFrame]) -> gpd.GeoDataFrame:
+        paths, report = sanitize_paths(*fetched_paths)
+        log.info(
+            f'Sanitised {report.paths_in} fetched paths into {report.paths_out}',
+            extra={'sanitation_report': report.model_dump()},
         )
-
-        return paths  # type: ignore
+        span = get_current_span()
+        if span is not None:
+            for key, count in report.model_dump().items():
+                span.set_attribute(f'sanitation.{key}', count)
+        return paths
+
+    def prepare_paths(self, paths: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+        """Categorise the valid paths and cache their lengths, sorted along a Hilbert curve if `hilbert_order` is set."""
+        if self.hilbert_order:
+            paths = hilbert_sort(paths)
+        return add_path_lengths(categorize_paths(paths))
 
     def get_parallel_parking(self, aoi: shapely.MultiPolygon) -> gpd.GeoDataFrame:
         log.debug('Extracting parallel car parking')
@@ -0,0 +1,223 @@
+import contextvars
+import functools
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, Callable, Iterable
+
+import geopandas as gpd
+import pandas as pd
+import shapely
+from pydantic import BaseModel
+
+from bikeability.core.instrumentation import StageRecorder
+from bikeability.core.tracing import start_span
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Stage:
+    """A node of the compute pipeline.
+
+    `func` is called with the outputs of the stages (or pipeline sources) named in `inputs`, in that order. Stages must
+    not modify their inputs in place, as outputs are shared between stages and possibly between computations.
+    Stages with side effects outside the pipeline, such as writing artifacts, must not be `cacheable`, nor should
+    stages with large outputs like whole path tables, as the cache would keep them alive between computations.
+
+    The stages depending on a stage are keyed by its name and the fingerprints of its inputs. Stages fetching data from
+    external services should instead set `fingerprint` to fingerprint their output, so that cached stages depending on
+    them are recomputed when the fetched data changes.
+    """
+
+    name: str
+    func: Callable[..., Any]
+    inputs: tuple[str, ...] = ()
+    cacheable: bool = True
+    fingerprint: Callable[[Any], str] | None = None
+
+
+class StageCache:
+    """Thread-safe LRU memory of stage outputs, keyed by the fingerprint of the stage and its inputs."""
+
+    def __init__(self, max_entries: int = 32, max_age: timedelta = timedelta(hours=1)):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+
+            created, value = entry
+            if time.monotonic() - created > self.max_age.total_seconds():
+                del self._entries[key]
+                return False, None
+
+            self._entries.move_to_end(key)
+            return True, value
+
+    def put(self, key: str, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def copy_inputs(func: Callable[..., Any]) -> Callable[..., Any]:
+    """Call `func` with shallow copies of its data frame arguments, for stage functions that add columns in place."""
+
+    @functools.wraps(func)
+    def wrapper(*args):
+        return func(*(arg.copy(deep=False) if isinstance(arg, pd.DataFrame) else arg for arg in args))
+
+    return wrapper
+
+
+def fingerprint_value(value: Any) -> str:
+    """Fingerprint a pipeline source. Geometries are hashed by their WKB, pydantic models by their JSON dump."""
+    if isinstance(value, shapely.Geometry):
+        content = shapely.to_wkb(value)
+    elif isinstance(value, BaseModel):
+        content = value.model_dump_json().encode()
+    else:
+        content = repr(value).encode()
+    return hashlib.sha1(content).hexdigest()
+
+
+def fingerprint_frames(value: pd.DataFrame | tuple[pd.DataFrame, ...]) -> str:
+    """Fingerprint the content of a data frame, or of a tuple of them. Geometries are hashed by their WKB."""
+    digest = hashlib.sha1()
+    for frame in value if isinstance(value, tuple) else (value,):
+        for column in frame.columns:
+            values = frame[column]
+            if isinstance(values, gpd.GeoSeries):
+                values = pd.Series(shapely.to_wkb(values.to_numpy()))
+            digest.update(str(column).encode())
+            digest.update(pd.util.hash_pandas_object(values, index=False, categorize=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class InlineExecutor(Executor):
+    """Executor that runs each task right away in the calling thread."""
+
+    def submit(self, fn: Callable[..., Any], /, *args, **kwargs) -> Future:
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+
+class Pipeline:
+    """Run a DAG of stages, executing independent stages in parallel and memoizing their outputs in a `StageCache`."""
+
+    def __init__(self, stages: Iterable[Stage], cache: StageCache | None = None, max_workers: int = 8):
+        self.stages = {stage.name: stage for stage in stages}
+        self.cache = cache
+        self.max_workers = max_workers
+
+    def run(
+        self,
+        sources: dict[str, Any],
+        targets: Iterable[str],
+        recorder: StageRecorder | None = None,
+        sequential: bool = False,
+    ) -> dict[str, Any]:
+        """Compute the `targets` from the `sources`, only running the stages they (transitively) depend on.
+
+        If a `recorder` is given, the metrics of each stage are measured into it. With `sequential`, stages run one
+        after another in the calling thread, e.g. to profile them.
+        """
+        targets = list(targets)
+        values = dict(sources)
+        fingerprints = {name: fingerprint_value(value) for name, value in sources.items()}
+        pending = self._required_stages(targets, available=set(sources))
+        running: dict[Future, tuple[Stage, str]] = {}
+
+        executor = (
+            InlineExecutor()
+            if sequential
+            else ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='stage')
+        )
+        with executor:
+            try:
+                while pending or running:
+                    ready = [stage for stage in pending.values() if set(stage.inputs) <= values.keys()]
+                    if not ready and not running:
+                        raise ValueError(f'The stages {list(pending)} depend on each other in a cycle')
+
+                    for stage in ready:
+                        del pending[stage.name]
+                        key = self._fingerprint(stage, fingerprints)
+                        fingerprints[stage.name] = key
+
+                        hit, value = self.cache.get(key) if self.cache and stage.cacheable else (False, None)
+                        if hit:
+                            log.debug(f'Reusing cached output of stage {stage.name}')
+                            values[stage.name] = value
+                            if self.cache and stage.fingerprint:
+                                fingerprints[stage.name] = stage.fingerprint(value)
+                            if recorder:
+                                recorder.record_cached(stage.name, value)
+                        else:
+                            inputs = [values[name] for name in stage.inputs]
+                            future = executor.submit(
+                                contextvars.copy_context().run, self._run_stage, stage, inputs, recorder
+                            )
+                            running[future] = (stage, key)
+
+                    if not running:
+                        continue
+
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        stage, key = running.pop(future)
+                        values[stage.name] = future.result()
+                        if self.cache and stage.fingerprint:
+                            fingerprints[stage.name] = stage.fingerprint(values[stage.name])
+                        if self.cache and stage.cacheable:
+                            self.cache.put(key, values[stage.name])
+            except BaseException:
+                executor.shutdown(wait=True, cancel_futures=True)
+                raise
+
+        return {target: values[target] for target in targets}
+
+    @staticmethod
+    def _run_stage(stage: Stage, inputs: list[Any], recorder: StageRecorder | None) -> Any:
+        with start_span(f'stage {stage.name}'):
+            if recorder:
+                return recorder.measure(stage.name, stage.func, *inputs)
+            return stage.func(*inputs)
+
+    def _required_stages(self, targets: list[str], available: set[str]) -> dict[str, Stage]:
+        required = {}
+        to_visit = list(targets)
+        while to_visit:
+            name = to_visit.pop()
+            if name in required or name in available:
+                continue
+            if name not in self.stages:
+                raise KeyError(f'No stage or source named {name} in the pipeline')
+            required[name] = self.stages[name]
+            to_visit.extend(self.stages[name].inputs)
+        return required
+
+    @staticmethod
+    def _fingerprint(stage: Stage, fingerprints: dict[str, str]) -> str:
+        content = '|'.join([stage.name, *(fingerprints[name] for name in stage.inputs)])
+        return hashlib.sha1(content.encode()).hexdigest()
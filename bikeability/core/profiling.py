@@ -0,0 +1,45 @@
+import cProfile
+import logging
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+log = logging.getLogger(__name__)
+
+
+@contextmanager
+def profile_computation(profile_dir: Path, computation_id: str) -> Iterator[Path]:
+    """Profile the enclosed block and save the profile in `profile_dir`, named after the computation.
+
+    With pyinstrument installed, the sampling profile is saved as a speedscope flamegraph
+    (`<computation_id>.speedscope.json`, open it on https://www.speedscope.app) and an HTML report. Otherwise, the
+    deterministic cProfile statistics are saved as `<computation_id>.pstats` (e.g. for snakeviz or `python -m pstats`).
+    Both profilers only record the calling thread.
+    """
+    profile_dir.mkdir(parents=True, exist_ok=True)
+
+    try:
+        from pyinstrument import Profiler
+        from pyinstrument.renderers import SpeedscopeRenderer
+    except ImportError:
+        profile_path = profile_dir / f'{computation_id}.pstats'
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield profile_path
+        finally:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+            log.info(f'Saved cProfile statistics to {profile_path}')
+        return
+
+    profile_path = profile_dir / f'{computation_id}.speedscope.json'
+    profiler = Profiler(async_mode='disabled')
+    profiler.start()
+    try:
+        yield profile_path
+    finally:
+        profiler.stop()
+        profile_path.write_text(profiler.output(SpeedscopeRenderer()))
+        (profile_dir / f'{computation_id}.html').write_text(profiler.output_html())
+        log.info(f'Saved flamegraph to {profile_path}')
@@ -1,9 +1,34 @@
+from pathlib import Path
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from bikeability.components.detour_factors.detour_engine import DetourEngine
+from bikeability.components.overview import OVERVIEW_MIN_PATHS
+from bikeability.core.cost_model import DEFAULT_TIME_BUDGET_S
+
 
 class Settings(BaseSettings):
     naturalness_host: str
     naturalness_port: int
     naturalness_path: str
 
-    model_config = SettingsConfigDict(env_file='.env')  # dead: disable
+    detour_cache_dir: Path | None = None
+    detour_engine: DetourEngine = DetourEngine.ORS
+
+    stage_cache_size: int = 0
+
+    metrics_dir: Path | None = None
+    trace_memory: bool = False
+    traces_file: Path | None = None
+    profile_dir: Path | None = None
+
+    cost_model_file: Path | None = None
+    time_budget_s: float = DEFAULT_TIME_BUDGET_S
+    memory_budget_gb: float | None = None
+
+    shared_geometry_layer: bool = False
+    vector_tiles: bool = False
+    overview_min_paths: int | None = OVERVIEW_MIN_PATHS
+    hilbert_order: bool = False
+
+    model_config = SettingsConfigDict(env_file='.env', env_parse_none_str='None')  # dead: disable
@@ -0,0 +1,231 @@
+import contextvars
+import json
+import logging
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from enum import IntEnum
+from pathlib import Path
+from typing import Any, Iterator
+
+import urllib3.connectionpool
+
+log = logging.getLogger(__name__)
+
+SERVICE_NAME = 'bikeability'
+
+
+class SpanKind(IntEnum):
+    INTERNAL = 1
+    CLIENT = 3
+
+
+class StatusCode(IntEnum):
+    UNSET = 0
+    OK = 1
+    ERROR = 2
+
+
+class Span:
+    """A timed operation, exported in the OpenTelemetry (OTLP/JSON) span format."""
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_span_id: str | None = None,
+        kind: SpanKind = SpanKind.INTERNAL,
+        attributes: dict[str, Any] | None = None,
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent_span_id
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.events: list[dict] = []
+        self.status_code = StatusCode.UNSET
+        self.status_message = ''
+        self.start_time_unix_nano = time.time_ns()
+        self.end_time_unix_nano: int | None = None
+        self._lock = threading.Lock()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        with self._lock:
+            self.attributes[key] = value
+
+    def add_to_attribute(self, key: str, value: int) -> None:
+        with self._lock:
+            self.attributes[key] = self.attributes.get(key, 0) + value
+
+    def add_event(self, name: str, attributes: dict[str, Any] | None = None) -> None:
+        with self._lock:
+            self.events.append({'name': name, 'time_unix_nano': time.time_ns(), 'attributes': attributes or {}})
+
+    def to_otlp(self) -> dict:
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': int(self.kind),
+            'startTimeUnixNano': str(self.start_time_unix_nano),
+            'endTimeUnixNano': str(self.end_time_unix_nano),
+            'attributes': _otlp_attributes(self.attributes),
+            'events': [
+                {
+                    'name': event['name'],
+                    'timeUnixNano': str(event['time_unix_nano']),
+                    'attributes': _otlp_attributes(event['attributes']),
+                }
+                for event in self.events
+            ],
+            'status': {'code': int(self.status_code), 'message': self.status_message},
+        }
+        if self.parent_span_id:
+            span['parentSpanId'] = self.parent_span_id
+        return span
+
+
+def _otlp_attributes(attributes: dict[str, Any]) -> list[dict]:
+    otlp_attributes = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            otlp_value = {'boolValue': value}
+        elif isinstance(value, int):
+            otlp_value = {'intValue': str(value)}
+        elif isinstance(value, float):
+            otlp_value = {'doubleValue': value}
+        else:
+            otlp_value = {'stringValue': str(value)}
+        otlp_attributes.append({'key': key, 'value': otlp_value})
+    return otlp_attributes
+
+
+class FileSpanExporter:
+    """Append finished spans to a file, one OTLP/JSON `resourceSpans` document per line.
+
+    This is the format of the OpenTelemetry collector's file exporter, so the files can be replayed into any collector.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        document = {
+            'resourceSpans': [
+                {
+                    'resource': {'attributes': _otlp_attributes({'service.name': SERVICE_NAME})},
+                    'scopeSpans': [{'scope': {'name': __name__}, 'spans': [span.to_otlp()]}],
+                }
+            ]
+        }
+        line = json.dumps(document) + '\n'
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open('a') as traces_file:
+                traces_file.write(line)
+
+
+_current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar('current_span', default=None)
+_exporter: FileSpanExporter | None = None
+
+
+def configure_tracing(traces_file: Path | None) -> None:
+    """Export spans to `traces_file`, or stop exporting them if it is `None`.
+
+    HTTP requests are only instrumented while spans are exported, so urllib3 is left untouched unless tracing is enabled.
+    """
+    global _exporter
+    _exporter = FileSpanExporter(traces_file) if traces_file is not None else None
+    if _exporter is not None:
+        _instrument_http()
+        log.info(f'Exporting traces to {traces_file}')
+    else:
+        _uninstrument_http()
+
+
+def get_current_span() -> Span | None:
+    return _current_span.get()
+
+
+@contextmanager
+def start_span(
+    name: str,
+    kind: SpanKind = SpanKind.INTERNAL,
+    attributes: dict[str, Any] | None = None,
+    trace_id: str | None = None,
+) -> Iterator[Span]:
+    """Time the enclosed block as a child of the current span. Errors are recorded in the span status and re-raised.
+
+    Threads only inherit the current span if they run in a copy of the caller's context (`contextvars.copy_context`).
+    """
+    parent = _current_span.get()
+    span = Span(
+        name,
+        trace_id=trace_id or (parent.trace_id if parent else secrets.token_hex(16)),
+        parent_span_id=parent.span_id if parent else None,
+        kind=kind,
+        attributes=attributes,
+    )
+    token = _current_span.set(span)
+    try:
+        yield span
+        span.status_code = StatusCode.OK
+    except BaseException as e:
+        span.status_code = StatusCode.ERROR
+        span.status_message = f'{type(e).__name__}: {e}'
+        span.add_event('exception', {'exception.type': type(e).__name__, 'exception.message': str(e)})
+        raise
+    finally:
+        span.end_time_unix_nano = time.time_ns()
+        _current_span.reset(token)
+        if _exporter is not None:
+            _exporter.export(span)
+
+
+_original_urlopen = None
+
+
+def _instrument_http() -> None:
+    """Count the HTTP requests, bytes, retries and status codes of the current span.
+
+    All outbound clients (ohsome, ORS, the naturalness utility and S3) send their requests through urllib3, which calls
+    `urlopen` again for every retry.
+    """
+    global _original_urlopen
+    if _original_urlopen is not None:
+        return
+    urlopen = _original_urlopen = urllib3.connectionpool.HTTPConnectionPool.urlopen
+
+    def traced_urlopen(pool, method, url, body=None, *args, **kwargs):
+        span = _current_span.get()
+        if span is None:
+            return urlopen(pool, method, url, body, *args, **kwargs)
+
+        span.add_to_attribute('http.request.count', 1)
+        if isinstance(body, (bytes, str)):
+            span.add_to_attribute('http.request.body.size', len(body))
+        retries = kwargs.get('retries', args[1] if len(args) > 1 else None)
+        if getattr(retries, 'history', None):
+            span.add_to_attribute('http.request.retry_count', 1)
+
+        response = urlopen(pool, method, url, body, *args, **kwargs)
+
+        span.set_attribute('http.response.status_code', response.status)
+        content_length = response.headers.get('Content-Length')
+        if content_length and content_length.isdigit():
+            span.add_to_attribute('http.response.body.size', int(content_length))
+        return response
+
+    urllib3.connectionpool.HTTPConnectionPool.urlopen = traced_urlopen
+
+
+def _uninstrument_http() -> None:
+    """Restore the `urlopen` of urllib3 replaced by `_instrument_http`."""
+    global _original_urlopen
+    if _original_urlopen is None:
+        return
+    urllib3.connectionpool.HTTPConnectionPool.urlopen = _original_urlopen
+    _original_urlopen = None
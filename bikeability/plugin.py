@@ -4,8 +4,13 @@ from climatoology.app.plugin import start_plugin
 from climatoology.utility.naturalness import NaturalnessUtility
 from mobility_tools.settings import ORSSettings, S3Settings
 
+from bikeability.components.detour_factors.detour_cache import DetourFactorCache
+from bikeability.components.utils.vector_tiles import VectorTileOptions
+from bikeability.core.cost_model import CostModel
 from bikeability.core.operator_worker import OperatorBikeability
+from bikeability.core.pipeline import StageCache
 from bikeability.core.settings import Settings
+from bikeability.core.tracing import configure_tracing
 
 log = logging.getLogger(__name__)
 
@@ -14,11 +19,34 @@ def init_plugin(
     initialized_settings: Settings, initialized_ors_settings: ORSSettings, initialized_s3_settings: S3Settings
 ) -> int | None:
     settings = Settings()
+    configure_tracing(settings.traces_file)
+    cost_model = (
+        CostModel.model_validate_json(settings.cost_model_file.read_text()) if settings.cost_model_file else CostModel()
+    )
+    cost_model = cost_model.model_copy(
+        update={
+            'time_budget_s': settings.time_budget_s,
+            'memory_budget_bytes': settings.memory_budget_gb * 1024**3 if settings.memory_budget_gb else None,
+        }
+    )
     naturalness_utility = NaturalnessUtility(
         base_url=f'http://{settings.naturalness_host}:{settings.naturalness_port}{settings.naturalness_path}',
     )
     operator = OperatorBikeability(
-        naturalness_utility, ors_settings, s3_settings
+        naturalness_utility,
+        ors_settings,
+        s3_settings,
+        detour_cache=DetourFactorCache(settings.detour_cache_dir),
+        detour_engine=settings.detour_engine,
+        stage_cache=StageCache(max_entries=settings.stage_cache_size) if settings.stage_cache_size > 0 else None,
+        metrics_dir=settings.metrics_dir,
+        trace_memory=settings.trace_memory,
+        profile_dir=settings.profile_dir,
+        cost_model=cost_model,
+        shared_geometry=settings.shared_geometry_layer,
+        vector_tiles=VectorTileOptions() if settings.vector_tiles else None,
+        overview_min_paths=settings.overview_min_paths,
+        hilbert_order=settings.hilbert_order,
     )  # todo: confirm there should be initialized settings or global settings.
 
     log.info(f'Running plugin: {operator.info().name}')
@@ -0,0 +1,196 @@
+"""Measure the memory footprint of `compute` on synthetic cities of increasing size.
+
+Run with `python -m test.benchmarks.memory_benchmark --output memory.json --memory-budget-gb 4`.
+
+Every size is computed in fresh subprocesses: once as in production to measure the peak RSS, and once with tracemalloc
+and sequential stages to attribute the memory to stages and their top allocating lines. The report contains the fitted
+bytes per path of the peak RSS and of each stage, and the number of paths that fit into the memory budget.
+"""
+
+import argparse
+import json
+import logging
+import resource
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+import uuid
+from pathlib import Path
+from typing import Any, Callable
+
+import geopandas as gpd
+import numpy as np
+import shapely
+from climatoology.base.baseoperator import AoiProperties
+from climatoology.base.computation import ComputationScope
+
+from bikeability.core.input import ComputeInputBikeability
+from bikeability.core.instrumentation import StageRecorder
+from bikeability.core.operator_worker import OperatorBikeability
+from test.benchmarks.synthetic_city import generate_parking, generate_paths
+
+log = logging.getLogger(__name__)
+
+DEFAULT_SIZES = (10_000, 50_000, 100_000, 250_000)
+
+
+class SyntheticCityOperator(OperatorBikeability):
+    """Operator serving synthetic paths and parking instead of fetching them from ohsome."""
+
+    def __init__(self, paths: gpd.GeoDataFrame, parking: gpd.GeoDataFrame):
+        super().__init__(check_size=False)
+        self.synthetic_paths = paths
+        self.synthetic_parking = parking
+
+    def fetch_paths(self, aoi: shapely.MultiPolygon) -> tuple[gpd.GeoDataFrame, gpd.GeoDataFrame]:
+        is_polygon = self.synthetic_paths.geom_type == 'Polygon'
+        return self.synthetic_paths[~is_polygon], self.synthetic_paths[is_polygon]
+
+    def get_parallel_parking(self, aoi: shapely.MultiPolygon) -> gpd.GeoDataFrame:
+        return self.synthetic_parking
+
+
+class AllocationRecorder(StageRecorder):
+    """Stage recorder that also keeps the lines allocating the most memory that is still held after each stage."""
+
+    def __init__(self, top: int = 10):
+        super().__init__(trace_memory=True)
+        self.top = top
+        self.top_allocators: dict[str, list[dict]] = {}
+
+    def measure(self, name: str, func: Callable[..., Any], *inputs: Any) -> Any:
+        before = tracemalloc.take_snapshot()
+        output = super().measure(name, func, *inputs)
+        after = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+
+        self.top_allocators[name] = [
+            {
+                'location': f'{statistic.traceback[0].filename}:{statistic.traceback[0].lineno}',
+                'size_diff_bytes': statistic.size_diff,
+                'count_diff': statistic.count_diff,
+            }
+            for statistic in after.compare_to(before, 'lineno')[: self.top]
+        ]
+        return output
+
+
+def peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def measure_size(n_ways: int, trace: bool, top: int) -> dict:
+    paths = generate_paths(n_ways)
+    parking = generate_parking(paths)
+    aoi = shapely.MultiPolygon([shapely.box(*paths.total_bounds)])
+    operator = SyntheticCityOperator(paths, parking)
+
+    rss_before_compute = peak_rss_bytes()
+    recorder = AllocationRecorder(top) if trace else StageRecorder()
+    with ComputationScope(uuid.uuid4()) as resources:
+        operator.compute_artifacts(
+            resources,
+            aoi,
+            AoiProperties(name='synthetic', id='synthetic'),
+            ComputeInputBikeability(),
+            sequential=trace,
+            recorder=recorder,
+        )
+
+    return {
+        'n_paths': n_ways,
+        'traced': trace,
+        'peak_rss_before_compute_bytes': rss_before_compute,
+        'peak_rss_bytes': peak_rss_bytes(),
+        'stages': recorder.report().model_dump(mode='json')['stages'],
+        'top_allocators': recorder.top_allocators if trace else {},
+    }
+
+
+def run_worker(n_ways: int, trace: bool, top: int) -> dict:
+    with tempfile.NamedTemporaryFile(suffix='.json') as output:
+        command = [sys.executable, '-m', __spec__.name, '--worker', str(n_ways), '--top', str(top)]
+        command += ['--worker-output', output.name] + (['--trace'] if trace else [])
+        subprocess.run(command, check=True)
+        return json.loads(Path(output.name).read_text())
+
+
+def fit_bytes_per_path(n_paths: list[int], values: list[float]) -> dict:
+    """Linear fit of a memory measure over the number of paths."""
+    if len(n_paths) < 2:
+        return {'bytes_per_path': None, 'fixed_bytes': None}
+    bytes_per_path, fixed_bytes = np.polyfit(n_paths, values, deg=1)
+    return {'bytes_per_path': float(bytes_per_path), 'fixed_bytes': float(fixed_bytes)}
+
+
+def build_report(runs: list[dict], memory_budget_bytes: float | None) -> dict:
+    plain_runs = [run for run in runs if not run['traced']]
+    traced_runs = [run for run in runs if run['traced']]
+
+    peak_rss_fit = fit_bytes_per_path(
+        [run['n_paths'] for run in plain_runs], [run['peak_rss_bytes'] for run in plain_runs]
+    )
+
+    stage_names = {stage['stage'] for run in traced_runs for stage in run['stages']}
+    stage_fits = {}
+    for stage_name in sorted(stage_names):
+        points = [
+            (run['n_paths'], stage['peak_memory_delta_bytes'])
+            for run in traced_runs
+            for stage in run['stages']
+            if stage['stage'] == stage_name and stage['peak_memory_delta_bytes'] is not None
+        ]
+        stage_fits[stage_name] = fit_bytes_per_path(*map(list, zip(*points))) if points else {}
+
+    max_paths = None
+    if memory_budget_bytes and peak_rss_fit['bytes_per_path']:
+        max_paths = int((memory_budget_bytes - peak_rss_fit['fixed_bytes']) / peak_rss_fit['bytes_per_path'])
+
+    return {
+        'peak_rss': peak_rss_fit,
+        'stages': stage_fits,
+        'memory_budget_bytes': memory_budget_bytes,
+        'max_paths_within_budget': max_paths,
+        'runs': runs,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='Number of paths per city')
+    parser.add_argument('--top', type=int, default=10, help='Number of top allocating lines to keep per stage')
+    parser.add_argument('--memory-budget-gb', type=float, help='Worker memory to compute the maximum paths for')
+    parser.add_argument('--output', type=Path, help='JSON file to write the report to, default stdout')
+    parser.add_argument('--worker', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--worker-output', type=Path, help=argparse.SUPPRESS)
+    parser.add_argument('--trace', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+
+    if args.worker:
+        args.worker_output.write_text(json.dumps(measure_size(args.worker, args.trace, args.top)))
+        return 0
+
+    runs = []
+    for n_ways in args.sizes:
+        for trace in (False, True):
+            runs.append(run_worker(n_ways, trace, args.top))
+        log.info(f'{n_ways} paths: peak RSS {runs[-2]["peak_rss_bytes"] / 1024**2:.0f} MiB')
+
+    budget = args.memory_budget_gb * 1024**3 if args.memory_budget_gb else None
+    report = build_report(runs, budget)
+    log.info(f'Peak RSS per path: {report["peak_rss"]["bytes_per_path"]} bytes')
+    if report['max_paths_within_budget'] is not None:
+        log.info(f'Paths within the memory budget: {report["max_paths_within_budget"]}')
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(output)
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
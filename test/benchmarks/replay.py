@@ -0,0 +1,312 @@
+"""Record the outbound calls of a real computation and replay them offline to benchmark `compute` end to end.
+
+Record against the live services (configured as for the plugin through `.env`, `.env.ors` and `.env.s3`):
+`python -m test.benchmarks.replay record --aoi aoi.geojson --indicator Slope --output recordings/heidelberg`
+
+Replay with injected latency:
+`python -m test.benchmarks.replay replay recordings/heidelberg --round-trip-ms 80 --bandwidth-mbps 50 --repeat 3`
+
+HTTP calls (ohsome, ORS and the naturalness utility) are recorded at the `requests` level. The S3 elevation data is
+read outside of `requests`, so `get_paths_slopes` is recorded as a whole. Recordings are pickled, so only replay
+recordings you made yourself.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import pickle
+import re
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from importlib import import_module
+from pathlib import Path
+from typing import Any, Iterator
+from unittest.mock import patch
+
+import geopandas as gpd
+import requests
+import responses
+import shapely
+from climatoology.base.baseoperator import AoiProperties
+from climatoology.base.computation import ComputationScope
+from climatoology.utility.naturalness import NaturalnessUtility
+from mobility_tools.settings import ORSSettings, S3Settings
+from pydantic import BaseModel
+from requests.adapters import HTTPAdapter
+
+from bikeability.core.input import ComputeInputBikeability
+from bikeability.core.operator_worker import OperatorBikeability
+from bikeability.core.settings import Settings
+
+log = logging.getLogger(__name__)
+
+SLOPES_FUNCTION = 'bikeability.components.slope.slope_analysis.get_paths_slopes'
+HTTP_METHODS = ('GET', 'POST', 'PUT', 'DELETE', 'HEAD', 'PATCH')
+
+
+class LatencyModel(BaseModel):
+    """Delay of a replayed response: a fixed round trip plus the transfer time of the body.
+
+    With `use_recorded`, the delays measured while recording are replayed instead.
+    """
+
+    round_trip_s: float = 0.0
+    bandwidth_bytes_per_s: float | None = None
+    use_recorded: bool = False
+
+    def delay(self, response_bytes: int, recorded_s: float) -> float:
+        if self.use_recorded:
+            return recorded_s
+        transfer_s = response_bytes / self.bandwidth_bytes_per_s if self.bandwidth_bytes_per_s else 0.0
+        return self.round_trip_s + transfer_s
+
+
+def request_key(method: str, url: str, body: bytes | str | None) -> str:
+    if isinstance(body, str):
+        body = body.encode()
+    return f'{method} {url} {hashlib.sha1(body or b"").hexdigest()}'
+
+
+@contextmanager
+def record_http(directory: Path) -> Iterator[None]:
+    """Record all responses received through `requests` to `directory`."""
+    bodies_dir = directory / 'http'
+    bodies_dir.mkdir(parents=True, exist_ok=True)
+    exchanges = []
+    lock = threading.Lock()
+    send = HTTPAdapter.send
+
+    def recording_send(adapter: HTTPAdapter, request: requests.PreparedRequest, *args, **kwargs) -> requests.Response:
+        start = time.perf_counter()
+        response = send(adapter, request, *args, **kwargs)
+        content = response.content
+        elapsed_s = time.perf_counter() - start
+
+        with lock:
+            body_file = f'{len(exchanges):05d}.gz'
+            exchanges.append(
+                {
+                    'key': request_key(request.method, request.url, request.body),
+                    'method': request.method,
+                    'url': request.url,
+                    'status': response.status_code,
+                    'content_type': response.headers.get('Content-Type'),
+                    'body_file': body_file,
+                    'body_size': len(content),
+                    'elapsed_s': elapsed_s,
+                }
+            )
+        (bodies_dir / body_file).write_bytes(gzip.compress(content))
+        return response
+
+    try:
+        with patch.object(HTTPAdapter, 'send', recording_send):
+            yield
+    finally:
+        (directory / 'http.json').write_text(json.dumps(exchanges, indent=2))
+        log.info(f'Recorded {len(exchanges)} HTTP exchanges to {directory}')
+
+
+@contextmanager
+def replay_http(directory: Path, latency: LatencyModel = LatencyModel()) -> Iterator[responses.RequestsMock]:
+    """Serve the responses recorded in `directory` to `requests`, delayed according to the `latency`.
+
+    Requests are matched by method, URL and body. Repeated identical requests get the recorded responses in order, the
+    last one is served again once they are used up.
+    """
+    exchanges: dict[str, deque] = defaultdict(deque)
+    for exchange in json.loads((directory / 'http.json').read_text()):
+        exchanges[exchange['key']].append(exchange)
+    lock = threading.Lock()
+
+    def callback(request: requests.PreparedRequest) -> tuple[int, dict, bytes]:
+        key = request_key(request.method, request.url, request.body)
+        with lock:
+            recorded = exchanges.get(key)
+            if not recorded:
+                raise requests.ConnectionError(f'No recorded response for {request.method} {request.url}')
+            exchange = recorded.popleft() if len(recorded) > 1 else recorded[0]
+
+        body = gzip.decompress((directory / 'http' / exchange['body_file']).read_bytes())
+        time.sleep(latency.delay(len(body), exchange['elapsed_s']))
+        headers = {'Content-Type': exchange['content_type']} if exchange['content_type'] else {}
+        return exchange['status'], headers, body
+
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as mock:
+        for method in HTTP_METHODS:
+            mock.add_callback(method, re.compile(r'.*'), callback=callback)
+        yield mock
+
+
+def fingerprint_frame(frame: gpd.GeoDataFrame) -> str:
+    content = shapely.to_wkb(frame.geometry.values).tolist() + list(map(str, frame.index))
+    return hashlib.sha1(b''.join(part if isinstance(part, bytes) else part.encode() for part in content)).hexdigest()
+
+
+def _split_target(target: str) -> tuple[Any, str]:
+    module_name, function_name = target.rsplit('.', 1)
+    return import_module(module_name), function_name
+
+
+@contextmanager
+def record_function(target: str, directory: Path) -> Iterator[None]:
+    """Record the outputs of the function at the import path `target`, keyed by its first (data frame) argument."""
+    module, function_name = _split_target(target)
+    function = getattr(module, function_name)
+    functions_dir = directory / 'functions'
+    functions_dir.mkdir(parents=True, exist_ok=True)
+
+    def recording_function(frame: gpd.GeoDataFrame, *args, **kwargs) -> Any:
+        start = time.perf_counter()
+        output = function(frame, *args, **kwargs)
+        elapsed_s = time.perf_counter() - start
+        output_file = functions_dir / f'{function_name}-{fingerprint_frame(frame)}.pickle'
+        output_file.write_bytes(pickle.dumps({'output': output, 'elapsed_s': elapsed_s}))
+        return output
+
+    with patch.object(module, function_name, recording_function):
+        yield
+
+
+@contextmanager
+def replay_function(target: str, directory: Path, latency: LatencyModel = LatencyModel()) -> Iterator[None]:
+    """Serve the outputs recorded by `record_function`, delayed by the `latency` of their pickled size."""
+    module, function_name = _split_target(target)
+
+    def replayed_function(frame: gpd.GeoDataFrame, *args, **kwargs) -> Any:
+        output_file = directory / 'functions' / f'{function_name}-{fingerprint_frame(frame)}.pickle'
+        if not output_file.exists():
+            raise KeyError(f'No recorded output of {function_name} for these inputs')
+        content = output_file.read_bytes()
+        recorded = pickle.loads(content)
+        time.sleep(latency.delay(len(content), recorded['elapsed_s']))
+        return recorded['output']
+
+    with patch.object(module, function_name, replayed_function):
+        yield
+
+
+def _public_settings(settings: BaseModel) -> dict:
+    """Dump settings for a recording, masking secrets, which are not needed to replay."""
+    return {
+        key: '***' if any(secret in key for secret in ('key', 'secret', 'password')) and value else value
+        for key, value in settings.model_dump(mode='json').items()
+    }
+
+
+def run_compute(recording: dict, metrics_dir: Path, sequential: bool = False) -> float:
+    """Run `compute` for the recorded request without any cache and return its wall time."""
+    operator = OperatorBikeability(
+        NaturalnessUtility(base_url=recording['naturalness_base_url']),
+        ORSSettings.model_validate(recording['ors_settings']),
+        S3Settings.model_validate(recording['s3_settings']),
+        metrics_dir=metrics_dir,
+    )
+    params = ComputeInputBikeability.model_validate(recording['params'])
+    aoi = shapely.from_geojson(recording['aoi'])
+
+    start = time.perf_counter()
+    with ComputationScope(uuid.uuid4()) as resources:
+        if sequential:
+            operator.compute_artifacts(resources, aoi, AoiProperties(name='replay', id='replay'), params, True)
+        else:
+            operator.compute(
+                resources=resources, aoi=aoi, aoi_properties=AoiProperties(name='replay', id='replay'), params=params
+            )
+    return time.perf_counter() - start
+
+
+def record(args: argparse.Namespace) -> int:
+    settings = Settings()
+    aoi = shapely.MultiPolygon(
+        shapely.get_parts(shapely.union_all(gpd.read_file(args.aoi).to_crs('EPSG:4326').geometry.values))
+    )
+    recording = {
+        'aoi': shapely.to_geojson(aoi),
+        'params': {'optional_indicators': args.indicator},
+        'naturalness_base_url': (
+            f'http://{settings.naturalness_host}:{settings.naturalness_port}{settings.naturalness_path}'
+        ),
+        'ors_settings': _public_settings(ORSSettings()),
+        's3_settings': _public_settings(S3Settings()),
+    }
+    args.output.mkdir(parents=True, exist_ok=True)
+    (args.output / 'recording.json').write_text(json.dumps(recording, indent=2))
+
+    with record_http(args.output), record_function(SLOPES_FUNCTION, args.output):
+        wall_time = run_compute(recording, metrics_dir=args.output / 'metrics')
+    log.info(f'Recorded computation took {wall_time:.2f}s')
+    return 0
+
+
+def replay(args: argparse.Namespace) -> int:
+    recording = json.loads((args.recording / 'recording.json').read_text())
+    latency = LatencyModel(
+        round_trip_s=args.round_trip_ms / 1000,
+        bandwidth_bytes_per_s=args.bandwidth_mbps * 1e6 / 8 if args.bandwidth_mbps else None,
+        use_recorded=args.recorded_latency,
+    )
+
+    runs = []
+    with (
+        tempfile.TemporaryDirectory() as metrics_dir,
+        replay_http(args.recording, latency),
+        replay_function(SLOPES_FUNCTION, args.recording, latency),
+    ):
+        for _ in range(args.repeat):
+            run_metrics_dir = Path(metrics_dir) / str(len(runs))
+            wall_time = run_compute(recording, run_metrics_dir, sequential=args.sequential)
+            stage_metrics = [json.loads(path.read_text()) for path in run_metrics_dir.glob('*.json')]
+            runs.append({'wall_time_s': wall_time, 'stages': stage_metrics[0]['stages'] if stage_metrics else []})
+            log.info(f'Replayed computation took {wall_time:.2f}s')
+
+    report = {
+        'recording': str(args.recording),
+        'latency': latency.model_dump(),
+        'sequential': args.sequential,
+        'median_wall_time_s': statistics.median(run['wall_time_s'] for run in runs),
+        'runs': runs,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(output)
+    else:
+        print(output)
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(required=True)
+
+    record_parser = subparsers.add_parser('record', help='Run a computation against the live services and record it')
+    record_parser.add_argument('--aoi', type=Path, required=True, help='Vector file with the area of interest')
+    record_parser.add_argument('--indicator', action='append', default=[], help='Optional indicator to compute')
+    record_parser.add_argument('--output', type=Path, required=True, help='Directory to record to')
+    record_parser.set_defaults(func=record)
+
+    replay_parser = subparsers.add_parser('replay', help='Benchmark a recorded computation offline')
+    replay_parser.add_argument('recording', type=Path, help='Directory of the recording')
+    replay_parser.add_argument('--round-trip-ms', type=float, default=0.0, help='Latency added to every response')
+    replay_parser.add_argument('--bandwidth-mbps', type=float, help='Bandwidth to transfer response bodies at')
+    replay_parser.add_argument('--recorded-latency', action='store_true', help='Replay the recorded latencies')
+    replay_parser.add_argument('--sequential', action='store_true', help='Run the pipeline stages sequentially')
+    replay_parser.add_argument('--repeat', type=int, default=3)
+    replay_parser.add_argument('--output', type=Path, help='JSON file to write the results to, default stdout')
+    replay_parser.set_defaults(func=replay)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
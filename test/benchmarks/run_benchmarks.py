@@ -0,0 +1,250 @@
+"""Time the components on synthetic cities of increasing size.
+
+Run with `python -m test.benchmarks.run_benchmarks --output benchmark.json`. Pass the output of an earlier run as
+`--baseline` to report throughput regressions.
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+import shapely
+from climatoology.base.computation import ComputationScope
+
+from bikeability.components.dooring_risk.dooring_artifacts import build_dooring_artifact, summarise_dooring_risk
+from bikeability.components.dooring_risk.dooring_risk import find_paths_near_parking, get_dooring_risk
+from bikeability.components.overview import aggregate_to_hexgrid, category_share, get_overview_hexgrid
+from bikeability.components.path_sharing.path_sharing import PathSharing, categorize_paths
+from bikeability.components.path_sharing.path_sharing_artifacts import build_path_sharing_artifact
+from bikeability.components.path_sharing.path_summaries import (
+    build_aoi_summary_category_stacked_bar_artifact,
+    summarise_aoi,
+)
+from bikeability.components.shared_paths import build_shared_paths_artifact
+from bikeability.components.slope.slope_analysis import build_slope_artifact, merge_similar_slopes
+from bikeability.components.smoothness.smoothness import get_smoothness
+from bikeability.components.smoothness.smoothness_artifacts import build_smoothness_artifact
+from bikeability.components.surface_types.surface_types import get_surface_types
+from bikeability.components.surface_types.surface_types_artifacts import build_surface_types_artifact
+from bikeability.components.utils.path_index import PathIndex
+from bikeability.components.utils.sanitation import sanitize_paths
+from bikeability.components.utils.summaries import SummaryEngine
+from bikeability.components.utils.utils import dissolve_paths, geodesic_lengths, hilbert_sort
+from test.benchmarks.synthetic_city import generate_parking, generate_paths, generate_slopes
+
+log = logging.getLogger(__name__)
+
+DEFAULT_SIZES = (10_000, 100_000, 500_000)
+
+
+def time_call(func: Callable[[], Any], repeat: int) -> tuple[list[float], Any]:
+    timings, output = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = func()
+        timings.append(time.perf_counter() - start)
+    return timings, output
+
+
+def benchmark_size(n_ways: int, repeat: int, seed: int, hilbert_order: bool = False) -> tuple[list[dict], list[dict]]:
+    """Time the components on a synthetic city of `n_ways` and measure the size of the artifact files they write."""
+    results = []
+
+    def run(component: str, func: Callable[[], Any], rows_in: int) -> Any:
+        timings, output = time_call(func, repeat)
+        best = min(timings)
+        results.append(
+            {
+                'component': component,
+                'n_ways': n_ways,
+                'rows_in': rows_in,
+                'repeat': repeat,
+                'best_s': best,
+                'median_s': statistics.median(timings),
+                'rows_per_s': rows_in / best if best > 0 else None,
+            }
+        )
+        log.info(f'{component} on {n_ways} ways: {best:.3f}s')
+        return output
+
+    paths = generate_paths(n_ways, seed=seed)
+    parking = generate_parking(paths, seed=seed)
+    slopes = generate_slopes(paths, seed=seed)
+    hexgrid = get_overview_hexgrid(shapely.MultiPolygon([shapely.box(*paths.total_bounds)]))
+    is_polygon = paths.geom_type == 'Polygon'
+    run('sanitize_paths', lambda: sanitize_paths(paths[~is_polygon], paths[is_polygon]), len(paths))
+    if hilbert_order:
+        paths = run('hilbert_sort', lambda: hilbert_sort(paths), len(paths))
+
+    with ComputationScope(uuid.uuid4()) as resources:
+        categorized = run('categorize_paths', lambda: categorize_paths(paths.copy(deep=False)), len(paths))
+        smoothness_paths = run('get_smoothness', lambda: get_smoothness(categorized), len(categorized))
+        surface_type_paths = run(
+            'get_surface_types', lambda: get_surface_types(categorized.copy(deep=False)), len(categorized)
+        )
+        path_index = run('path_index', lambda: PathIndex(categorized), len(categorized))
+        run('find_paths_near_parking', lambda: find_paths_near_parking(path_index, parking), len(parking))
+        dooring_risk_paths = run(
+            'get_dooring_risk',
+            lambda: get_dooring_risk(categorized, parking, path_index),
+            len(categorized) + len(parking),
+        )
+        summary_engine = run('summary_engine', lambda: SummaryEngine(categorized), len(categorized))
+        summary = run('summarise_aoi', lambda: summarise_aoi(summary_engine), len(categorized))
+        run(
+            'summarise_dooring_risk',
+            lambda: summarise_dooring_risk(summary_engine, dooring_risk_paths),
+            len(dooring_risk_paths),
+        )
+        merged_slopes = run('merge_similar_slopes', lambda: merge_similar_slopes(slopes), len(slopes))
+
+        run('geodesic_lengths', lambda: geodesic_lengths(categorized.geometry.to_numpy()), len(categorized))
+        run('dissolve_paths', lambda: dissolve_paths(categorized, 'path_sharing'), len(categorized))
+        run(
+            'aggregate_to_hexgrid',
+            lambda: aggregate_to_hexgrid(
+                categorized, category_share(categorized.path_sharing, {PathSharing.EXCLUSIVE}), hexgrid
+            ),
+            len(categorized),
+        )
+        run(
+            'build_path_sharing_artifact',
+            lambda: build_path_sharing_artifact(categorized.copy(deep=False), resources),
+            len(categorized),
+        )
+        run(
+            'build_smoothness_artifact',
+            lambda: build_smoothness_artifact(smoothness_paths.copy(deep=False), resources),
+            len(smoothness_paths),
+        )
+        run(
+            'build_surface_types_artifact',
+            lambda: build_surface_types_artifact(surface_type_paths.copy(deep=False), resources),
+            len(surface_type_paths),
+        )
+        run(
+            'build_dooring_artifact',
+            lambda: build_dooring_artifact(dooring_risk_paths.copy(deep=False), resources),
+            len(dooring_risk_paths),
+        )
+        run(
+            'build_shared_paths_artifact',
+            lambda: build_shared_paths_artifact(
+                categorized.copy(deep=False),
+                smoothness_paths.copy(deep=False),
+                surface_type_paths.copy(deep=False),
+                dooring_risk_paths.copy(deep=False),
+                resources,
+            ),
+            len(categorized),
+        )
+        run(
+            'build_aoi_summary_category_stacked_bar_artifact',
+            lambda: build_aoi_summary_category_stacked_bar_artifact(summary, resources),
+            len(categorized),
+        )
+        run(
+            'build_slope_artifact',
+            lambda: build_slope_artifact(path_slopes_data=merged_slopes.copy(deep=False), resources=resources),
+            len(merged_slopes),
+        )
+        sizes = artifact_sizes(resources.computation_dir, n_ways)
+
+    return results, sizes
+
+
+def artifact_sizes(directory: Path, n_ways: int) -> list[dict]:
+    """Raw and gzip compressed size of each artifact file, as served to clients."""
+    sizes = []
+    for file in sorted(path for path in directory.iterdir() if path.is_file()):
+        content = file.read_bytes()
+        sizes.append(
+            {
+                'file': file.name,
+                'n_ways': n_ways,
+                'bytes': len(content),
+                'gzip_bytes': len(gzip.compress(content)),
+            }
+        )
+    return sizes
+
+
+def compare_to_baseline(results: list[dict], baseline: dict, tolerance: float) -> list[dict]:
+    """Benchmarks whose throughput dropped by more than `tolerance` (a fraction) compared to the baseline."""
+    baseline_results = {(result['component'], result['n_ways']): result for result in baseline['results']}
+    regressions = []
+    for result in results:
+        previous = baseline_results.get((result['component'], result['n_ways']))
+        if previous is None or not previous['rows_per_s'] or not result['rows_per_s']:
+            continue
+        change = result['rows_per_s'] / previous['rows_per_s'] - 1
+        if change < -tolerance:
+            regressions.append({**result, 'baseline_rows_per_s': previous['rows_per_s'], 'change': change})
+    return regressions
+
+
+def get_metadata(seed: int) -> dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'commit': commit.strip() if commit else None,
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'seed': seed,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='Number of ways per city')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per benchmark, the best one is reported')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument(
+        '--hilbert-order', action='store_true', help='Sort the paths along a Hilbert curve first, like HILBERT_ORDER'
+    )
+    parser.add_argument('--output', type=Path, help='JSON file to write the results to, default stdout')
+    parser.add_argument('--baseline', type=Path, help='Results of an earlier run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Accepted relative throughput loss')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+
+    results, sizes = [], []
+    for n_ways in args.sizes:
+        size_results, size_artifacts = benchmark_size(n_ways, args.repeat, args.seed, args.hilbert_order)
+        results.extend(size_results)
+        sizes.extend(size_artifacts)
+    metadata = {**get_metadata(args.seed), 'hilbert_order': args.hilbert_order}
+    report = {'metadata': metadata, 'results': results, 'artifact_sizes': sizes}
+
+    regressions = []
+    if args.baseline:
+        regressions = compare_to_baseline(results, json.loads(args.baseline.read_text()), args.tolerance)
+        report['regressions'] = regressions
+        for regression in regressions:
+            log.warning(
+                f'{regression["component"]} on {regression["n_ways"]} ways is {-regression["change"]:.0%} slower'
+            )
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(output)
+    else:
+        print(output)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""Deterministic synthetic OSM paths shaped like the output of `OperatorBikeability.get_paths`.
+
+Tag values are drawn from distributions roughly matching a central European city, so that every category of the
+components is populated at realistic proportions.
+"""
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+CITY_CENTRE = (8.69, 49.41)
+WAY_SPACING_M = 100
+METRES_PER_DEGREE = 111_320
+POLYGON_SHARE = 0.05
+PARKING_SHARE = 0.05
+
+# (value, probability), None for an absent tag
+HIGHWAY_VALUES = [
+    ('residential', 0.28),
+    ('service', 0.15),
+    ('footway', 0.15),
+    ('tertiary', 0.06),
+    ('track', 0.06),
+    ('secondary', 0.05),
+    ('path', 0.05),
+    ('cycleway', 0.05),
+    ('unclassified', 0.04),
+    ('primary', 0.03),
+    ('living_street', 0.02),
+    ('pedestrian', 0.02),
+    ('steps', 0.02),
+    ('motorway', 0.02),
+]
+BICYCLE_VALUES = [
+    (None, 0.80),
+    ('yes', 0.08),
+    ('designated', 0.06),
+    ('no', 0.03),
+    ('dismount', 0.02),
+    ('use_sidepath', 0.01),
+]
+FOOT_VALUES = [(None, 0.85), ('designated', 0.1), ('yes', 0.05)]
+MAXSPEED_VALUES = [(None, 0.50), ('30', 0.20), ('50', 0.18), ('70', 0.05), ('20', 0.03), ('walk', 0.02), ('100', 0.02)]
+SURFACE_VALUES = [
+    (None, 0.30),
+    ('asphalt', 0.40),
+    ('paving_stones', 0.08),
+    ('compacted', 0.05),
+    ('sett', 0.04),
+    ('concrete', 0.04),
+    ('gravel', 0.04),
+    ('fine_gravel', 0.03),
+    ('ground', 0.02),
+]
+SMOOTHNESS_VALUES = [
+    (None, 0.70),
+    ('good', 0.13),
+    ('intermediate', 0.07),
+    ('excellent', 0.05),
+    ('bad', 0.03),
+    ('very_bad', 0.01),
+    ('horrible', 0.01),
+]
+PARKING_VALUES = [
+    (None, 0.70),
+    ({'parking:both': 'no'}, 0.10),
+    ({'parking:both': 'lane', 'parking:both:orientation': 'parallel'}, 0.10),
+    ({'parking:both': 'lane', 'parking:both:orientation': 'diagonal'}, 0.05),
+    ({'parking:right': 'lane', 'parking:right:orientation': 'parallel', 'parking:left': 'no'}, 0.05),
+]
+
+
+def _draw(rng: np.random.Generator, values: list[tuple], size: int) -> list:
+    options, probabilities = zip(*values)
+    probabilities = np.asarray(probabilities) / np.sum(probabilities)
+    return [options[i] for i in rng.choice(len(options), size=size, p=probabilities)]
+
+
+def _metres_to_degrees(dx: np.ndarray, dy: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    return dx / (METRES_PER_DEGREE * np.cos(np.radians(CITY_CENTRE[1]))), dy / METRES_PER_DEGREE
+
+
+def generate_tags(n_ways: int, rng: np.random.Generator) -> list[dict]:
+    columns = {
+        'highway': _draw(rng, HIGHWAY_VALUES, n_ways),
+        'bicycle': _draw(rng, BICYCLE_VALUES, n_ways),
+        'foot': _draw(rng, FOOT_VALUES, n_ways),
+        'maxspeed': _draw(rng, MAXSPEED_VALUES, n_ways),
+        'surface': _draw(rng, SURFACE_VALUES, n_ways),
+        'smoothness': _draw(rng, SMOOTHNESS_VALUES, n_ways),
+    }
+    parking = _draw(rng, PARKING_VALUES, n_ways)
+
+    tags = []
+    for i in range(n_ways):
+        way_tags = {key: values[i] for key, values in columns.items() if values[i] is not None}
+        if parking[i] is not None:
+            way_tags.update(parking[i])
+        tags.append(way_tags)
+    return tags
+
+
+def generate_geometries(n_ways: int, rng: np.random.Generator) -> list[shapely.Geometry]:
+    """Short axis-aligned polylines of 2 to 4 vertices on a square city, plus a share of pedestrian area polygons."""
+    city_side_m = np.sqrt(n_ways) * WAY_SPACING_M
+    start_x, start_y = _metres_to_degrees(*rng.uniform(-city_side_m / 2, city_side_m / 2, size=(2, n_ways)))
+    start_x, start_y = start_x + CITY_CENTRE[0], start_y + CITY_CENTRE[1]
+
+    vertex_counts = rng.integers(2, 5, size=n_ways)
+    step_lengths = rng.uniform(20, 80, size=(n_ways, 3))
+    horizontal = rng.random(size=(n_ways, 3)) < 0.5
+    step_x, step_y = _metres_to_degrees(
+        np.where(horizontal, step_lengths, 0.0) * rng.choice([-1, 1], size=(n_ways, 3)),
+        np.where(horizontal, 0.0, step_lengths) * rng.choice([-1, 1], size=(n_ways, 3)),
+    )
+    is_polygon = rng.random(n_ways) < POLYGON_SHARE
+    polygon_side_x, polygon_side_y = _metres_to_degrees(rng.uniform(10, 40, n_ways), rng.uniform(10, 40, n_ways))
+
+    geometries = []
+    for i in range(n_ways):
+        if is_polygon[i]:
+            geometries.append(
+                shapely.box(start_x[i], start_y[i], start_x[i] + polygon_side_x[i], start_y[i] + polygon_side_y[i])
+            )
+            continue
+        xs = start_x[i] + np.concatenate([[0.0], np.cumsum(step_x[i, : vertex_counts[i] - 1])])
+        ys = start_y[i] + np.concatenate([[0.0], np.cumsum(step_y[i, : vertex_counts[i] - 1])])
+        geometries.append(shapely.LineString(np.column_stack([xs, ys])))
+    return geometries
+
+
+def generate_paths(n_ways: int, seed: int = 0) -> gpd.GeoDataFrame:
+    """Synthetic paths with the columns returned by `OperatorBikeability.get_paths`."""
+    rng = np.random.default_rng(seed)
+    return gpd.GeoDataFrame(
+        data={
+            '@osmId': [f'way/{i}' for i in range(n_ways)],
+            '@other_tags': generate_tags(n_ways, rng),
+        },
+        geometry=generate_geometries(n_ways, rng),
+        crs='EPSG:4326',
+    )
+
+
+def generate_parking(paths: gpd.GeoDataFrame, seed: int = 0) -> gpd.GeoDataFrame:
+    """Parallel street side parking polygons a few metres next to a share of the line paths."""
+    rng = np.random.default_rng(seed + 1)
+    line_paths = paths[paths.geom_type == 'LineString']
+    parked = line_paths.sample(frac=PARKING_SHARE, random_state=rng)
+
+    offset_x, offset_y = _metres_to_degrees(np.full(len(parked), 4.0), np.full(len(parked), 4.0))
+    centroids = shapely.centroid(parked.geometry.values)
+    x, y = shapely.get_x(centroids) + offset_x, shapely.get_y(centroids) + offset_y
+    half_x, half_y = _metres_to_degrees(np.full(len(parked), 5.0), np.full(len(parked), 1.5))
+
+    return gpd.GeoDataFrame(
+        data={
+            '@osmId': [f'way/{i}' for i in range(len(paths), len(paths) + len(parked))],
+            '@other_tags': [
+                {'amenity': 'parking', 'orientation': 'parallel', 'parking': 'street_side'} for _ in range(len(parked))
+            ],
+        },
+        geometry=shapely.box(x - half_x, y - half_y, x + half_x, y + half_y),
+        crs='EPSG:4326',
+    )
+
+
+def generate_slopes(paths: gpd.GeoDataFrame, seed: int = 0) -> gpd.GeoDataFrame:
+    """Per-segment slopes of the line paths, like the output of `get_paths_slopes` (absolute values)."""
+    rng = np.random.default_rng(seed + 2)
+    line_paths = paths[paths.geom_type == 'LineString']
+    coordinates, way_positions = shapely.get_coordinates(line_paths.geometry.values, return_index=True)
+
+    same_way = way_positions[:-1] == way_positions[1:]
+    segment_ways = way_positions[:-1][same_way]
+    segments = shapely.linestrings(
+        np.stack([coordinates[:-1][same_way], coordinates[1:][same_way]], axis=1),
+    )
+    base_slopes = rng.gamma(shape=1.5, scale=1.5, size=len(line_paths))
+    slopes = np.abs(base_slopes[segment_ways] + rng.normal(scale=0.8, size=len(segment_ways)))
+
+    segment_ids = pd.Series(segment_ways).groupby(segment_ways).cumcount().to_numpy()
+    return gpd.GeoDataFrame(
+        data={
+            '@osmId': line_paths['@osmId'].to_numpy()[segment_ways],
+            'segment_id': segment_ids,
+            'segment_length': shapely.length(segments) * METRES_PER_DEGREE,
+            'slope': slopes,
+        },
+        geometry=segments,
+        crs='EPSG:4326',
+    )
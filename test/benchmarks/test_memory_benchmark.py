@@ -0,0 +1,34 @@
+import pytest
+
+from test.benchmarks.memory_benchmark import AllocationRecorder, build_report, fit_bytes_per_path
+
+
+def test_fit_bytes_per_path():
+    fit = fit_bytes_per_path([1000, 2000, 4000], [1_500_000, 2_500_000, 4_500_000])
+
+    assert fit['bytes_per_path'] == pytest.approx(1000)
+    assert fit['fixed_bytes'] == pytest.approx(500_000)
+
+
+def test_build_report_max_paths_within_budget():
+    runs = [
+        {'n_paths': n, 'traced': False, 'peak_rss_bytes': 100_000_000 + 2000 * n, 'stages': []} for n in (1000, 2000)
+    ] + [
+        {'n_paths': n, 'traced': True, 'stages': [{'stage': 'paths', 'peak_memory_delta_bytes': 500 * n}]}
+        for n in (1000, 2000)
+    ]
+
+    report = build_report(runs, memory_budget_bytes=300_000_000)
+
+    assert report['peak_rss']['bytes_per_path'] == pytest.approx(2000)
+    assert report['stages']['paths']['bytes_per_path'] == pytest.approx(500)
+    assert report['max_paths_within_budget'] == pytest.approx(100_000, abs=1)
+
+
+def test_allocation_recorder_keeps_top_allocators():
+    with AllocationRecorder(top=3) as recorder:
+        recorder.measure('allocate', lambda: [bytearray(1024) for _ in range(1000)])
+
+    assert len(recorder.top_allocators['allocate']) <= 3
+    assert recorder.top_allocators['allocate'][0]['size_diff_bytes'] > 1024 * 1000
+    assert recorder.report().stages[0].peak_memory_delta_bytes > 0
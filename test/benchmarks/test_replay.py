@@ -0,0 +1,84 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import geopandas as gpd
+import pytest
+import requests
+import shapely
+
+from test.benchmarks.replay import LatencyModel, record_function, record_http, replay_function, replay_http
+
+
+@pytest.fixture
+def echo_server():
+    class Handler(BaseHTTPRequestHandler):
+        count = 0
+
+        def do_POST(self):
+            Handler.count += 1
+            request_body = self.rfile.read(int(self.headers['Content-Length']))
+            body = request_body + f' {Handler.count}'.encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_port}/'
+    server.shutdown()
+
+
+def test_replay_http(echo_server, tmp_path):
+    with record_http(tmp_path):
+        requests.post(echo_server, data=b'line')
+        requests.post(echo_server, data=b'polygon')
+        requests.post(echo_server, data=b'line')
+
+    with replay_http(tmp_path, LatencyModel(round_trip_s=0.05)):
+        start = time.perf_counter()
+        line = requests.post(echo_server, data=b'line')
+        elapsed = time.perf_counter() - start
+        polygon = requests.post(echo_server, data=b'polygon')
+        repeated_line = requests.post(echo_server, data=b'line')
+        reused_line = requests.post(echo_server, data=b'line')
+
+        with pytest.raises(requests.ConnectionError, match='No recorded response'):
+            requests.post(echo_server, data=b'point')
+
+    assert elapsed >= 0.05
+    assert line.text == 'line 1'
+    assert line.headers['Content-Type'] == 'text/plain'
+    assert polygon.text == 'polygon 2'
+    assert repeated_line.text == 'line 3'
+    assert reused_line.text == 'line 3'
+
+
+def get_slopes(paths: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+    return paths.assign(slope=paths.length)
+
+
+def test_replay_function(tmp_path):
+    paths = gpd.GeoDataFrame(geometry=[shapely.LineString([(0, 0), (0, 1)])])
+    target = f'{__name__}.get_slopes'
+
+    with record_function(target, tmp_path):
+        recorded = get_slopes(paths)
+
+    with replay_function(target, tmp_path):
+        replayed = get_slopes(paths)
+
+        with pytest.raises(KeyError):
+            get_slopes(paths.iloc[:0])
+
+    assert replayed.equals(recorded)
+
+
+def test_latency_model():
+    assert LatencyModel(round_trip_s=0.1, bandwidth_bytes_per_s=1000).delay(500, recorded_s=3.0) == 0.6
+    assert LatencyModel(use_recorded=True).delay(500, recorded_s=3.0) == 3.0
@@ -0,0 +1,28 @@
+from geopandas import testing
+
+from bikeability.components.path_sharing.path_sharing import PathSharing, categorize_paths
+from test.benchmarks.synthetic_city import generate_parking, generate_paths, generate_slopes
+
+
+def test_generate_paths_is_deterministic():
+    testing.assert_geodataframe_equal(generate_paths(100, seed=1), generate_paths(100, seed=1))
+
+
+def test_generate_paths_covers_path_sharing_categories():
+    paths = categorize_paths(generate_paths(5000))
+
+    assert len(paths) == 5000
+    assert paths['@osmId'].is_unique
+    assert set(paths.geom_type) == {'LineString', 'Polygon'}
+    assert set(PathSharing.get_bikeable()) - {PathSharing.UNKNOWN} <= set(paths.path_sharing)
+
+
+def test_generate_parking_and_slopes():
+    paths = generate_paths(1000)
+
+    parking = generate_parking(paths)
+    slopes = generate_slopes(paths)
+
+    assert len(parking) == round(0.05 * (paths.geom_type == 'LineString').sum())
+    assert set(slopes['@osmId']) == set(paths.loc[paths.geom_type == 'LineString', '@osmId'])
+    assert (slopes['slope'] >= 0).all()
@@ -0,0 +1,50 @@
+import matplotlib
+import numpy as np
+import pandas as pd
+from pydantic_extra_types.color import Color
+
+from bikeability.components.path_sharing.path_sharing import PathSharing
+from bikeability.components.smoothness.smoothness import SmoothnessCategory
+from bikeability.components.utils.colors import get_continuous_colors, get_qualitative_color, map_categories
+
+
+def test_get_qualitative_color():
+    cmap = matplotlib.colormaps.get('coolwarm')
+    visible = SmoothnessCategory.get_visible()
+
+    assert get_qualitative_color(visible[0], 'coolwarm') == Color(matplotlib.colors.to_hex(cmap(0.0)))
+    assert get_qualitative_color(visible[1], 'coolwarm') == Color(
+        matplotlib.colors.to_hex(cmap(1 / (len(visible) - 1)))
+    )
+    assert get_qualitative_color(SmoothnessCategory.UNKNOWN, 'coolwarm') == Color('#808080')
+
+
+def test_get_continuous_colors_matches_matplotlib():
+    values = pd.Series([-1.0, 0.0, 0.1234, 2.5, 5.999, 6.0, 7.0, np.nan])
+    cmap = matplotlib.colormaps.get('coolwarm')
+    cmap.set_bad('#808080')
+    expected = [Color(matplotlib.colors.to_hex(color)) for color in cmap(matplotlib.colors.Normalize(0, 6)(values))]
+
+    assert get_continuous_colors(values, 'coolwarm', vmin=0, vmax=6) == expected
+
+
+def test_map_categories():
+    categories = pd.Series(
+        [PathSharing.EXCLUSIVE, None, PathSharing.EXCLUSIVE, PathSharing.NO_ACCESS], index=[3, 2, 1, 0]
+    )
+
+    labels = map_categories(categories, lambda category: category.value)
+
+    pd.testing.assert_series_equal(
+        labels,
+        pd.Series(
+            [PathSharing.EXCLUSIVE.value, None, PathSharing.EXCLUSIVE.value, PathSharing.NO_ACCESS.value],
+            index=[3, 2, 1, 0],
+        ),
+    )
+
+
+def test_map_categories_with_categorical_dtype():
+    categories = pd.Series(pd.Categorical(['a', 'b', None, 'a']))
+
+    pd.testing.assert_series_equal(map_categories(categories, str.upper), pd.Series(['A', 'B', None, 'A']))
@@ -0,0 +1,96 @@
+import geopandas as gpd
+import pytest
+import shapely
+
+from bikeability.components.detour_factors.detour_cache import (
+    FINGERPRINT_BUFFER_M,
+    DetourFactorCache,
+    fingerprint_cells,
+    get_cached_detour_factors,
+)
+from bikeability.components.detour_factors.hexgrid import get_hexgrid
+
+
+@pytest.fixture
+def small_aoi() -> shapely.MultiPolygon:
+    return shapely.MultiPolygon([shapely.box(12.298, 48.218, 12.304, 48.224)])
+
+
+class DetourFactorsMock:
+    def __init__(self):
+        self.requested_cells = []
+
+    def __call__(self, aoi: shapely.MultiPolygon) -> gpd.GeoDataFrame:
+        hexgrid = get_hexgrid(aoi)
+        self.requested_cells.append(set(hexgrid.index))
+        hexgrid['detour_factor'] = 1.5
+        return hexgrid
+
+
+def test_fingerprint_cells_changes_with_paths(small_aoi, test_line):
+    hexgrid = get_hexgrid(small_aoi)
+    fingerprints = fingerprint_cells(hexgrid, test_line)
+
+    changed_paths = test_line.copy()
+    changed_paths.loc[0, 'geometry'] = shapely.LineString([(12.3, 48.22), (12.3, 48.2201)])
+    changed_fingerprints = fingerprint_cells(hexgrid, changed_paths)
+
+    utm_crs = hexgrid.estimate_utm_crs()
+    distances = hexgrid.to_crs(utm_crs).distance(test_line.to_crs(utm_crs).geometry.iloc[0])
+    near_cells = hexgrid.index[distances <= FINGERPRINT_BUFFER_M]
+    touched_cells = hexgrid.index[hexgrid.intersects(test_line.geometry.iloc[0])]
+    assert (fingerprints.drop(near_cells) == changed_fingerprints.drop(near_cells)).all()
+    assert (fingerprints.loc[touched_cells] != changed_fingerprints.loc[touched_cells]).all()
+
+
+def test_fingerprint_cells_changes_with_neighbouring_paths(small_aoi, test_line):
+    hexgrid = get_hexgrid(small_aoi)
+    path_cell = hexgrid.index[hexgrid.intersects(test_line.geometry.iloc[0])][0]
+    utm_crs = hexgrid.estimate_utm_crs()
+    distances = hexgrid.to_crs(utm_crs).distance(test_line.to_crs(utm_crs).geometry.iloc[0])
+    neighbour_cell = distances[(distances > 0) & (distances <= FINGERPRINT_BUFFER_M / 2)].index[0]
+
+    fingerprints = fingerprint_cells(hexgrid, test_line)
+    changed_fingerprints = fingerprint_cells(hexgrid, test_line.iloc[1:])
+
+    assert path_cell != neighbour_cell
+    assert fingerprints.loc[neighbour_cell] != changed_fingerprints.loc[neighbour_cell]
+
+
+def test_get_cached_detour_factors_reuses_cells(small_aoi, test_line):
+    cache = DetourFactorCache()
+    compute_mock = DetourFactorsMock()
+
+    first = get_cached_detour_factors(get_hexgrid(small_aoi), test_line, cache, 'cycling-regular', compute_mock)
+    second = get_cached_detour_factors(get_hexgrid(small_aoi), test_line, cache, 'cycling-regular', compute_mock)
+
+    assert len(compute_mock.requested_cells) == 1
+    assert set(first.index) == set(second.index)
+    assert (second['detour_factor'] == 1.5).all()
+
+
+def test_get_cached_detour_factors_recomputes_changed_cells(small_aoi, test_line):
+    cache = DetourFactorCache()
+    compute_mock = DetourFactorsMock()
+    get_cached_detour_factors(get_hexgrid(small_aoi), test_line, cache, 'cycling-regular', compute_mock)
+
+    changed_paths = test_line.copy()
+    changed_paths.loc[0, 'geometry'] = shapely.LineString([(12.3, 48.22), (12.3, 48.2201)])
+    get_cached_detour_factors(get_hexgrid(small_aoi), changed_paths, cache, 'cycling-regular', compute_mock)
+
+    all_cells = set(get_hexgrid(small_aoi).index)
+    assert compute_mock.requested_cells[0] == all_cells
+    assert 0 < len(compute_mock.requested_cells[1]) < len(all_cells)
+
+
+def test_detour_factor_cache_persists(small_aoi, test_line, tmp_path):
+    get_cached_detour_factors(
+        get_hexgrid(small_aoi), test_line, DetourFactorCache(tmp_path), 'cycling-regular', DetourFactorsMock()
+    )
+
+    compute_mock = DetourFactorsMock()
+    get_cached_detour_factors(
+        get_hexgrid(small_aoi), test_line, DetourFactorCache(tmp_path), 'cycling-regular', compute_mock
+    )
+
+    assert compute_mock.requested_cells == []
@@ -5,6 +5,7 @@ import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 import pytest
+import shapely
 from climatoology.base.artifact import Artifact
 from climatoology.base.exception import ClimatoologyUserError
 from mobility_tools.utils.exceptions import SizeLimitExceededError
@@ -17,6 +18,9 @@ from bikeability.components.detour_factors.detour_analysis import (
     detour_factor_analysis,
     summarise_detour,
 )
+from bikeability.components.detour_factors.detour_cache import DetourFactorCache
+from bikeability.components.detour_factors.detour_engine import DetourEngine
+from bikeability.components.path_sharing.path_sharing import PathSharing
 
 
 def test_build_detour_factor_artifact(default_polygon_geometry, compute_resources):
@@ -43,11 +47,63 @@ def test_detour_factors(default_aoi, default_paths, default_ors_settings, comput
         assert isinstance(artifact, Artifact)
 
 
+def test_detour_factors_only_routes_cells_with_paths(
+    default_aoi, default_paths, default_ors_settings, compute_resources, detour_factor_mock
+):
+    detour_factor_analysis(default_aoi, default_paths, default_ors_settings, compute_resources)
+
+    routed_aoi = detour_factor_mock.call_args.kwargs['aoi']
+    assert routed_aoi.area < default_aoi.area / 100
+    assert routed_aoi.intersects(default_paths.geometry.iloc[1])
+
+
+def test_detour_factors_fail_without_bikeable_paths(
+    default_aoi, test_polygon, default_ors_settings, compute_resources, detour_factor_mock
+):
+    with pytest.raises(ClimatoologyUserError):
+        detour_factor_analysis(default_aoi, test_polygon, default_ors_settings, compute_resources)
+
+    detour_factor_mock.assert_not_called()
+
+
+def test_detour_factors_with_cache(
+    default_aoi, default_paths, default_ors_settings, compute_resources, detour_factor_mock
+):
+    artifacts = detour_factor_analysis(
+        default_aoi, default_paths, default_ors_settings, compute_resources, cache=DetourFactorCache()
+    )
+
+    assert len(artifacts) == 2
+    detour_factor_mock.assert_called_once()
+
+
 def test_detour_factors_fail_without_ors_settings(default_aoi, default_paths, compute_resources):
     with pytest.raises(ClimatoologyUserError):
         detour_factor_analysis(aoi=default_aoi, paths=default_paths, ors_settings=None, resources=compute_resources)
 
 
+def test_detour_factors_local_engine_without_ors_settings(compute_resources):
+    aoi = shapely.MultiPolygon([shapely.box(12.3, 48.22, 12.304, 48.224)])
+    lines = []
+    for step in range(9):
+        lines.append(shapely.LineString([(12.3 + step * 0.0005, 48.22), (12.3 + step * 0.0005, 48.224)]))
+        lines.append(shapely.LineString([(12.3, 48.22 + step * 0.0005), (12.304, 48.22 + step * 0.0005)]))
+    noded_lines = shapely.get_parts(shapely.union_all(lines))
+    paths = gpd.GeoDataFrame(
+        data={'@osmId': [f'way/{i}' for i in range(len(noded_lines))], 'path_sharing': PathSharing.EXCLUSIVE},
+        geometry=noded_lines,
+        crs='EPSG:4326',
+    )
+
+    with patch(
+        'bikeability.components.detour_factors.detour_analysis.summarise_detour', wraps=summarise_detour
+    ) as summarise:
+        artifacts = detour_factor_analysis(aoi, paths, None, compute_resources, engine=DetourEngine.LOCAL)
+
+    assert len(artifacts) == 2
+    assert np.isfinite(summarise.call_args.args[0]['detour_factor']).any()
+
+
 @pytest.fixture
 def detour_factor_mock_fail(expected_detour_factors):
     with patch('bikeability.components.detour_factors.detour_analysis.get_detour_factors') as get_detour_factors:
@@ -108,3 +164,18 @@ def test_summarise_detour_inf(default_polygon_geometry):
 
     assert isinstance(chart, go.Figure)
     np.testing.assert_array_equal(chart['data'][0]['x'], ([0, 3, 6, np.inf]))
+
+
+def test_summarise_detour_without_routable_cells(default_polygon_geometry):
+    input_hexgrid = gpd.GeoDataFrame(
+        data={
+            'detour_factor': [np.inf, np.inf],
+            'geometry': 2 * [default_polygon_geometry],
+        },
+        crs='EPSG:4326',
+    )
+    chart = summarise_detour(hexgrid=input_hexgrid)
+
+    assert isinstance(chart, go.Figure)
+    np.testing.assert_array_equal(chart['data'][0]['x'], ([np.inf, np.inf]))
+    assert chart.layout.annotations[0].text == 'No routable cells'
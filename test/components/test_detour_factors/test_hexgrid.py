@@ -0,0 +1,27 @@
+import shapely
+
+from bikeability.components.detour_factors.hexgrid import cells_to_aoi, get_hexgrid, select_cells_with_paths
+
+
+def test_select_cells_with_paths(test_line):
+    hexgrid = get_hexgrid(shapely.MultiPolygon([shapely.box(12.298, 48.218, 12.304, 48.224)]))
+
+    cells_with_paths = select_cells_with_paths(hexgrid, test_line)
+
+    assert 0 < len(cells_with_paths) < len(hexgrid)
+    assert cells_with_paths.intersects(test_line.geometry.iloc[1]).all()
+
+
+def test_select_cells_ignores_non_bikeable_paths(test_polygon):
+    hexgrid = get_hexgrid(shapely.MultiPolygon([shapely.box(12.298, 48.218, 12.304, 48.224)]))
+
+    assert select_cells_with_paths(hexgrid, test_polygon).empty
+
+
+def test_cells_to_aoi_round_trip():
+    hexgrid = get_hexgrid(shapely.MultiPolygon([shapely.box(12.298, 48.218, 12.304, 48.224)]))
+
+    aoi = cells_to_aoi(hexgrid.iloc[:3])
+
+    assert isinstance(aoi, shapely.MultiPolygon)
+    assert set(get_hexgrid(aoi).index) == set(hexgrid.index[:3])
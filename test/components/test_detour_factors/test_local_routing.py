@@ -0,0 +1,105 @@
+from unittest.mock import patch
+
+import geopandas as gpd
+import numpy as np
+import pytest
+import shapely
+from scipy.sparse.csgraph import dijkstra
+from scipy.spatial import cKDTree
+
+from bikeability.components.detour_factors.local_routing import PathNetwork, get_local_detour_factors
+from bikeability.components.path_sharing.path_sharing import PathSharing
+
+
+@pytest.fixture
+def grid_aoi() -> shapely.MultiPolygon:
+    return shapely.MultiPolygon([shapely.box(12.3, 48.22, 12.31, 48.23)])
+
+
+@pytest.fixture
+def grid_paths() -> gpd.GeoDataFrame:
+    return make_grid_paths(11)
+
+
+def make_grid_paths(steps: int) -> gpd.GeoDataFrame:
+    end = 0.001 * (steps - 1)
+    lines = []
+    for step in range(steps):
+        lines.append(shapely.LineString([(12.3 + step * 0.001, 48.22), (12.3 + step * 0.001, 48.22 + end)]))
+        lines.append(shapely.LineString([(12.3, 48.22 + step * 0.001), (12.3 + end, 48.22 + step * 0.001)]))
+    noded_lines = shapely.get_parts(shapely.union_all(lines))
+
+    return gpd.GeoDataFrame(
+        data={
+            '@osmId': [f'way/{i}' for i in range(len(noded_lines))],
+            'path_sharing': PathSharing.EXCLUSIVE,
+        },
+        geometry=noded_lines,
+        crs='EPSG:4326',
+    )
+
+
+def test_path_network_shares_nodes():
+    paths = gpd.GeoDataFrame(
+        data={'path_sharing': 3 * [PathSharing.EXCLUSIVE]},
+        geometry=[
+            shapely.LineString([(12.3, 48.22), (12.301, 48.22)]),
+            shapely.LineString([(12.301, 48.22), (12.301, 48.221)]),
+            shapely.LineString([(12.3, 48.22), (12.301, 48.22)]),
+        ],
+        crs='EPSG:4326',
+    )
+
+    network = PathNetwork(paths)
+
+    assert network.graph.shape == (3, 3)
+    assert network.graph.nnz == 2
+
+
+def test_path_network_ignores_non_bikeable_paths(test_line):
+    network = PathNetwork(test_line[test_line.path_sharing == PathSharing.NO_ACCESS])
+
+    assert network.graph.shape == (0, 0)
+
+
+def test_get_local_detour_factors(grid_aoi, grid_paths):
+    detour_factors = get_local_detour_factors(grid_aoi, grid_paths)
+
+    reachable = detour_factors.loc[np.isfinite(detour_factors['detour_factor']), 'detour_factor']
+    assert detour_factors.index.name == 'id'
+    assert detour_factors.crs == 'EPSG:4326'
+    assert not reachable.empty
+    assert (reachable >= 1.0).all()
+    assert (reachable < np.sqrt(2) + 0.1).all()
+
+
+def test_get_local_detour_factors_unreachable(grid_aoi, grid_paths):
+    river = shapely.box(12.3045, 48.2, 12.3055, 48.25)
+    split_paths = grid_paths.copy()
+    split_paths['geometry'] = split_paths.difference(river)
+
+    detour_factors = get_local_detour_factors(grid_aoi, grid_paths)
+    split_detour_factors = get_local_detour_factors(grid_aoi, split_paths[~split_paths.is_empty])
+
+    assert np.isinf(split_detour_factors['detour_factor']).sum() > np.isinf(detour_factors['detour_factor']).sum()
+
+
+def test_get_local_detour_factors_without_paths(grid_aoi, grid_paths):
+    detour_factors = get_local_detour_factors(grid_aoi, grid_paths.iloc[:0])
+
+    assert detour_factors.empty
+
+
+def test_network_distances_work_grows_linearly_with_the_network():
+    def routing_work(steps: int) -> int:
+        network = PathNetwork(make_grid_paths(steps))
+        sources = np.arange(network.graph.shape[0])
+        _, neighbours = cKDTree(network.node_coordinates).query(network.node_coordinates, k=2)  # nearest other node
+        with patch('bikeability.components.detour_factors.local_routing.dijkstra', wraps=dijkstra) as routed_dijkstra:
+            distances = network.network_distances(sources, neighbours[:, 1], limit=300)
+        assert (distances < 100).all()
+        # the size of the distance matrix of each Dijkstra run
+        return sum(call.args[0].shape[0] * len(call.kwargs['indices']) for call in routed_dijkstra.call_args_list)
+
+    # routing every source on the whole network would grow the work 16-fold for a four times larger network
+    assert routing_work(81) < 6 * routing_work(41)
@@ -8,14 +8,17 @@ from ohsome import OhsomeClient
 from ohsome_filter_to_sql.main import validate_filter
 from pandas.testing import assert_series_equal
 
+from bikeability.components.dooring_risk.dooring_artifacts import summarise_dooring_risk
 from bikeability.components.dooring_risk.dooring_risk import (
     DooringRiskCategory,
     apply_dooring_filters,
-    find_nearest_parking,
+    find_paths_near_parking,
     get_dooring_risk,
     parallel_parking_filter,
 )
 from bikeability.components.path_sharing.path_sharing import PathSharing
+from bikeability.components.utils.path_index import PathIndex
+from bikeability.components.utils.summaries import SummaryEngine
 from bikeability.components.utils.utils import (
     fetch_osm_data,
 )
@@ -117,7 +120,7 @@ def dooring_test_cases(dooring_risk, dooring_safe, dooring_unknown):
     return pd.concat([dooring_risk, dooring_safe, dooring_unknown])
 
 
-def test_find_nearest_parking(responses_mock, default_aoi, test_resources):
+def test_find_paths_near_parking(responses_mock, default_aoi, test_resources):
     with (
         open(test_resources / 'ohsome_line_response.geojson', 'rb') as line_file,
         open(test_resources / 'ohsome_parking_response.geojson', 'rb') as parking_file,
@@ -126,14 +129,22 @@ def test_find_nearest_parking(responses_mock, default_aoi, test_resources):
         responses_mock.post('https://api.ohsome.org/v1/elements/geometry', body=parking_file.read())
 
     line_paths = fetch_osm_data(default_aoi, 'dummy=yes', OhsomeClient())
-    line_paths = fetch_osm_data(default_aoi, 'dummy=yes', OhsomeClient())
-    line_paths['path_sharing'] = None  # FIXME
     parking_polygons = fetch_osm_data(default_aoi, parallel_parking_filter('polygon'), OhsomeClient())
 
-    line_paths_with_parking = find_nearest_parking(line_paths, parking_polygons)
+    near_parking = find_paths_near_parking(PathIndex(line_paths), parking_polygons)
+
+    assert near_parking.shape == (len(line_paths),)
+    assert near_parking.dtype == bool
+
 
-    assert line_paths_with_parking.columns.to_list() == ['geometry', '@osmId', '@other_tags', 'parking', 'path_sharing']
-    assert line_paths_with_parking.crs.to_epsg() == 4326
+def test_find_paths_near_parking_distance(test_line):
+    parking = gpd.GeoDataFrame(geometry=[shapely.Point(12.2999, 48.22), shapely.Point(13.3, 48.22)], crs='EPSG:4326')
+    far_line = shapely.LineString([(12.31, 48.22), (12.31, 48.2205)])
+    paths = gpd.GeoDataFrame(geometry=[test_line.geometry.iloc[0], far_line], crs='EPSG:4326')
+
+    near_parking = find_paths_near_parking(PathIndex(paths), parking)
+
+    assert near_parking.tolist() == [True, False]
 
 
 @pytest.mark.parametrize(
@@ -180,3 +191,27 @@ def test_get_dooring_risk_missing_geometry_types(test_line, test_polygon, expect
     result = pd.concat([dooring_risk_line_paths, dooring_risk_polygon_paths], ignore_index=True)
 
     verify(result.to_csv())
+
+
+def test_summarise_dooring_risk():
+    line = shapely.LineString([(8.0, 49.0), (8.0, 49.01)])
+    paths = gpd.GeoDataFrame({'@osmId': ['way/1', 'way/2']}, geometry=[line, line], crs='EPSG:4326')
+    # reindexed by the parking join, with a row per parking area near the path
+    dooring_risk_paths = gpd.GeoDataFrame(
+        data={
+            '@osmId': ['way/2', 'way/1', 'way/1'],
+            'dooring_category': [
+                DooringRiskCategory.DOORING_SAFE,
+                DooringRiskCategory.DOORING_RISK,
+                DooringRiskCategory.DOORING_RISK,
+            ],
+        },
+        geometry=[line, line, line],
+        index=[5, 0, 0],
+        crs='EPSG:4326',
+    )
+
+    figure = summarise_dooring_risk(SummaryEngine(paths), dooring_risk_paths)
+
+    assert [trace.name for trace in figure.data] == ['Safe route', 'Risk of dooring']
+    assert [trace.x[0] for trace in figure.data] == pytest.approx([50.0, 50.0])
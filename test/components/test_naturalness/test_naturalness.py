@@ -9,6 +9,7 @@ from plotly.graph_objects import Figure
 from pyproj import CRS
 
 from bikeability.components.naturalness import _preprocess_path_lines, get_naturalness, summarise_naturalness
+from bikeability.components.utils.summaries import SummaryEngine
 
 
 @pytest.fixture
@@ -119,7 +120,7 @@ def test_summarise_naturalness(default_path_geometry, default_polygon_geometry):
         },
         crs='EPSG:4326',
     )
-    bar_chart = summarise_naturalness(paths=input_paths, projected_crs=CRS.from_user_input(32632))
+    bar_chart = summarise_naturalness(SummaryEngine(input_paths))
 
     assert isinstance(bar_chart, Figure)
     assert bar_chart['data'][0]['x'] == ('Medium (0.3 to 0.6)',)
@@ -0,0 +1,74 @@
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+from bikeability.components.overview import (
+    aggregate_to_hexgrid,
+    build_naturalness_overview_artifact,
+    build_slope_overview_artifact,
+    category_share,
+    get_overview_hexgrid,
+)
+from bikeability.components.path_sharing.path_sharing import PathSharing
+
+
+def test_category_share():
+    categories = pd.Series([PathSharing.EXCLUSIVE, PathSharing.SHARED_WITH_PEDESTRIANS, PathSharing.UNKNOWN])
+
+    shares = category_share(categories, {PathSharing.EXCLUSIVE})
+
+    np.testing.assert_array_equal(shares.to_numpy(), [100.0, 0.0, np.nan])
+
+
+def test_aggregate_to_hexgrid_weights_by_length():
+    hexgrid = gpd.GeoDataFrame(
+        geometry=[
+            shapely.box(8.0, 49.0, 8.1, 49.1),
+            shapely.box(8.1, 49.0, 8.2, 49.1),
+            shapely.box(8.2, 49.0, 8.3, 49.1),
+        ],
+        index=pd.Index(['a', 'b', 'c'], name='id'),
+        crs='EPSG:4326',
+    )
+    paths = gpd.GeoDataFrame(
+        {'@osmId': ['way/1', 'way/2', 'way/3', 'way/4', 'way/5']},
+        geometry=[
+            shapely.LineString([(8.01, 49.05), (8.04, 49.05)]),
+            shapely.LineString([(8.05, 49.05), (8.06, 49.05)]),
+            # its midpoint lies in the second cell
+            shapely.LineString([(8.09, 49.05), (8.15, 49.05)]),
+            shapely.LineString([(8.21, 49.05), (8.22, 49.05)]),
+            shapely.Polygon([(8.01, 49.01), (8.02, 49.01), (8.02, 49.02)]),
+        ],
+        crs='EPSG:4326',
+    )
+    values = pd.Series([100.0, 0.0, 50.0, np.nan, 0.0])
+
+    cells = aggregate_to_hexgrid(paths, values, hexgrid)
+
+    assert cells.index.tolist() == ['a', 'b']
+    np.testing.assert_allclose(cells['value'], [75.0, 50.0], rtol=1e-3)
+    np.testing.assert_allclose(cells['length_km'], [2.92, 4.38], atol=0.01)
+
+
+def test_get_overview_hexgrid_covers_aoi(default_aoi):
+    hexgrid = get_overview_hexgrid(default_aoi)
+
+    assert default_aoi.difference(shapely.union_all(hexgrid.geometry.to_numpy())).area < 1e-12
+    assert hexgrid.intersects(default_aoi).all()
+    assert hexgrid.index.name == 'id'
+
+
+def test_aggregate_to_overview_hexgrid_keeps_paths_at_aoi_corner(default_aoi, test_line):
+    cells = aggregate_to_hexgrid(test_line, pd.Series([100.0, 0.0]), get_overview_hexgrid(default_aoi))
+
+    assert len(cells) == 1
+    assert cells['value'].iloc[0] == 50.0
+
+
+def test_overviews_without_cells_are_skipped(default_aoi, test_line, compute_resources):
+    paths = test_line.assign(slope=np.nan, naturalness=np.nan)
+
+    assert build_slope_overview_artifact(default_aoi, paths, compute_resources) is None
+    assert build_naturalness_overview_artifact(default_aoi, paths, compute_resources) is None
@@ -0,0 +1,57 @@
+import geopandas as gpd
+import numpy as np
+import pytest
+import shapely
+
+from bikeability.components.utils.path_index import PathIndex
+
+
+@pytest.fixture
+def path_index() -> PathIndex:
+    paths = gpd.GeoDataFrame(
+        geometry=[
+            shapely.LineString([(12.3, 48.22), (12.3, 48.2205)]),
+            shapely.LineString([(12.31, 48.22), (12.31, 48.2205)]),
+            shapely.Polygon([(12.32, 48.22), (12.32, 48.2205), (12.3205, 48.22), (12.32, 48.22)]),
+        ],
+        crs='EPSG:4326',
+    )
+    return PathIndex(paths)
+
+
+def test_path_index_projects_to_utm(path_index):
+    assert len(path_index) == 3
+    assert path_index.crs.to_epsg() == 32633
+
+
+def test_path_index_dwithin(path_index):
+    # about 7 m west of the first path and 15 m west of the second
+    points = np.array([shapely.Point(12.2999, 48.2202), shapely.Point(12.3098, 48.2202)])
+
+    geometry_positions, path_positions = path_index.dwithin(points, distance=10)
+
+    np.testing.assert_array_equal(geometry_positions, [0])
+    np.testing.assert_array_equal(path_positions, [0])
+    assert path_index.within_distance(points, distance=20).tolist() == [True, True, False]
+
+
+def test_path_index_intersects(path_index):
+    boxes = np.array([shapely.box(12.305, 48.219, 12.325, 48.221), shapely.box(13, 48, 13.1, 48.1)])
+
+    geometry_positions, path_positions = path_index.intersects(boxes)
+
+    np.testing.assert_array_equal(geometry_positions, [0, 0])
+    np.testing.assert_array_equal(np.sort(path_positions), [1, 2])
+
+
+def test_path_index_nearest(path_index):
+    points = np.array([shapely.Point(12.308, 48.2202), shapely.Point(13, 48)])
+
+    geometry_positions, path_positions = path_index.nearest(points, max_distance=500)
+
+    np.testing.assert_array_equal(geometry_positions, [0])
+    np.testing.assert_array_equal(path_positions, [1])
+
+
+def test_path_index_bbox(path_index):
+    np.testing.assert_array_equal(np.sort(path_index.bbox((12.299, 48.219, 12.311, 48.221))), [0, 1])
@@ -1,9 +1,9 @@
 import geopandas as gpd
 from plotly.graph_objects import Figure
-from pyproj import CRS
 
 from bikeability.components.path_sharing.path_sharing import PathSharing
 from bikeability.components.path_sharing.path_summaries import summarise_aoi
+from bikeability.components.utils.summaries import SummaryEngine
 
 
 def test_summarise_aoi(default_path_geometry, default_polygon_geometry):
@@ -14,7 +14,7 @@ def test_summarise_aoi(default_path_geometry, default_polygon_geometry):
         },
         crs='EPSG:4326',
     )
-    category_stacked_bar_chart = summarise_aoi(paths=input_paths, projected_crs=CRS.from_user_input(32632))
+    category_stacked_bar_chart = summarise_aoi(SummaryEngine(input_paths))
 
     assert isinstance(category_stacked_bar_chart, Figure)
     assert category_stacked_bar_chart['data'][0]['y'] == ('Path Types',)
@@ -22,8 +22,8 @@ def test_summarise_aoi(default_path_geometry, default_polygon_geometry):
 
 
 def test_summarise_aoi_missing_geometries(test_line, test_polygon):
-    result_no_polygons = summarise_aoi(test_line, projected_crs=CRS.from_user_input(32632))
+    result_no_polygons = summarise_aoi(SummaryEngine(test_line))
     assert isinstance(result_no_polygons, Figure)
 
-    result_no_lines = summarise_aoi(test_polygon, projected_crs=CRS.from_user_input(32632))
+    result_no_lines = summarise_aoi(SummaryEngine(test_polygon))
     assert isinstance(result_no_lines, Figure)
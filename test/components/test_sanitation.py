@@ -0,0 +1,56 @@
+import geopandas as gpd
+import shapely
+
+from bikeability.components.utils.sanitation import SanitationReport, flatten_collections, sanitize_paths
+
+
+def test_sanitize_paths():
+    line_paths = gpd.GeoDataFrame(
+        data={'@osmId': ['way/1', 'way/2', 'way/3', 'way/4'], '@other_tags': [{}] * 4},
+        geometry=[
+            shapely.LineString([(8.68, 49.40), (8.69, 49.41)]),
+            shapely.Point(8.68, 49.40),
+            shapely.LineString(),
+            shapely.LineString([(8.68, 49.40), (8.68, 49.40)]),
+        ],
+        crs='EPSG:4326',
+    )
+    bowtie = shapely.Polygon([(8.68, 49.40), (8.69, 49.41), (8.69, 49.40), (8.68, 49.41), (8.68, 49.40)])
+    polygon_paths = gpd.GeoDataFrame(
+        data={'@osmId': ['way/1', 'way/5', 'way/6'], '@other_tags': [{}] * 3},
+        geometry=[shapely.box(8.68, 49.40, 8.69, 49.41), bowtie, None],
+        crs='EPSG:4326',
+    )
+
+    paths, report = sanitize_paths(line_paths, polygon_paths)
+
+    assert paths['@osmId'].tolist() == ['way/1', 'way/5']
+    assert paths.geom_type.tolist() == ['LineString', 'MultiPolygon']
+    assert paths.is_valid.all()
+    assert report == SanitationReport(
+        paths_in=7,
+        repaired=2,
+        flattened=0,
+        dropped_empty=2,
+        dropped_degenerate=2,
+        dropped_duplicates=1,
+        paths_out=2,
+    )
+
+
+def test_flatten_collections():
+    collections = [
+        shapely.GeometryCollection([shapely.Point(0, 0), shapely.LineString([(0, 0), (1, 1)])]),
+        shapely.GeometryCollection(
+            [shapely.box(0, 0, 1, 1), shapely.LineString([(2, 2), (3, 3)]), shapely.box(2, 0, 3, 1)]
+        ),
+        shapely.GeometryCollection([shapely.Point(0, 0)]),
+        shapely.GeometryCollection(),
+    ]
+
+    flattened = flatten_collections(collections)
+
+    assert flattened[0] == shapely.MultiLineString([[(0, 0), (1, 1)]])
+    assert flattened[1] == shapely.MultiPolygon([shapely.box(0, 0, 1, 1), shapely.box(2, 0, 3, 1)])
+    assert flattened[2] == shapely.MultiPoint([(0, 0)])
+    assert flattened[3] is None
@@ -0,0 +1,41 @@
+import geopandas as gpd
+import pandas as pd
+import shapely
+from pydantic_extra_types.color import Color
+
+from bikeability.components.shared_paths import describe_layer_legends, join_layers
+from bikeability.components.smoothness.smoothness_artifacts import get_smoothness_legend
+
+
+def test_join_layers_matches_paths_by_osm_id_and_geometry_type():
+    line = shapely.LineString([(0, 0), (1, 1)])
+    polygon = shapely.Polygon([(0, 0), (1, 0), (1, 1)])
+    paths = gpd.GeoDataFrame(
+        {'@osmId': ['way/1', 'way/1', 'way/2'], 'color': [Color('red')] * 3, 'label': ['a', 'b', 'c']},
+        geometry=[line, polygon, line],
+        crs='EPSG:4326',
+    )
+    layer = gpd.GeoDataFrame(
+        {'@osmId': ['way/1', 'way/1'], 'color': [Color('blue'), Color('green')], 'label': ['polygon', 'line']},
+        geometry=[polygon, line],
+        crs='EPSG:4326',
+    )
+
+    joined = join_layers(paths, {'smoothness': layer})
+
+    assert joined.geometry.equals(paths.geometry)
+    pd.testing.assert_series_equal(
+        joined['smoothness_label'], pd.Series(['line', 'polygon', None], name='smoothness_label'), check_dtype=False
+    )
+    assert joined['smoothness_color'].tolist()[:2] == ['#008000', '#0000ff']
+    assert pd.isna(joined['smoothness_color'].iloc[2])
+
+
+def test_describe_layer_legends():
+    legend = get_smoothness_legend()
+
+    description = describe_layer_legends({'smoothness': ('Smoothness', legend)})
+
+    lines = description.splitlines()
+    assert lines[0] == '### Smoothness (`smoothness_label`, `smoothness_color`)'
+    assert lines[2:] == [f'- {label}: `{color.as_hex(format="long")}`' for label, color in legend.legend_data.items()]
@@ -1,3 +1,5 @@
+from unittest.mock import patch
+
 import geopandas as gpd
 import numpy as np
 import plotly.graph_objects as go
@@ -8,7 +10,14 @@ from climatoology.base.exception import ClimatoologyUserError
 from geopandas.testing import assert_geodataframe_equal, assert_geoseries_equal
 from pandas.testing import assert_frame_equal
 
-from bikeability.components.slope.slope_analysis import compute_slope_analysis, merge_similar_slopes, summarise_slope
+from bikeability.components.path_sharing.path_sharing import PathSharing
+from bikeability.components.slope.slope_analysis import (
+    build_slope_artifact,
+    compute_slope_analysis,
+    merge_similar_slopes,
+    summarise_slope,
+)
+from bikeability.components.utils.utils import add_path_lengths
 
 
 def test_compute_slope_analysis(default_paths, compute_resources, slopes_mock, default_s3_settings):
@@ -18,6 +27,40 @@ def test_compute_slope_analysis(default_paths, compute_resources, slopes_mock, d
         assert isinstance(artifact, Artifact)
 
 
+def test_compute_slope_analysis_weights_parts_of_multilinestring_paths(compute_resources, default_s3_settings):
+    paths = add_path_lengths(
+        gpd.GeoDataFrame(
+            data={'@osmId': ['way/1'], 'path_sharing': [PathSharing.EXCLUSIVE]},
+            geometry=[
+                shapely.MultiLineString(
+                    [[(12.3, 48.22), (12.31, 48.22)], [(12.31, 48.22), (12.31, 48.221)]],
+                )
+            ],
+            crs='EPSG:4326',
+        )
+    )
+
+    with (
+        patch(
+            'bikeability.components.slope.slope_analysis.get_paths_slopes',
+            side_effect=lambda parts, *args, **kwargs: parts.assign(slope=[1.0, 1.5]),
+        ) as get_slopes,
+        patch(
+            'bikeability.components.slope.slope_analysis.build_slope_artifact',
+            wraps=build_slope_artifact,
+        ) as build_artifact,
+    ):
+        compute_slope_analysis(paths=paths, s3settings=default_s3_settings, resources=compute_resources)
+
+    parts = get_slopes.call_args.args[0]
+    assert parts.geom_type.to_list() == ['LineString', 'LineString']
+    assert 'length_m' not in parts.columns
+
+    smoothed_slopes = build_artifact.call_args.kwargs['path_slopes_data']
+    assert len(smoothed_slopes) == 1
+    assert smoothed_slopes['slope'].iloc[0] == pytest.approx(1.065, abs=0.005)
+
+
 def test_compute_slope_fail_without_s3settings(default_paths, compute_resources):
     with pytest.raises(ClimatoologyUserError):
         compute_slope_analysis(paths=default_paths, resources=compute_resources, s3settings=None)
@@ -1,7 +1,12 @@
+import geopandas as gpd
 import pandas as pd
 import pandas.testing as test
+import pytest
+import shapely
 
 from bikeability.components.smoothness.smoothness import SmoothnessCategory, apply_path_smoothness_filters
+from bikeability.components.smoothness.smoothness_artifacts import summarise_smoothness
+from bikeability.components.utils.summaries import SummaryEngine
 
 VALIDATION_PATHS = pd.DataFrame(
     data={
@@ -34,3 +39,23 @@ VALIDATION_PATHS = pd.DataFrame(
 def test_construct_smoothness_validate():
     result = VALIDATION_PATHS.apply(apply_path_smoothness_filters, axis=1)
     test.assert_series_equal(result, VALIDATION_PATHS['expected_smoothness'], check_index=False, check_names=False)
+
+
+def test_summarise_smoothness():
+    smoothness_paths = gpd.GeoDataFrame(
+        data={
+            'smoothness': [
+                SmoothnessCategory.EXCELLENT,
+                SmoothnessCategory.EXCELLENT,
+                SmoothnessCategory.BAD,
+                SmoothnessCategory.UNKNOWN,
+            ]
+        },
+        geometry=4 * [shapely.LineString([(8.0, 49.0), (8.0, 49.01)])],
+        crs='EPSG:4326',
+    )
+
+    figure = summarise_smoothness(SummaryEngine(smoothness_paths), smoothness_paths)
+
+    assert [trace.name for trace in figure.data] == ['Excellent', 'Bad', 'Unknown']
+    assert [trace.x[0] for trace in figure.data] == pytest.approx([50.0, 25.0, 25.0])
@@ -0,0 +1,67 @@
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from pydantic_extra_types.color import Color
+
+from bikeability.components.path_sharing.path_sharing import PathSharing
+from bikeability.components.utils.summaries import SummaryEngine, category_stacked_bar
+
+
+def test_summary_engine_length_by_categories():
+    paths = gpd.GeoDataFrame(
+        {'@osmId': ['way/1', 'way/2', 'way/3']},
+        geometry=[
+            shapely.LineString([(8.0, 49.0), (8.0, 49.01)]),
+            shapely.LineString([(8.0, 49.0), (8.0, 49.02)]),
+            shapely.Polygon([(8.0, 49.0), (8.01, 49.0), (8.01, 49.01)]),
+        ],
+        crs='EPSG:4326',
+    )
+    summary = SummaryEngine(paths)
+    categories = pd.Series([PathSharing.EXCLUSIVE, PathSharing.UNKNOWN, PathSharing.EXCLUSIVE])
+
+    lengths = summary.length_by(categories, [PathSharing.EXCLUSIVE, PathSharing.SHARED_WITH_PEDESTRIANS])
+
+    assert lengths.index.tolist() == [PathSharing.EXCLUSIVE, PathSharing.SHARED_WITH_PEDESTRIANS]
+    np.testing.assert_allclose(lengths, [1.11, 0.0], atol=0.01)
+
+
+def test_summary_engine_length_by_bins():
+    paths = gpd.GeoDataFrame(
+        geometry=[shapely.LineString([(8.0, 49.0), (8.0, 49.01)])] * 4,
+        crs='EPSG:4326',
+    )
+    summary = SummaryEngine(paths)
+
+    lengths = summary.length_by_bins(
+        pd.Series([0.1, 0.3, 0.9, np.nan]), bins=[-np.inf, 0.3, np.inf], labels=['low', 'high']
+    )
+
+    assert lengths.index.tolist() == ['low', 'high']
+    np.testing.assert_allclose(lengths, [1.11, 2.22], atol=0.01)
+
+
+def test_summary_engine_matches_osm_ids():
+    line = shapely.LineString([(8.0, 49.0), (8.0, 49.01)])
+    paths = gpd.GeoDataFrame({'@osmId': ['way/1', 'way/2']}, geometry=[line, line], crs='EPSG:4326')
+    layer = gpd.GeoDataFrame(
+        {'@osmId': ['way/2', 'way/1', 'way/1'], 'category': ['polygon', 'b', 'a']},
+        geometry=[shapely.Polygon([(8.0, 49.0), (8.01, 49.0), (8.01, 49.01)]), line, line],
+        crs='EPSG:4326',
+    )
+    summary = SummaryEngine(paths)
+
+    categories = summary.match_osm_ids(layer, 'category')
+
+    assert categories.iloc[0] == 'b'
+    assert pd.isna(categories.iloc[1])
+
+
+def test_category_stacked_bar_skips_empty_categories():
+    lengths = pd.Series([3.0, 0.0, 1.0], index=[PathSharing.EXCLUSIVE, PathSharing.UNKNOWN, PathSharing.NO_ACCESS])
+
+    figure = category_stacked_bar(lengths, lambda category: Color('red'), axis_label='Path Types')
+
+    assert [trace.name for trace in figure.data] == ['Bike exclusive', 'Bike not allowed']
+    assert [trace.x for trace in figure.data] == [(75.0,), (25.0,)]
@@ -1,6 +1,10 @@
+import geopandas as gpd
 import pytest
+import shapely
 
 from bikeability.components.surface_types.surface_types import SurfaceType, get_surface_types
+from bikeability.components.surface_types.surface_types_artifacts import summarise_surface_types
+from bikeability.components.utils.summaries import SummaryEngine
 
 
 @pytest.mark.parametrize(
@@ -28,3 +32,16 @@ def test_get_surface_types(test_line, input_surface, expected_output):
     computed_line = get_surface_types(test_line).reset_index(drop=True)
 
     assert computed_line.loc[0, 'surface_type'] == expected_output
+
+
+def test_summarise_surface_types():
+    surface_type_paths = gpd.GeoDataFrame(
+        data={'surface_type': [SurfaceType.ASPHALT, SurfaceType.ASPHALT, SurfaceType.ASPHALT, SurfaceType.GRAVEL]},
+        geometry=4 * [shapely.LineString([(8.0, 49.0), (8.0, 49.01)])],
+        crs='EPSG:4326',
+    )
+
+    figure = summarise_surface_types(SummaryEngine(surface_type_paths), surface_type_paths)
+
+    assert [trace.name for trace in figure.data] == ['Asphalt', 'Gravel']
+    assert [trace.x[0] for trace in figure.data] == pytest.approx([75.0, 25.0])
@@ -2,33 +2,36 @@ from unittest.mock import patch
 
 import geopandas as gpd
 import geopandas.testing
+import numpy as np
 import ohsome
 import pytest
 import shapely
-from climatoology.base.exception import ClimatoologyUserError, InputValidationError
+from climatoology.base.exception import ClimatoologyUserError
 from numpy.testing import assert_almost_equal
 from ohsome import OhsomeClient
 from ohsome.exceptions import OhsomeException
 from ohsome_filter_to_sql.main import validate_filter
+from pyproj import Geod
 
 from bikeability.components.utils.utils import (
-    check_paths_count_limit,
+    count_paths,
+    dissolve_paths,
     fetch_osm_data,
+    geodesic_lengths,
+    hilbert_sort,
     length_weighted_mean,
     ohsome_filter,
 )
 
 
-def test_check_paths_count_limit(default_aoi, expected_compute_input, responses_mock, test_resources):
+def test_count_paths(default_aoi, responses_mock, test_resources):
     with open(test_resources / 'ohsome_count_response.json', 'rb') as paths_count:
         responses_mock.post(
             'https://api.ohsome.org/v1/elements/count',
             body=paths_count.read(),
         )
 
-    # test false situation
-    with pytest.raises(InputValidationError):
-        check_paths_count_limit(default_aoi, OhsomeClient(), 5000)
+    assert count_paths(default_aoi, OhsomeClient()) == 6078
 
 
 def test_fetch_osm_data(default_aoi, expected_compute_input, responses_mock, test_resources):
@@ -84,6 +87,39 @@ def test_ohsome_filter(geometry_type):
     validate_filter(ohsome_filter(geometry_type))
 
 
+def test_hilbert_sort():
+    paths = gpd.GeoDataFrame(
+        data={'@osmId': ['way/1', 'way/2', 'way/3', 'way/4']},
+        geometry=[
+            shapely.LineString([(8.68, 49.40), (8.681, 49.40)]),
+            shapely.LineString([(8.75, 49.45), (8.751, 49.45)]),
+            shapely.LineString([(8.68, 49.401), (8.681, 49.401)]),
+            shapely.LineString([(8.75, 49.451), (8.751, 49.451)]),
+        ],
+        crs='EPSG:4326',
+    )
+
+    sorted_paths = hilbert_sort(paths)
+
+    assert set(sorted_paths['@osmId'].iloc[:2]) == {'way/1', 'way/3'}
+    geopandas.testing.assert_geodataframe_equal(sorted_paths.sort_index(), paths)
+
+
+def test_geodesic_lengths():
+    line = shapely.LineString([(8.68, 49.40), (8.70, 49.41), (8.72, 49.40)])
+    multi_line = shapely.MultiLineString([[(8.68, 49.40), (8.69, 49.40)], [(8.70, 49.40), (8.70, 49.42)]])
+    polygon = shapely.Polygon([(8.68, 49.40), (8.69, 49.40), (8.69, 49.41)])
+    geod = Geod(ellps='WGS84')
+
+    lengths = geodesic_lengths(np.array([line, polygon, multi_line, None]))
+
+    assert lengths.dtype == np.float32
+    np.testing.assert_allclose(
+        lengths[[0, 2]], [geod.geometry_length(line), geod.geometry_length(multi_line)], rtol=1e-6
+    )
+    assert np.isnan(lengths[[1, 3]]).all()
+
+
 def test_length_weighted_mean():
     col = 'column'
     input_data = gpd.GeoDataFrame(
@@ -97,3 +133,55 @@ def test_length_weighted_mean():
     received = length_weighted_mean(input_data, col=col)
 
     assert_almost_equal(received, expected)
+
+
+def test_dissolve_paths():
+    paths = gpd.GeoDataFrame(
+        data={
+            '@osmId': ['way/1', 'way/2', 'way/3', 'way/4', 'way/5'],
+            'category': ['a', 'a', 'b', 'a', 'a'],
+        },
+        geometry=[
+            shapely.LineString([(0.0, 0.0), (0.0, 1.0)]),
+            shapely.LineString([(0.0, 1.0), (0.0, 2.0)]),
+            shapely.LineString([(0.0, 2.0), (0.0, 3.0)]),
+            shapely.LineString([(0.0, 3.0), (0.0, 4.0)]),
+            shapely.box(1.0, 1.0, 2.0, 2.0),
+        ],
+        crs=4326,
+    )
+    expected = gpd.GeoDataFrame(
+        data={
+            '@osmId': ['way/5', 'way/1', 'way/4', 'way/3'],
+            '@osmIds': ['way/5', 'way/1,way/2', 'way/4', 'way/3'],
+            'category': ['a', 'a', 'a', 'b'],
+        },
+        geometry=[
+            shapely.box(1.0, 1.0, 2.0, 2.0),
+            shapely.LineString([(0.0, 0.0), (0.0, 1.0), (0.0, 2.0)]),
+            shapely.LineString([(0.0, 3.0), (0.0, 4.0)]),
+            shapely.LineString([(0.0, 2.0), (0.0, 3.0)]),
+        ],
+        crs=4326,
+    )
+
+    received = dissolve_paths(paths, 'category')
+
+    geopandas.testing.assert_geodataframe_equal(received, expected, check_dtype=False, check_less_precise=True)
+
+
+def test_dissolve_paths_keeps_crossing_lines():
+    # The midpoints of both lines are their crossing point
+    paths = gpd.GeoDataFrame(
+        data={'@osmId': ['way/1', 'way/2'], 'category': ['a', 'a']},
+        geometry=[
+            shapely.LineString([(0.0, 1.0), (2.0, 1.0)]),
+            shapely.LineString([(1.0, 0.0), (1.0, 2.0)]),
+        ],
+        crs=3857,
+    )
+
+    received = dissolve_paths(paths, 'category')
+
+    assert sorted(received['@osmIds']) == ['way/1', 'way/2']
+    assert received.geometry.length.sum() == pytest.approx(paths.geometry.length.sum())
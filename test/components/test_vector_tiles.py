@@ -0,0 +1,112 @@
+import gzip
+
+import geopandas as gpd
+import mapbox_vector_tile
+import numpy as np
+import shapely
+from pmtiles.reader import MmapSource, Reader
+from pydantic_extra_types.color import Color
+
+from bikeability.components.utils.vector_tiles import WEB_MERCATOR_ORIGIN, VectorTileOptions, write_vector_tiles
+
+
+def test_write_vector_tiles(tmp_path):
+    paths = gpd.GeoDataFrame(
+        {'@osmId': ['way/1', 'way/2'], 'color': [Color('red'), Color('blue')], 'label': ['long', 'short']},
+        geometry=[
+            shapely.LineString([(8.68, 49.40), (8.70, 49.41), (8.72, 49.40)]),
+            shapely.LineString([(8.69, 49.405), (8.6901, 49.405)]),
+        ],
+        crs='EPSG:4326',
+    )
+
+    tile_count = write_vector_tiles(
+        paths, tmp_path / 'paths.pmtiles', 'paths', VectorTileOptions(min_zoom=10, max_zoom=14)
+    )
+
+    with open(tmp_path / 'paths.pmtiles', 'rb') as file:
+        reader = Reader(MmapSource(file))
+        assert reader.header()['min_zoom'] == 10
+        assert reader.header()['max_zoom'] == 14
+        assert reader.metadata()['vector_layers'][0]['fields'] == {
+            '@osmId': 'String',
+            'color': 'String',
+            'label': 'String',
+        }
+        assert tile_count >= 5
+
+        low_zoom_tile = gzip.decompress(reader.get(10, 536, 349))
+        assert b'#ff0000' in low_zoom_tile
+        assert b'short' not in low_zoom_tile
+
+        high_zoom_tile = gzip.decompress(reader.get(14, 8587, 5598))
+        assert b'short' in high_zoom_tile
+
+
+def test_vector_tiles_decode_to_the_written_features(tmp_path):
+    paths = gpd.GeoDataFrame(
+        {'@osmId': ['way/1', 'way/2'], 'color': [Color('red'), Color('blue')], 'label': ['line', None]},
+        geometry=[
+            shapely.LineString([(8.685, 49.40), (8.69, 49.405), (8.695, 49.40)]),
+            shapely.box(8.688, 49.402, 8.692, 49.406),
+        ],
+        crs='EPSG:4326',
+    )
+    options = VectorTileOptions(min_zoom=14, max_zoom=14)
+
+    write_vector_tiles(paths, tmp_path / 'paths.pmtiles', 'paths', options)
+
+    with open(tmp_path / 'paths.pmtiles', 'rb') as file:
+        tile = gzip.decompress(Reader(MmapSource(file)).get(14, 8587, 5598))
+    layer = mapbox_vector_tile.decode(tile, default_options={'y_coord_down': True})['paths']
+    assert layer['extent'] == options.extent
+    assert [feature['properties'] for feature in layer['features']] == [
+        {'@osmId': 'way/1', 'color': '#ff0000', 'label': 'line'},
+        {'@osmId': 'way/2', 'color': '#0000ff'},
+    ]
+
+    tile_size = 2 * WEB_MERCATOR_ORIGIN / 2**14
+    tile_min_x, tile_max_y = 8587 * tile_size - WEB_MERCATOR_ORIGIN, WEB_MERCATOR_ORIGIN - 5598 * tile_size
+    for feature, expected in zip(layer['features'], paths.geometry.to_crs('EPSG:3857')):
+        expected = shapely.transform(
+            expected,
+            lambda xy: np.column_stack([xy[:, 0] - tile_min_x, tile_max_y - xy[:, 1]]) * options.extent / tile_size,
+        )
+        decoded = shapely.geometry.shape(feature['geometry'])
+        assert decoded.geom_type == expected.geom_type
+        assert decoded.hausdorff_distance(expected) < 1
+
+
+def test_vector_tiles_declare_attribute_types(tmp_path):
+    paths = gpd.GeoDataFrame(
+        {
+            '@osmId': ['way/1', 'way/2'],
+            'color': [Color('red'), Color('blue')],
+            'detour_factor': [1.5, np.nan],
+            'count': [1, 2],
+            'exclusive': [True, False],
+        },
+        geometry=[
+            shapely.LineString([(8.685, 49.40), (8.69, 49.405)]),
+            shapely.LineString([(8.69, 49.405), (8.695, 49.40)]),
+        ],
+        crs='EPSG:4326',
+    )
+
+    write_vector_tiles(paths, tmp_path / 'paths.pmtiles', 'paths', VectorTileOptions(min_zoom=14, max_zoom=14))
+
+    with open(tmp_path / 'paths.pmtiles', 'rb') as file:
+        reader = Reader(MmapSource(file))
+        assert reader.metadata()['vector_layers'][0]['fields'] == {
+            '@osmId': 'String',
+            'color': 'String',
+            'detour_factor': 'Number',
+            'count': 'Number',
+            'exclusive': 'Boolean',
+        }
+        tile = gzip.decompress(reader.get(14, 8587, 5598))
+    properties = [feature['properties'] for feature in mapbox_vector_tile.decode(tile)['paths']['features']]
+    assert properties == [
+        {'@osmId': 'way/1', 'color': '#ff0000', 'detour_factor': 1.5, 'count': 1, 'exclusive': True},
+        {'@osmId': 'way/2', 'color': '#0000ff', 'count': 2, 'exclusive': False},
+    ]
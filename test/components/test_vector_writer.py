@@ -0,0 +1,48 @@
+import geopandas as gpd
+import shapely
+from climatoology.base.artifact import ArtifactMetadata
+from pydantic_extra_types.color import Color
+
+from bikeability.components.utils.utils import Topics
+from bikeability.components.utils.vector_tiles import VectorTileOptions
+from bikeability.components.utils.vector_writer import create_path_artifact, quantize_coordinates
+
+
+def test_quantize_coordinates():
+    paths = gpd.GeoDataFrame(
+        {'@osmId': ['way/1']},
+        geometry=[shapely.LineString([(8.123456789, 49.987654321), (8.2, 49.3)])],
+        crs='EPSG:4326',
+    )
+
+    quantized = quantize_coordinates(paths)
+
+    assert quantized.geometry.iloc[0] == shapely.LineString([(8.1234568, 49.9876543), (8.2, 49.3)])
+    assert quantized['@osmId'].tolist() == ['way/1']
+    assert paths.geometry.iloc[0].coords[0] == (8.123456789, 49.987654321)
+
+
+def test_quantize_coordinates_reprojects_to_wgs84():
+    paths = gpd.GeoDataFrame(geometry=[shapely.Point(0, 0)], crs='EPSG:3857')
+
+    quantized = quantize_coordinates(paths)
+
+    assert quantized.crs.equals('EPSG:4326')
+    assert quantized.geometry.iloc[0] == shapely.Point(0, 0)
+
+
+def test_create_path_artifact_writes_tiles(compute_resources):
+    paths = gpd.GeoDataFrame(
+        {'@osmId': ['way/1'], 'color': [Color('red')], 'label': ['path']},
+        geometry=[shapely.LineString([(8.68, 49.40), (8.70, 49.41)])],
+        crs='EPSG:4326',
+    )
+    metadata = ArtifactMetadata(name='Paths', summary='Paths', filename='paths', tags={Topics.TRAFFIC})
+
+    artifact = create_path_artifact(
+        paths, metadata, compute_resources, tiles=VectorTileOptions(min_zoom=10, max_zoom=10)
+    )
+
+    assert artifact.metadata.name == 'Paths'
+    assert (compute_resources.computation_dir / 'paths.pmtiles').stat().st_size > 0
+    assert paths.columns.tolist() == ['@osmId', 'color', 'label', 'geometry']
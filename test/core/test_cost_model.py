@@ -0,0 +1,136 @@
+import pytest
+from climatoology.base.exception import InputValidationError
+
+from bikeability.core.cost_model import (
+    ComponentCost,
+    CostModel,
+    CostSignals,
+    LinearCost,
+    aoi_area_km2,
+    load_metrics,
+)
+from bikeability.core.input import BikeabilityIndicators
+from bikeability.core.instrumentation import ComputeMetrics, StageMetrics
+
+
+@pytest.fixture
+def cost_model() -> CostModel:
+    return CostModel(
+        core=ComponentCost(time_s=LinearCost(per_path=1e-3)),
+        indicators={
+            BikeabilityIndicators.NATURALNESS: ComponentCost(time_s=LinearCost(per_km2=1.0)),
+            BikeabilityIndicators.SLOPE: ComponentCost(time_s=LinearCost(per_path=2e-3)),
+        },
+        time_budget_s=100,
+    )
+
+
+def test_aoi_area_km2(default_aoi):
+    assert aoi_area_km2(default_aoi) == pytest.approx(177.6, rel=0.01)
+
+
+def test_estimate(cost_model):
+    estimate = cost_model.estimate(CostSignals(path_count=10_000, aoi_area_km2=20), {BikeabilityIndicators.NATURALNESS})
+
+    assert estimate.core.time_s == pytest.approx(10)
+    assert estimate.indicators[BikeabilityIndicators.NATURALNESS].time_s == pytest.approx(20)
+    assert estimate.time_s == pytest.approx(30)
+
+
+def test_check_core_rejects_too_many_paths(cost_model):
+    cost_model.check_core(CostSignals(path_count=100_000, aoi_area_km2=1))
+
+    with pytest.raises(InputValidationError):
+        cost_model.check_core(CostSignals(path_count=100_001, aoi_area_km2=1))
+
+
+def test_downgrade_skips_most_expensive_indicators_first(cost_model):
+    signals = CostSignals(path_count=40_000, aoi_area_km2=10)
+    indicators = {BikeabilityIndicators.NATURALNESS, BikeabilityIndicators.SLOPE}
+
+    assert cost_model.downgrade(signals, indicators) == {BikeabilityIndicators.SLOPE}
+    assert cost_model.downgrade(CostSignals(path_count=1000, aoi_area_km2=10), indicators) == set()
+
+
+def test_downgrade_respects_memory_budget(cost_model):
+    cost_model = cost_model.model_copy(
+        update={
+            'indicators': {BikeabilityIndicators.SLOPE: ComponentCost(memory_bytes=LinearCost(per_path=1000))},
+            'memory_budget_bytes': 1e6,
+        }
+    )
+
+    downgraded = cost_model.downgrade(CostSignals(path_count=10_000, aoi_area_km2=1), {BikeabilityIndicators.SLOPE})
+
+    assert downgraded == {BikeabilityIndicators.SLOPE}
+
+
+def test_default_cost_model_matches_former_path_limit():
+    CostModel().check_core(CostSignals(path_count=500_000, aoi_area_km2=100))
+
+    with pytest.raises(InputValidationError):
+        CostModel().check_core(CostSignals(path_count=500_001, aoi_area_km2=100))
+
+
+def test_default_cost_model_skips_no_indicators():
+    indicators = set(BikeabilityIndicators)
+
+    assert CostModel().downgrade(CostSignals(path_count=500_000, aoi_area_km2=1000), indicators) == set()
+
+
+def test_calibrate(tmp_path):
+    for path_count in (1000, 2000, 4000, 8000):
+        metrics = ComputeMetrics(
+            wall_time_s=2 + 1e-3 * path_count,
+            stages=[
+                StageMetrics(stage='paths', wall_time_s=0.5, cpu_time_s=0.5, peak_memory_delta_bytes=500 * path_count),
+                StageMetrics(stage='Slope', wall_time_s=3e-3 * path_count, cpu_time_s=0.1),
+            ],
+            path_count=path_count,
+            aoi_area_km2=10,
+        )
+        (tmp_path / f'{path_count}.json').write_text(metrics.model_dump_json())
+    without_indicators = ComputeMetrics(
+        wall_time_s=2 + 1e-3 * 3000,
+        stages=[StageMetrics(stage='paths', wall_time_s=0.5, cpu_time_s=0.5)],
+        path_count=3000,
+        aoi_area_km2=10,
+    )
+    (tmp_path / 'core.json').write_text(without_indicators.model_dump_json())
+
+    calibrated = CostModel().calibrate(load_metrics(tmp_path))
+    signals = CostSignals(path_count=10_000, aoi_area_km2=10)
+
+    assert calibrated.indicators[BikeabilityIndicators.SLOPE].time_s.predict(signals) == pytest.approx(30, rel=0.01)
+    assert calibrated.indicators[BikeabilityIndicators.SLOPE].memory_bytes == LinearCost()
+    assert calibrated.core == CostModel().core
+
+
+def test_calibrate_core_memory_from_computation_peak():
+    samples = [
+        ComputeMetrics(
+            wall_time_s=2 + 1e-3 * path_count,
+            stages=[
+                # concurrent stages whose peaks overlap
+                StageMetrics(stage='paths', wall_time_s=0.5, cpu_time_s=0.5, peak_memory_delta_bytes=500 * path_count),
+                StageMetrics(
+                    stage='summary', wall_time_s=0.5, cpu_time_s=0.5, peak_memory_delta_bytes=400 * path_count
+                ),
+            ],
+            peak_memory_delta_bytes=600 * path_count,
+            path_count=path_count,
+            aoi_area_km2=10,
+        )
+        for path_count in (1000, 2000, 4000, 8000)
+    ]
+
+    calibrated = CostModel().calibrate(samples)
+
+    signals = CostSignals(path_count=10_000, aoi_area_km2=10)
+    assert calibrated.core.memory_bytes.predict(signals) == pytest.approx(6e6, rel=0.01)
+
+
+def test_calibrated_model_round_trips_through_json():
+    cost_model = CostModel(indicators={BikeabilityIndicators.SLOPE: ComponentCost(time_s=LinearCost(fixed=1.0))})
+
+    assert CostModel.model_validate_json(cost_model.model_dump_json()) == cost_model
@@ -0,0 +1,34 @@
+import json
+import subprocess
+import sys
+
+# Import time of the plugin on top of its framework dependencies, i.e. what the plugin itself adds to a cold start
+IMPORT_TIME_BUDGET_S = 2.0
+DEFERRED_MODULES = ['matplotlib', 'scipy', 'h3pandas', 'mobility_tools.slope', 'mobility_tools.detour_factors']
+
+MEASURE_IMPORT = """
+import json, sys, time
+import climatoology.app.plugin, climatoology.base.artifact_creators, climatoology.base.baseoperator
+preloaded = set(sys.modules)
+start = time.perf_counter()
+import bikeability.plugin
+print(json.dumps({'seconds': time.perf_counter() - start, 'modules': sorted(set(sys.modules) - preloaded)}))
+"""
+
+
+def measure_plugin_import() -> dict:
+    result = subprocess.run([sys.executable, '-c', MEASURE_IMPORT], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def test_plugin_import_defers_heavy_modules():
+    imported = measure_plugin_import()['modules']
+
+    for module in DEFERRED_MODULES:
+        assert module not in imported, f'{module} is imported at start-up'
+
+
+def test_plugin_import_time_within_budget():
+    seconds = min(measure_plugin_import()['seconds'] for _ in range(3))
+
+    assert seconds < IMPORT_TIME_BUDGET_S
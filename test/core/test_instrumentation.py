@@ -0,0 +1,91 @@
+import json
+import logging
+import threading
+import time
+
+from bikeability.core.instrumentation import (
+    MEMORY_SAMPLING_INTERVAL_S,
+    ComputeMetrics,
+    StageMetrics,
+    StageRecorder,
+    count_rows,
+    emit_metrics,
+)
+from bikeability.core.pipeline import Pipeline, Stage, StageCache
+
+
+def test_count_rows(default_paths):
+    assert count_rows(default_paths) == len(default_paths)
+    assert count_rows((default_paths, default_paths)) == 2 * len(default_paths)
+    assert count_rows([default_paths, 'resources']) == len(default_paths)
+    assert count_rows('resources') is None
+
+
+def test_stage_recorder_measures_stages(default_paths):
+    with StageRecorder() as recorder:
+        output = recorder.measure('filter', lambda paths: paths.iloc[:1], default_paths)
+
+    metrics = recorder.report().stages
+
+    assert len(output) == 1
+    assert len(metrics) == 1
+    assert metrics[0].stage == 'filter'
+    assert metrics[0].rows_in == len(default_paths)
+    assert metrics[0].rows_out == 1
+    assert metrics[0].wall_time_s >= 0.0
+    assert metrics[0].peak_memory_delta_bytes is None
+
+
+def test_stage_recorder_traces_memory():
+    with StageRecorder(trace_memory=True) as recorder:
+        recorder.measure('allocate', lambda: bytearray(10 * 1024**2))
+
+    assert recorder.report().stages[0].peak_memory_delta_bytes >= 10 * 1024**2
+    assert recorder.report().peak_memory_delta_bytes >= 10 * 1024**2
+
+
+def test_stage_recorder_traces_peak_of_concurrent_stages():
+    barrier = threading.Barrier(2, timeout=5)
+
+    def allocate() -> int:
+        allocated = bytearray(10 * 1024**2)
+        barrier.wait()
+        time.sleep(10 * MEMORY_SAMPLING_INTERVAL_S)
+        return len(allocated)
+
+    pipeline = Pipeline([Stage('first', allocate, inputs=()), Stage('second', allocate, inputs=())])
+
+    with StageRecorder(trace_memory=True) as recorder:
+        pipeline.run(sources={}, targets=['first', 'second'], recorder=recorder)
+
+    # a stage running first also sees the allocation of the other, so the sum of the stage peaks overstates the peak
+    metrics = recorder.report()
+    assert sum(stage.peak_memory_delta_bytes for stage in metrics.stages) >= 30 * 1024**2
+    assert 20 * 1024**2 <= metrics.peak_memory_delta_bytes < 25 * 1024**2
+
+
+def test_pipeline_records_cached_stages():
+    pipeline = Pipeline([Stage('doubled', lambda x: 2 * x, inputs=('x',))], cache=StageCache())
+    pipeline.run(sources={'x': 1}, targets=['doubled'])
+
+    with StageRecorder() as recorder:
+        pipeline.run(sources={'x': 1}, targets=['doubled'], recorder=recorder)
+
+    assert [(metrics.stage, metrics.cached) for metrics in recorder.report().stages] == [('doubled', True)]
+
+
+def test_emit_metrics(tmp_path, caplog):
+    metrics = ComputeMetrics(
+        wall_time_s=3.0,
+        stages=[
+            StageMetrics(stage='fetched_paths', wall_time_s=2.0, cpu_time_s=0.1, rows_out=10),
+            StageMetrics(stage='paths', wall_time_s=1.0, cpu_time_s=1.0, rows_in=10, rows_out=10),
+        ],
+    )
+
+    with caplog.at_level(logging.INFO):
+        emit_metrics(metrics, 'test-uuid', tmp_path)
+
+    assert 'slowest stage: fetched_paths' in caplog.text
+    assert caplog.records[-1].compute_metrics['stages'][0]['stage'] == 'fetched_paths'
+    assert json.loads((tmp_path / 'test-uuid.json').read_text()) == metrics.model_dump(mode='json')
@@ -1,8 +1,12 @@
+from climatoology.base.exception import ClimatoologyUserError
 from geopandas import testing
 
+from bikeability.core.input import BikeabilityIndicators, ComputeInputBikeability
 
-def test_get_paths(operator, expected_compute_input, default_aoi, ohsome_api_osm, default_paths):
-    expected_paths = default_paths.drop(columns=['path_sharing'])
+
+def test_get_paths(operator, expected_compute_input, default_aoi, ohsome_api_osm, test_line):
+    # the way is returned as line and as polygon, only the line is kept
+    expected_paths = test_line.drop(columns=['path_sharing'])
     received_paths = operator.get_paths(default_aoi)
 
     testing.assert_geodataframe_equal(
@@ -14,6 +18,28 @@ def test_get_paths(operator, expected_compute_input, default_aoi, ohsome_api_osm
     )
 
 
+def test_prepare_paths_hilbert_order(operator, default_paths):
+    paths = default_paths.drop(columns=['path_sharing'])
+    operator.hilbert_order = True
+
+    prepared_paths = operator.prepare_paths(paths.copy(deep=False))
+
+    assert sorted(prepared_paths.index) == list(paths.index)
+    testing.assert_geoseries_equal(prepared_paths.geometry.sort_index(), paths.geometry)
+    assert {'path_sharing', 'length_m'} <= set(prepared_paths.columns)
+
+
+def test_operator_keeps_paths_for_one_computation_only(operator):
+    assert operator.pipeline.cache is None
+    for stage in ['fetched_paths', 'valid_paths', 'paths', 'path_index', 'parallel_car_parking', 'summary']:
+        assert not operator.pipeline.stages[stage].cacheable
+
+
+def test_ohsome_requests_wait_for_the_cost_check(operator):
+    for stage in ['fetched_paths', 'parallel_car_parking']:
+        assert 'cost_signals' in operator.pipeline.stages[stage].inputs
+
+
 def test_get_parking(operator, default_aoi, ohsome_api_parking, expected_parking_polygon):
     computed_parking_polygon = operator.get_parallel_parking(default_aoi)
 
@@ -24,3 +50,54 @@ def test_get_parking(operator, default_aoi, ohsome_api_parking, expected_parking
         check_geom_type=True,
         check_less_precise=True,
     )
+
+
+def test_run_optional_indicator_keeps_artifacts_before_failure(operator, default_aoi, default_paths, compute_resources):
+    def failing_indicator(aoi, paths, resources, artifacts):
+        artifacts.append('first artifact')
+        raise ClimatoologyUserError('The second artifact failed')
+
+    artifacts = operator.run_optional_indicator(
+        BikeabilityIndicators.SLOPE, failing_indicator, default_aoi, default_paths, compute_resources
+    )
+
+    assert artifacts == ['first artifact']
+
+
+def test_run_optional_indicator_does_not_modify_paths(operator, default_aoi, default_paths, compute_resources):
+    def column_adding_indicator(aoi, paths, resources, artifacts):
+        paths['naturalness'] = 0.5
+
+    operator.run_optional_indicator(
+        BikeabilityIndicators.NATURALNESS, column_adding_indicator, default_aoi, default_paths, compute_resources
+    )
+
+    assert 'naturalness' not in default_paths.columns
+
+
+def test_run_optional_indicator_skips_downgraded_indicator(operator, default_aoi, default_paths, compute_resources):
+    def indicator(aoi, paths, resources, artifacts):
+        artifacts.append('artifact')
+
+    artifacts = operator.run_optional_indicator(
+        BikeabilityIndicators.SLOPE,
+        indicator,
+        default_aoi,
+        default_paths,
+        compute_resources,
+        {BikeabilityIndicators.SLOPE},
+    )
+
+    assert artifacts == []
+
+
+def test_estimate_cost(operator, default_aoi, ohsome_api_count):
+    params = ComputeInputBikeability(optional_indicators={BikeabilityIndicators.SLOPE})
+
+    estimate = operator.estimate_cost(default_aoi, params)
+
+    assert estimate.signals.path_count == 6078
+    assert set(estimate.indicators) == {BikeabilityIndicators.SLOPE}
+    assert estimate.core.time_s > 0
+    # optional indicators cost nothing until the model is calibrated
+    assert estimate.time_s == estimate.core.time_s
@@ -0,0 +1,169 @@
+import threading
+from datetime import timedelta
+from unittest.mock import Mock
+
+import pandas as pd
+import pytest
+import shapely
+
+from bikeability.core.pipeline import Pipeline, Stage, StageCache, copy_inputs, fingerprint_frames
+
+
+def test_pipeline_runs_stages_in_dependency_order():
+    pipeline = Pipeline(
+        [
+            Stage('doubled', lambda x: 2 * x, inputs=('x',)),
+            Stage('sum', lambda x, doubled: x + doubled, inputs=('x', 'doubled')),
+        ]
+    )
+
+    assert pipeline.run(sources={'x': 3}, targets=['sum']) == {'sum': 9}
+
+
+def test_pipeline_only_runs_required_stages():
+    unused = Mock()
+    pipeline = Pipeline([Stage('doubled', lambda x: 2 * x, inputs=('x',)), Stage('unused', unused, inputs=('x',))])
+
+    pipeline.run(sources={'x': 3}, targets=['doubled'])
+
+    unused.assert_not_called()
+
+
+def test_pipeline_runs_independent_stages_in_parallel():
+    barrier = threading.Barrier(2, timeout=5)
+    pipeline = Pipeline([Stage('a', barrier.wait, inputs=()), Stage('b', barrier.wait, inputs=())])
+
+    outputs = pipeline.run(sources={}, targets=['a', 'b'])
+
+    assert set(outputs.values()) == {0, 1}
+
+
+def test_pipeline_reuses_cached_stages():
+    fetch = Mock(side_effect=lambda aoi: aoi.area)
+    pipeline = Pipeline(
+        [
+            Stage('fetched', fetch, inputs=('aoi',)),
+            Stage(
+                'artifact',
+                lambda fetched, resources: (fetched, resources),
+                inputs=('fetched', 'resources'),
+                cacheable=False,
+            ),
+        ],
+        cache=StageCache(),
+    )
+
+    first = pipeline.run(sources={'aoi': shapely.box(0, 0, 1, 1), 'resources': 'a'}, targets=['artifact'])
+    second = pipeline.run(sources={'aoi': shapely.box(0, 0, 1, 1), 'resources': 'b'}, targets=['artifact'])
+
+    assert fetch.call_count == 1
+    assert first == {'artifact': (1.0, 'a')}
+    assert second == {'artifact': (1.0, 'b')}
+
+
+def test_pipeline_recomputes_changed_inputs():
+    fetch = Mock(side_effect=lambda aoi: aoi.area)
+    pipeline = Pipeline([Stage('fetched', fetch, inputs=('aoi',))], cache=StageCache())
+
+    pipeline.run(sources={'aoi': shapely.box(0, 0, 1, 1)}, targets=['fetched'])
+    outputs = pipeline.run(sources={'aoi': shapely.box(0, 0, 2, 2)}, targets=['fetched'])
+
+    assert fetch.call_count == 2
+    assert outputs == {'fetched': 4.0}
+
+
+def test_pipeline_keys_stages_by_fetched_data():
+    fetched_data = [pd.DataFrame({'value': [1, 2]}), pd.DataFrame({'value': [1, 2]}), pd.DataFrame({'value': [1, 3]})]
+    summarise = Mock(side_effect=lambda fetched: fetched['value'].sum())
+    pipeline = Pipeline(
+        [
+            Stage(
+                'fetched',
+                lambda aoi: fetched_data.pop(0),
+                inputs=('aoi',),
+                cacheable=False,
+                fingerprint=fingerprint_frames,
+            ),
+            Stage('summary', summarise, inputs=('fetched',)),
+        ],
+        cache=StageCache(),
+    )
+
+    outputs = [pipeline.run(sources={'aoi': shapely.box(0, 0, 1, 1)}, targets=['summary']) for _ in range(3)]
+
+    assert summarise.call_count == 2
+    assert outputs == [{'summary': 3}, {'summary': 3}, {'summary': 4}]
+
+
+def test_fingerprint_frames_hashes_geometries_and_tags(default_paths):
+    changed_tags = default_paths.copy()
+    changed_tags.at[0, '@other_tags'] = {'highway': 'cycleway'}
+    moved = default_paths.copy()
+    moved['geometry'] = moved.translate(xoff=0.001)
+
+    assert fingerprint_frames((default_paths, default_paths)) == fingerprint_frames(
+        (default_paths.copy(), default_paths)
+    )
+    assert fingerprint_frames(changed_tags) != fingerprint_frames(default_paths)
+    assert fingerprint_frames(moved) != fingerprint_frames(default_paths)
+
+
+def test_pipeline_raises_stage_errors():
+    def failing_stage():
+        raise ValueError('Stage failed')
+
+    pipeline = Pipeline([Stage('failing', failing_stage)], cache=StageCache())
+
+    with pytest.raises(ValueError, match='Stage failed'):
+        pipeline.run(sources={}, targets=['failing'])
+
+
+def test_pipeline_rejects_unknown_inputs():
+    pipeline = Pipeline([Stage('doubled', lambda x: 2 * x, inputs=('x',))])
+
+    with pytest.raises(KeyError, match='x'):
+        pipeline.run(sources={}, targets=['doubled'])
+
+
+def test_pipeline_rejects_cycles():
+    pipeline = Pipeline([Stage('a', lambda b: b, inputs=('b',)), Stage('b', lambda a: a, inputs=('a',))])
+
+    with pytest.raises(ValueError, match='cycle'):
+        pipeline.run(sources={}, targets=['a'])
+
+
+def test_stage_cache_evicts_least_recently_used():
+    cache = StageCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+
+    assert cache.get('a') == (True, 1)
+    assert cache.get('b') == (False, None)
+    assert cache.get('c') == (True, 3)
+
+
+def test_stage_cache_expires_entries():
+    cache = StageCache(max_age=timedelta(seconds=-1))
+    cache.put('a', 1)
+
+    assert cache.get('a') == (False, None)
+
+
+def test_copy_inputs_does_not_modify_data_frames(default_paths):
+    def add_column(paths):
+        paths['color'] = 'red'
+        return paths
+
+    copy_inputs(add_column)(default_paths)
+
+    assert 'color' not in default_paths.columns
+
+
+def test_pipeline_runs_sequentially_in_calling_thread():
+    pipeline = Pipeline([Stage('a', threading.get_ident), Stage('b', threading.get_ident)])
+
+    outputs = pipeline.run(sources={}, targets=['a', 'b'], sequential=True)
+
+    assert outputs == {'a': threading.get_ident(), 'b': threading.get_ident()}
@@ -2,6 +2,7 @@ from climatoology.base.artifact import Artifact
 from climatoology.base.plugin_info import PluginInfo
 
 from bikeability.core.input import BikeabilityIndicators
+from bikeability.core.operator_worker import OperatorBikeability
 
 
 def test_plugin_info_request(operator):
@@ -25,7 +26,7 @@ def test_plugin_compute_request_minimal(
         params=expected_compute_input,
     )
 
-    assert len(computed_artifacts) == 5
+    assert len(computed_artifacts) == 8
     for artifact in computed_artifacts:
         assert isinstance(artifact, Artifact)
 
@@ -52,6 +53,69 @@ def test_plugin_compute_request_all_optionals(
         params=expected_compute_input,
     )
 
-    assert len(computed_artifacts) == 11
+    assert len(computed_artifacts) == 14
     for artifact in computed_artifacts:
         assert isinstance(artifact, Artifact)
+
+
+def test_plugin_info_is_generated_once(operator):
+    assert operator.info() is operator.info()
+
+
+def test_plugin_compute_request_shared_geometry(
+    default_ors_settings,
+    naturalness_utility_mock,
+    default_s3_settings,
+    expected_compute_input,
+    default_aoi,
+    default_aoi_properties,
+    compute_resources,
+    ohsome_api_osm,
+    ohsome_api_parking,
+    ohsome_api_count,
+):
+    operator = OperatorBikeability(
+        naturalness_utility_mock, default_ors_settings, default_s3_settings, shared_geometry=True
+    )
+
+    computed_artifacts = operator.compute(
+        resources=compute_resources,
+        aoi=default_aoi,
+        aoi_properties=default_aoi_properties,
+        params=expected_compute_input,
+    )
+
+    assert len(computed_artifacts) == 5
+    assert computed_artifacts[0].metadata.name == 'Bikeability of Paths'
+    for legend_title in ['Smoothness', 'Surface Type', 'Dooring Risk']:
+        assert f'### {legend_title} ' in computed_artifacts[0].metadata.description
+
+
+def test_plugin_compute_request_overview(
+    default_ors_settings,
+    naturalness_utility_mock,
+    default_s3_settings,
+    expected_compute_input,
+    default_aoi,
+    default_aoi_properties,
+    compute_resources,
+    ohsome_api_osm,
+    ohsome_api_parking,
+    ohsome_api_count,
+):
+    operator = OperatorBikeability(
+        naturalness_utility_mock, default_ors_settings, default_s3_settings, overview_min_paths=1
+    )
+
+    computed_artifacts = operator.compute(
+        resources=compute_resources,
+        aoi=default_aoi,
+        aoi_properties=default_aoi_properties,
+        params=expected_compute_input,
+    )
+
+    # the fixture paths lie at the south-western corner of the AOI, in a cell only partly overlapping it
+    overview_names = [artifact.metadata.name for artifact in computed_artifacts[8:]]
+    assert len(overview_names) >= 1
+    assert overview_names[0] == 'Overview of Exclusive Bike Paths'
+    assert all(name.startswith('Overview of') for name in overview_names)
@@ -0,0 +1,19 @@
+import pstats
+import sys
+
+from bikeability.core.profiling import profile_computation
+
+
+def profiled_function():
+    return sum(range(1000))
+
+
+def test_profile_computation_falls_back_to_cprofile(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, 'pyinstrument', None)
+
+    with profile_computation(tmp_path / 'profiles', 'test-uuid') as profile_path:
+        profiled_function()
+
+    assert profile_path == tmp_path / 'profiles' / 'test-uuid.pstats'
+    profiled_functions = [function for _, _, function in pstats.Stats(str(profile_path)).stats]
+    assert 'profiled_function' in profiled_functions
@@ -0,0 +1,99 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+import urllib3
+
+from bikeability.core.pipeline import Pipeline, Stage
+from bikeability.core.tracing import SpanKind, StatusCode, configure_tracing, get_current_span, start_span
+
+
+@pytest.fixture
+def traces_file(tmp_path):
+    traces_file = tmp_path / 'traces' / 'spans.jsonl'
+    configure_tracing(traces_file)
+    yield traces_file
+    configure_tracing(None)
+
+
+def read_spans(traces_file) -> list[dict]:
+    documents = [json.loads(line) for line in traces_file.read_text().splitlines()]
+    return [document['resourceSpans'][0]['scopeSpans'][0]['spans'][0] for document in documents]
+
+
+def test_start_span_nests_spans(traces_file):
+    with start_span('parent', trace_id='a' * 32) as parent:
+        with start_span('child', kind=SpanKind.CLIENT, attributes={'features.count': 3}):
+            pass
+
+    child, exported_parent = read_spans(traces_file)
+
+    assert exported_parent['spanId'] == parent.span_id
+    assert 'parentSpanId' not in exported_parent
+    assert child['traceId'] == 'a' * 32
+    assert child['parentSpanId'] == parent.span_id
+    assert child['kind'] == SpanKind.CLIENT
+    assert child['attributes'] == [{'key': 'features.count', 'value': {'intValue': '3'}}]
+    assert child['status']['code'] == StatusCode.OK
+    assert int(child['endTimeUnixNano']) >= int(child['startTimeUnixNano'])
+
+
+def test_start_span_records_errors(traces_file):
+    with pytest.raises(ValueError), start_span('failing'):
+        raise ValueError('Service unavailable')
+
+    (span,) = read_spans(traces_file)
+
+    assert span['status'] == {'code': StatusCode.ERROR, 'message': 'ValueError: Service unavailable'}
+    assert span['events'][0]['name'] == 'exception'
+
+
+def test_pipeline_stages_inherit_current_span(traces_file):
+    pipeline = Pipeline([Stage('current', lambda: get_current_span().parent_span_id)])
+
+    with start_span('compute') as compute_span:
+        outputs = pipeline.run(sources={}, targets=['current'])
+
+    assert outputs['current'] == compute_span.span_id
+
+
+def test_http_is_only_instrumented_while_tracing(tmp_path):
+    urlopen = urllib3.connectionpool.HTTPConnectionPool.urlopen
+
+    configure_tracing(tmp_path / 'spans.jsonl')
+    instrumented_urlopen = urllib3.connectionpool.HTTPConnectionPool.urlopen
+    configure_tracing(None)
+
+    assert instrumented_urlopen is not urlopen
+    assert urllib3.connectionpool.HTTPConnectionPool.urlopen is urlopen
+
+
+def test_http_requests_are_counted(traces_file):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers['Content-Length']))
+            body = b'{"result": []}'
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with start_span('ohsome', kind=SpanKind.CLIENT):
+            urllib3.request('POST', f'http://127.0.0.1:{server.server_port}/', body=b'bpolys=...')
+    finally:
+        server.shutdown()
+
+    (span,) = read_spans(traces_file)
+    attributes = {attribute['key']: attribute['value'] for attribute in span['attributes']}
+
+    assert attributes['http.request.count'] == {'intValue': '1'}
+    assert attributes['http.request.body.size'] == {'intValue': '10'}
+    assert attributes['http.response.body.size'] == {'intValue': '14'}
+    assert attributes['http.response.status_code'] == {'intValue': '200'}